@@ -5,12 +5,14 @@ import functools
 import logging
 import random
 import secrets
+import time
 from argparse import Namespace
+from array import array
 from collections import Counter, deque
-from collections.abc import Collection, MutableSequence
+from collections.abc import Collection, MutableMapping, MutableSequence
 from enum import IntEnum, IntFlag
 from typing import (AbstractSet, Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Literal, Mapping, NamedTuple,
-                    Optional, Protocol, Set, Tuple, Union, TYPE_CHECKING)
+                    Optional, Protocol, Set, Tuple, Type, Union, TYPE_CHECKING)
 import dataclasses
 
 from typing_extensions import NotRequired, TypedDict
@@ -18,9 +20,11 @@ from typing_extensions import NotRequired, TypedDict
 import NetUtils
 import Options
 import Utils
+from rule_builder import get_compiled_rule
 
 if TYPE_CHECKING:
     from entrance_rando import ERPlacementState
+    from rule_builder import CompiledRule
     from worlds import AutoWorld
 
 
@@ -67,6 +71,33 @@ class PlandoItemBlock:
     count: dict[str, int] = dataclasses.field(default_factory=dict)
 
 
+@dataclasses.dataclass
+class ProgressionBalancingStats:
+    """What Fill.balance_multiworld_progression did, for the generation log and the spoiler."""
+    spheres: int = 0
+    balanced_spheres: int = 0
+    """spheres in which at least one player was below their threshold"""
+    swaps_tried: int = 0
+    """candidate items tested for whether their player needs them earlier"""
+    swaps_accepted: int = 0
+    """items moved into earlier spheres"""
+    sweeps: int = 0
+    replayed_spheres: int = 0
+    """spheres taken from an earlier search instead of being searched for again"""
+    phase_times: dict[str, float] = dataclasses.field(default_factory=dict)
+    """seconds spent per phase of balancing"""
+
+    def add_time(self, phase: str, start: float) -> float:
+        """Adds the time since start to phase, returning the current time as the start of the next phase."""
+        now = time.perf_counter()
+        self.phase_times[phase] = self.phase_times.get(phase, 0.0) + now - start
+        return now
+
+    def summary(self) -> str:
+        return (f"moved {self.swaps_accepted} items after testing {self.swaps_tried} in {self.balanced_spheres} "
+                f"of {self.spheres} spheres, sweeping {self.sweeps} times and replaying {self.replayed_spheres} spheres")
+
+
 class MultiWorld():
     debug_types = False
     player_name: Dict[int, str]
@@ -86,6 +117,9 @@ class MultiWorld():
     progression_balancing: Dict[int, Options.ProgressionBalancing]
     completion_condition: Dict[int, Callable[[CollectionState], bool]]
     indirect_connections: Dict[Region, Set[Entrance]]
+    unlock_index: UnlockIndex
+    prog_item_indices: Dict[str, ProgItemIndex]
+    """ProgItemIndex of the prog_items of each game"""
     exclude_locations: Dict[int, Options.ExcludeLocations]
     priority_locations: Dict[int, Options.PriorityLocations]
     start_inventory: Dict[int, Options.StartInventory]
@@ -171,6 +205,8 @@ class MultiWorld():
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
+        self.unlock_index = UnlockIndex()
+        self.prog_item_indices = {}
         self.start_inventory_from_pool: Dict[int, Options.StartInventoryPool] = {}
         self.plando_item_blocks = {}
 
@@ -188,6 +224,12 @@ class MultiWorld():
     def get_all_ids(self) -> Tuple[int, ...]:
         return self.player_ids + tuple(self.groups)
 
+    def get_prog_item_index(self, player: int) -> ProgItemIndex:
+        game = self.game[player]
+        if game not in self.prog_item_indices:
+            self.prog_item_indices[game] = ProgItemIndex()
+        return self.prog_item_indices[game]
+
     def add_group(self, name: str, game: str, players: AbstractSet[int] = frozenset()) -> Tuple[int, Group]:
         """Create a group with name and return the assigned player ID and group.
         If a group of this name already exists, the set of players is extended instead of creating a new one."""
@@ -599,24 +641,19 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
+        with SphereSearch(CollectionState(self), self.get_filled_locations()) as search:
+            locations = search.remaining
+
+            while locations:
+                sphere = search.find_sphere()
+                yield sphere
+                if not sphere:
+                    if locations:
+                        yield locations  # unreachable locations
+                    break
 
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+                for location in sphere:
+                    search.collect(location)
 
     def get_sendable_spheres(self) -> Iterator[Set[Location]]:
         """
@@ -625,7 +662,6 @@ class MultiWorld():
         If there are unreachable locations, the last sphere of reachable locations is followed by an empty set,
         and then a set of all of the unreachable locations.
         """
-        state = CollectionState(self)
         locations: Set[Location] = set()
         events: Set[Location] = set()
         for location in self.get_filled_locations():
@@ -633,33 +669,30 @@ class MultiWorld():
                 locations.add(location)
             else:
                 events.add(location)
+        with SphereSearch(CollectionState(self), locations | events) as search:
+            while locations:
+                sphere: Set[Location] = set()
+
+                # cull events out, keeping the sendable locations found along the way for this sphere
+                while True:
+                    reachable = search.find_sphere()
+                    done_events = reachable & events
+                    sphere |= reachable - done_events
+                    if not done_events:
+                        break
+                    for event in done_events:
+                        search.collect(event)
+                    events -= done_events
+
+                yield sphere
+                if not sphere:
+                    if locations:
+                        yield locations  # unreachable locations
+                    break
 
-        while locations:
-            sphere: Set[Location] = set()
-
-            # cull events out
-            done_events: Set[Union[Location, None]] = {None}
-            while done_events:
-                done_events = set()
-                for event in events:
-                    if event.can_reach(state):
-                        state.collect(event.item, True, event)
-                        done_events.add(event)
-                events -= done_events
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+                for location in sphere:
+                    search.collect(location)
+                locations -= sphere
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
@@ -692,38 +725,481 @@ class MultiWorld():
                 return False  # still locations required to be collected
             return True
 
-        locations = [location for location in self.get_locations() if location_relevant(location)]
+        relevant_locations = (location for location in self.get_locations() if location_relevant(location))
+        with SphereSearch(state, relevant_locations) as search:
+            locations = search.remaining
 
-        while locations:
-            sphere: List[Location] = []
-            for n in range(len(locations) - 1, -1, -1):
-                if locations[n].can_reach(state):
-                    sphere.append(locations.pop(n))
+            while locations:
+                sphere = search.find_sphere()
 
-            if not sphere:
-                # ran out of places and did not finish yet, quit
-                logging.warning(f"Could not access required locations for accessibility check."
-                                f" Missing: {locations}")
-                return False
+                if not sphere:
+                    # ran out of places and did not finish yet, quit
+                    logging.warning(f"Could not access required locations for accessibility check."
+                                    f" Missing: {locations}")
+                    return False
 
-            for location in sphere:
-                if location.item:
-                    state.collect(location.item, True, location)
+                for location in sphere:
+                    if location.item:
+                        search.collect(location)
 
-            if self.has_beaten_game(state):
-                beatable_fulfilled = True
+                if self.has_beaten_game(state):
+                    beatable_fulfilled = True
 
-            if all_done():
-                return True
+                if all_done():
+                    return True
 
         return False
 
 
 PathValue = Tuple[str, Optional["PathValue"]]
+ConnectionDependency = Union[Tuple[int, Optional[str]], "Region", None]
+"""(player, item name) for an item count, (player, None) for all of a player's items, a Region for its reachability and
+None for anything that can't be tracked"""
+
+
+class PlayerTable(dict):
+    """Maps player to one of their tables of a CollectionState, such as their prog_items Counter.
+    Tables of copied states share their entries until first access, when the accessing state copies the entry."""
+    __slots__ = ("shared",)
+
+    shared: Dict[int, Any]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.shared = {}
+
+    def __missing__(self, player: int) -> Any:
+        ret = self[player] = self.copy_entry(player, self.shared[player])
+        return ret
+
+    def copy_entry(self, player: int, entry: Any) -> Any:
+        return entry.copy()
+
+    def share(self) -> Dict[int, Any]:
+        """Hand all entries over to be shared and return them, to be shared with a table of the copied state."""
+        if dict.__len__(self):
+            shared = self.shared.copy()
+            shared.update(dict.items(self))
+            dict.clear(self)
+            self.shared = shared
+        return self.shared
+
+    def unshare(self) -> None:
+        """Copy all still shared entries into this table."""
+        if self.shared:
+            for player in self.shared:
+                if not dict.__contains__(self, player):
+                    self[player]
+            self.shared = {}
+
+    def __contains__(self, player: object) -> bool:
+        return dict.__contains__(self, player) or player in self.shared
+
+    def get(self, player: int, default: Any = None) -> Any:
+        return self[player] if player in self else default
+
+    def __iter__(self) -> Iterator[int]:
+        self.unshare()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        self.unshare()
+        return dict.__len__(self)
+
+    def __eq__(self, other: object) -> bool:
+        self.unshare()
+        if isinstance(other, PlayerTable):
+            other.unshare()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        self.unshare()
+        return dict.__repr__(self)
+
+    def __delitem__(self, player: int) -> None:
+        self.unshare()
+        dict.__delitem__(self, player)
+
+    def keys(self):
+        self.unshare()
+        return dict.keys(self)
+
+    def values(self):
+        self.unshare()
+        return dict.values(self)
+
+    def items(self):
+        self.unshare()
+        return dict.items(self)
+
+    def pop(self, player: int, *args: Any) -> Any:
+        self.unshare()
+        return dict.pop(self, player, *args)
+
+    def popitem(self) -> Tuple[int, Any]:
+        self.unshare()
+        return dict.popitem(self)
+
+    def setdefault(self, player: int, default: Any = None) -> Any:
+        self.unshare()
+        return dict.setdefault(self, player, default)
+
+    def clear(self) -> None:
+        self.shared = {}
+        dict.clear(self)
+
+    def copy(self) -> Dict[int, Any]:
+        self.unshare()
+        return dict.copy(self)
+
+
+class ProgItemTable(PlayerTable):
+    """PlayerTable of ProgItemCounters, binding copied counters to the ConnectionDependencies of their state."""
+    __slots__ = ("dependencies",)
+
+    dependencies: ConnectionDependencies
+
+    def __init__(self, dependencies: ConnectionDependencies, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.dependencies = dependencies
+
+    def copy_entry(self, player: int, entry: Any) -> Any:
+        ret = entry.copy()
+        if isinstance(ret, ProgItemCounter):
+            ret.bind(player, self.dependencies)
+        return ret
+
+
+def _copy_table(table: Dict[int, Any], ret: PlayerTable, share: bool = True) -> PlayerTable:
+    """Fill ret with the entries of table, sharing them between both tables if possible."""
+    if type(table) is _RecordingTable:
+        # copied by an access rule while it is being recorded, which holds on to the entries it read
+        table = table.table
+        share = False
+    if share and isinstance(table, PlayerTable):
+        ret.shared = table.share()
+    else:
+        # tables that are still being written to by a sweep, or that got replaced by a plain dict
+        for player, entry in table.items():
+            dict.__setitem__(ret, player, ret.copy_entry(player, entry))
+    return ret
+
+
+class ConnectionDependencies:
+    """Blocked connections of incremental_reachability worlds, indexed by what their access rules read when they failed.
+    A settled connection is not re-checked until one of its dependencies changes."""
+    __slots__ = ("dependents", "settled", "changed_items")
+
+    dependents: Dict[ConnectionDependency, Set[Entrance]]
+    settled: PlayerTable
+    changed_items: Optional[Set[Tuple[int, str]]]
+    """if set, collects every (player, item name) that changed count, for a SphereSearch"""
+
+    def __init__(self, players: Iterable[int]) -> None:
+        self.dependents = {}
+        self.settled = PlayerTable((player, set()) for player in players)
+        self.changed_items = None
+
+    def __bool__(self) -> bool:
+        """Whether item_changed has anything to do, as counters only report changes to dependencies that are truthy."""
+        return self.changed_items is not None or bool(self.dependents)
+
+    def settle(self, connection: Entrance, dependencies: Set[ConnectionDependency]) -> None:
+        if None in dependencies:
+            return  # the rule read something that can't be tracked, it has to be re-checked every time
+        self.settled[connection.player].add(connection)
+        dependents = self.dependents
+        for dependency in dependencies:
+            if dependency in dependents:
+                dependents[dependency].add(connection)
+            else:
+                dependents[dependency] = {connection}
+
+    def unsettle(self, dependency: ConnectionDependency) -> Optional[Set[Entrance]]:
+        """Mark all connections depending on dependency for re-checking and return them."""
+        connections = self.dependents.pop(dependency, None)
+        if connections:
+            settled = self.settled
+            for connection in connections:
+                settled[connection.player].discard(connection)
+        return connections
+
+    def item_changed(self, player: int, item: str) -> None:
+        if self.changed_items is not None:
+            self.changed_items.add((player, item))
+        if self.dependents:
+            self.unsettle((player, item))
+            self.unsettle((player, None))
+
+    def copy(self, share: bool = True) -> ConnectionDependencies:
+        ret = ConnectionDependencies(())
+        ret.dependents = {dependency: connections.copy() for dependency, connections in self.dependents.items()}
+        _copy_table(self.settled, ret.settled, share)
+        return ret
+
+
+class ProgItemIndex(dict):
+    """Dense slots for the item names in one game's prog_items, shared by the ProgItemCounters of every state of a
+    multiworld. Names get their slot when first counted, so counters may be shorter than their index."""
+    __slots__ = ("names",)
+
+    names: List[str]
+    """item names by slot"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.names = []
+
+    def add(self, item: str) -> int:
+        slot = self[item] = len(self.names)
+        self.names.append(item)
+        return slot
+
+
+class ProgItemCounter(MutableMapping):
+    """Counts of one player's prog_items in an array, indexed by the ProgItemIndex of their game, so copying a state
+    copies one buffer per player. Works like a Counter for worlds that read or write it directly, except that item names
+    counted down to 0 are no longer contained. Reports changed item names to the ConnectionDependencies of its state."""
+    __slots__ = ("index", "counts", "player", "dependencies")
+
+    index: ProgItemIndex
+    counts: MutableSequence[Any]
+    """array of counts by slot, or a list once a world stores something that isn't an int, like a score"""
+    player: int
+    dependencies: Optional[ConnectionDependencies]
+
+    def __init__(self, index: Optional[ProgItemIndex] = None, iterable: Any = None, /, **kwargs: int) -> None:
+        self.index = ProgItemIndex() if index is None else index
+        self.counts = array("q")
+        self.player = 0
+        self.dependencies = None
+        self.update(iterable, **kwargs)
+
+    def bind(self, player: int, dependencies: ConnectionDependencies) -> ProgItemCounter:
+        self.player = player
+        self.dependencies = dependencies
+        return self
+
+    def __getitem__(self, item: str) -> Any:
+        slot = self.index.get(item)
+        if slot is None:
+            return 0
+        try:
+            return self.counts[slot]
+        except IndexError:  # the item got its slot after this counter last grew
+            return 0
+
+    def __setitem__(self, item: str, count: Any) -> None:
+        index = self.index
+        slot = index.get(item)
+        if slot is None:
+            slot = index.add(item)
+        counts = self.counts
+        if slot >= len(counts):
+            counts.extend([0] * (len(index) - len(counts)))
+        try:
+            counts[slot] = count
+        except (TypeError, OverflowError):
+            counts = self.counts = list(counts)
+            counts[slot] = count
+        if self.dependencies:
+            self.dependencies.item_changed(self.player, item)
+
+    def __delitem__(self, item: str) -> None:
+        if self[item]:
+            self[item] = 0
+
+    def __contains__(self, item: object) -> bool:
+        return bool(self[item])  # type: ignore[index]
+
+    def __iter__(self) -> Iterator[str]:
+        return (item for item, count in zip(self.index.names, self.counts) if count)
+
+    def __len__(self) -> int:
+        return len(self.counts) - self.counts.count(0)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self.items()) == {item: count for item, count in other.items() if count}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self.items())!r})"
+
+    def get(self, item: str, default: Any = None) -> Any:
+        return self[item] or default
+
+    def copy(self) -> ProgItemCounter:
+        ret = ProgItemCounter.__new__(type(self))
+        ret.index = self.index
+        ret.counts = self.counts[:]
+        ret.player = self.player
+        ret.dependencies = None
+        return ret
+
+    def clear(self) -> None:
+        items = list(self)
+        self.counts = array("q")
+        if self.dependencies:
+            for item in items:
+                self.dependencies.item_changed(self.player, item)
+
+    def pop(self, item: str, *args: Any) -> Any:
+        count = self[item]
+        if count:
+            self[item] = 0
+            return count
+        if args:
+            return args[0]
+        raise KeyError(item)
+
+    def setdefault(self, item: str, default: Any = None) -> Any:
+        if not self[item]:
+            self[item] = default
+        return self[item]
+
+    def update(self, iterable: Any = None, /, **kwargs: Any) -> None:
+        """Add counts from a mapping or count the elements of an iterable, like Counter.update."""
+        if iterable is not None:
+            if isinstance(iterable, Mapping):
+                for item, count in iterable.items():
+                    self[item] += count
+            else:
+                for item in iterable:
+                    self[item] += 1
+        for item, count in kwargs.items():
+            self[item] += count
+
+    def subtract(self, iterable: Any = None, /, **kwargs: Any) -> None:
+        if iterable is not None:
+            if isinstance(iterable, Mapping):
+                for item, count in iterable.items():
+                    self[item] -= count
+            else:
+                for item in iterable:
+                    self[item] -= 1
+        for item, count in kwargs.items():
+            self[item] -= count
+
+    def total(self) -> Any:
+        return sum(self.counts)
+
+    def most_common(self, n: Optional[int] = None) -> List[Tuple[str, Any]]:
+        return Counter(dict(self.items())).most_common(n)
+
+    def elements(self) -> Iterator[str]:
+        return Counter(dict(self.items())).elements()
+
+
+class _RecordingCounter:
+    """Read-only stand-in for a player's prog_items Counter, recording which item names are read."""
+    __slots__ = ("counter", "player", "dependencies")
+
+    def __init__(self, counter: Mapping[str, Any], player: int, dependencies: Set[ConnectionDependency]) -> None:
+        self.counter = counter
+        self.player = player
+        self.dependencies = dependencies
+
+    def __getitem__(self, item: str) -> int:
+        self.dependencies.add((self.player, item))
+        return self.counter[item]
+
+    def get(self, item: str, default: Any = None) -> Any:
+        self.dependencies.add((self.player, item))
+        return self.counter.get(item, default)
+
+    def __contains__(self, item: str) -> bool:
+        self.dependencies.add((self.player, item))
+        return item in self.counter
+
+    def __iter__(self) -> Iterator[str]:
+        self.dependencies.add((self.player, None))
+        return iter(self.counter)
+
+    def __len__(self) -> int:
+        self.dependencies.add((self.player, None))
+        return len(self.counter)
+
+    def __getattr__(self, name: str) -> Any:
+        # items(), values(), total() and the like depend on every item of the player
+        self.dependencies.add((self.player, None))
+        return getattr(self.counter, name)
+
+
+class _RecordingRegionSet:
+    """Read-only stand-in for a player's reachable_regions, recording which unreached regions are asked for."""
+    __slots__ = ("regions", "dependencies")
+
+    def __init__(self, regions: Set[Region], dependencies: Set[ConnectionDependency]) -> None:
+        self.regions = regions
+        self.dependencies = dependencies
+
+    def __contains__(self, region: Region) -> bool:
+        if region in self.regions:
+            return True  # regions only ever get added during a sweep, so this can't change
+        self.dependencies.add(region)
+        return False
+
+    def __getattr__(self, name: str) -> Any:
+        self.dependencies.add(None)
+        return getattr(self.regions, name)
+
+    def __iter__(self) -> Iterator[Region]:
+        self.dependencies.add(None)
+        return iter(self.regions)
+
+    def __len__(self) -> int:
+        self.dependencies.add(None)
+        return len(self.regions)
+
+
+class _RecordingTable(dict):
+    """Stands in for CollectionState.prog_items or .reachable_regions while an access rule is being recorded."""
+    __slots__ = ("table", "view_type", "dependencies")
+
+    def __init__(self, table: Dict[int, Any], view_type: Type[Union[_RecordingCounter, _RecordingRegionSet]],
+                 dependencies: Set[ConnectionDependency]) -> None:
+        super().__init__()
+        self.table = table
+        self.view_type = view_type
+        self.dependencies = dependencies
+
+    def __missing__(self, player: int) -> Union[_RecordingCounter, _RecordingRegionSet]:
+        ret: Union[_RecordingCounter, _RecordingRegionSet]
+        if self.view_type is _RecordingCounter:
+            ret = _RecordingCounter(self.table[player], player, self.dependencies)
+        else:
+            ret = _RecordingRegionSet(self.table[player], self.dependencies)
+        self[player] = ret
+        return ret
+
+    def get(self, player: int, default: Any = None) -> Any:
+        return self[player] if player in self.table else default
+
+    def __contains__(self, player: object) -> bool:
+        return player in self.table
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.table)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def keys(self):
+        return self.table.keys()
+
+    def values(self):
+        return [self[player] for player in self.table]
+
+    def items(self):
+        return [(player, self[player]) for player in self.table]
 
 
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    prog_items: Dict[int, ProgItemCounter]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
@@ -732,31 +1208,59 @@ class CollectionState():
     locations_checked: Set[Location]
     stale: Dict[int, bool]
     allow_partial_entrances: bool
+    connection_dependencies: ConnectionDependencies
+    updating_regions: int
+    """number of update_reachable_regions calls in progress"""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld, allow_partial_entrances: bool = False):
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self.connection_dependencies = ConnectionDependencies(parent.get_all_ids())
+        self.prog_items = ProgItemTable(self.connection_dependencies,
+                                        ((player, ProgItemCounter(parent.get_prog_item_index(player))
+                                          .bind(player, self.connection_dependencies))
+                                         for player in parent.get_all_ids()))
         self.multiworld = parent
-        self.reachable_regions = {player: set() for player in parent.get_all_ids()}
-        self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.reachable_regions = PlayerTable((player, set()) for player in parent.get_all_ids())
+        self.blocked_connections = PlayerTable((player, set()) for player in parent.get_all_ids())
         self.advancements = set()
         self.path = {}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
         self.allow_partial_entrances = allow_partial_entrances
+        self.updating_regions = 0
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
             for item in items:
                 self.collect(item, True)
 
-    def update_reachable_regions(self, player: int):
+    def update_reachable_regions(self, player: int, connections: Optional[Iterable[Entrance]] = None):
+        """
+        :param connections: Only search onward from these connections, instead of retrying every blocked connection.
+                            This is only correct if nothing changed since the last update other than what these
+                            connections lead to, like when they were just connected.
+        """
+        if type(self.reachable_regions) is _RecordingTable:
+            # an access rule being recorded asked for another player's regions, so sweep them on the real tables
+            prog_items, reachable_regions = self.prog_items, self.reachable_regions
+            self.prog_items, self.reachable_regions = prog_items.table, reachable_regions.table
+            try:
+                self.update_reachable_regions(player)
+            finally:
+                self.prog_items, self.reachable_regions = prog_items, reachable_regions
+            return
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
         start: Region = world.get_region(world.origin_region_name)
+        if world.incremental_reachability:
+            queue = deque(self.blocked_connections[player] - self.connection_dependencies.settled[player])
+        elif connections is not None and world.explicit_indirect_conditions:
+            blocked_connections = self.blocked_connections[player]
+            queue = deque(connection for connection in connections if connection in blocked_connections)
+        else:
+            queue = deque(self.blocked_connections[player])
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
@@ -764,10 +1268,16 @@ class CollectionState():
             self.blocked_connections[player].update(start.exits)
             queue.extend(start.exits)
 
-        if world.explicit_indirect_conditions:
-            self._update_reachable_regions_explicit_indirect_conditions(player, queue)
-        else:
-            self._update_reachable_regions_auto_indirect_conditions(player, queue)
+        self.updating_regions += 1
+        try:
+            if world.incremental_reachability:
+                self._update_reachable_regions_incremental(player, queue)
+            elif world.explicit_indirect_conditions:
+                self._update_reachable_regions_explicit_indirect_conditions(player, queue)
+            else:
+                self._update_reachable_regions_auto_indirect_conditions(player, queue)
+        finally:
+            self.updating_regions -= 1
 
     def _update_reachable_regions_explicit_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
@@ -787,6 +1297,7 @@ class CollectionState():
                 blocked_connections.update(new_region.exits)
                 queue.extend(new_region.exits)
                 self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                self.connection_dependencies.unsettle(new_region)
 
                 # Retry connections if the new region can unblock them
                 for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
@@ -814,21 +1325,75 @@ class CollectionState():
                     blocked_connections.update(new_region.exits)
                     queue.extend(new_region.exits)
                     self.path[new_region] = (new_region.name, self.path.get(connection, None))
+                    self.connection_dependencies.unsettle(new_region)
                     new_connection = True
             # sweep for indirect connections, mostly Entrance.can_reach(unrelated_Region)
             queue.extend(blocked_connections)
 
+    def _update_reachable_regions_incremental(self, player: int, queue: deque):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        settled_connections = self.connection_dependencies.settled[player]
+        # run BFS on the connections whose recorded dependencies changed, settling those that stay blocked
+        while queue:
+            connection = queue.popleft()
+            if connection in settled_connections or connection not in blocked_connections:
+                continue
+            new_region = connection.connected_region
+            if new_region in reachable_regions:
+                blocked_connections.remove(connection)
+            elif self._can_reach_connection_recorded(connection):
+                if self.allow_partial_entrances and not new_region:
+                    continue
+                assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                reachable_regions.add(new_region)
+                blocked_connections.remove(connection)
+                blocked_connections.update(new_region.exits)
+                queue.extend(new_region.exits)
+                self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+                # Retry connections that asked for the new region
+                dependents = self.connection_dependencies.unsettle(new_region)
+                if dependents:
+                    queue.extend(dependent for dependent in dependents if dependent.player == player)
+                indirect_connections = self.multiworld.indirect_connections.get(new_region)
+                if indirect_connections:
+                    settled_connections.difference_update(indirect_connections)
+                    queue.extend(indirect_connections)
+
+    def _can_reach_connection_recorded(self, connection: Entrance) -> bool:
+        """Check connection, settling it with the items and regions its access rule read if it is blocked."""
+        dependencies: Set[ConnectionDependency] = set()
+        prog_items, reachable_regions = self.prog_items, self.reachable_regions
+        self.prog_items = _RecordingTable(prog_items, _RecordingCounter, dependencies)
+        self.reachable_regions = _RecordingTable(reachable_regions, _RecordingRegionSet, dependencies)
+        try:
+            reachable = connection.can_reach(self)
+        finally:
+            self.prog_items, self.reachable_regions = prog_items, reachable_regions
+        if not reachable:
+            self.connection_dependencies.settle(connection, dependencies)
+        return reachable
+
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        """Copy this state. Per-player tables are shared between both states, each copying an entry on first access, so
+        copying only costs as much as the players touched afterwards."""
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        # a sweep holds on to the tables of the player it's sweeping, so a rule copying the state mid-sweep can't share
+        share = not self.updating_regions
+        ret.connection_dependencies = self.connection_dependencies.copy(share)
+        ret.prog_items = _copy_table(self.prog_items, ProgItemTable(ret.connection_dependencies), share)
+        ret.reachable_regions = _copy_table(self.reachable_regions, PlayerTable(), share)
+        ret.blocked_connections = _copy_table(self.blocked_connections, PlayerTable(), share)
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        ret.stale = dict.fromkeys(self.stale, True)
         ret.allow_partial_entrances = self.allow_partial_entrances
+        ret.updating_regions = 0
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -867,16 +1432,14 @@ class CollectionState():
         if locations is None:
             locations = self.multiworld.get_filled_locations()
         reachable_advancements = True
-        # since the loop has a good chance to run more than once, only filter the advancements once
-        locations = {location for location in locations if location.advancement and location not in self.advancements}
-
-        while reachable_advancements:
-            reachable_advancements = {location for location in locations if location.can_reach(self)}
-            locations -= reachable_advancements
-            for advancement in reachable_advancements:
-                self.advancements.add(advancement)
-                assert isinstance(advancement.item, Item), "tried to collect Event with no Item"
-                self.collect(advancement.item, True, advancement)
+        # only locations that something collected since their last check might have unlocked get checked again
+        with SphereSearch(self, (location for location in locations
+                                 if location.advancement and location not in self.advancements)) as search:
+            while reachable_advancements:
+                reachable_advancements = search.find_sphere()
+                for advancement in reachable_advancements:
+                    self.advancements.add(advancement)
+                    search.collect(advancement)
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
@@ -959,12 +1522,22 @@ class CollectionState():
         return total
 
     # item name group related
+    def _group_counts(self, item_name_group: str, player: int) -> Iterable[int]:
+        """Returns the counts in state of the item names of an item group, skipping some that are not in state."""
+        player_prog_items = self.prog_items[player]
+        item_names = self.multiworld.worlds[player].item_name_groups[item_name_group]
+        # recorded reads have to stay per item name, see _RecordingCounter
+        if type(player_prog_items) is ProgItemCounter and len(player_prog_items.counts) < len(item_names):
+            # less counted items than in the group, so only those can count towards it
+            return [count for item_name, count in zip(player_prog_items.index.names, player_prog_items.counts)
+                    if count and item_name in item_names]
+        return map(player_prog_items.__getitem__, item_names)
+
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         """Returns True if the state contains at least `count` items present in a specified item group."""
         found: int = 0
-        player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += player_prog_items[item_name]
+        for item_count in self._group_counts(item_name_group, player):
+            found += item_count
             if found >= count:
                 return True
         return False
@@ -974,29 +1547,24 @@ class CollectionState():
         Ignores duplicates of the same item.
         """
         found: int = 0
-        player_prog_items = self.prog_items[player]
-        for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
-            found += player_prog_items[item_name] > 0
+        for item_count in self._group_counts(item_name_group, player):
+            found += item_count > 0
             if found >= count:
                 return True
         return False
 
     def count_group(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state."""
-        player_prog_items = self.prog_items[player]
-        return sum(
-            player_prog_items[item_name]
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
-        )
+        return sum(self._group_counts(item_name_group, player))
 
     def count_group_unique(self, item_name_group: str, player: int) -> int:
         """Returns the cumulative count of items from an item group present in state.
         Ignores duplicates of the same item."""
-        player_prog_items = self.prog_items[player]
-        return sum(
-            player_prog_items[item_name] > 0
-            for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]
-        )
+        total = 0
+        for item_count in self._group_counts(item_name_group, player):
+            if item_count > 0:
+                total += 1
+        return total
 
     # Item related
     def collect(self, item: Item, prevent_sweep: bool = False, location: Optional[Location] = None) -> bool:
@@ -1018,9 +1586,250 @@ class CollectionState():
             # invalidate caches, nothing can be trusted anymore now
             self.reachable_regions[item.player] = set()
             self.blocked_connections[item.player] = set()
+            self.connection_dependencies.settled[item.player] = set()
             self.stale[item.player] = True
 
 
+class UnlockIndex:
+    """Locations and entrances with compiled access rules (see rule_builder), indexed by the items their rule depends on
+    and the counts at which collecting them can change its result, so searches can look up which of them an item might
+    have unlocked instead of checking all of them again."""
+    __slots__ = ("rules", "thresholds", "compiled_rules")
+
+    rules: Dict[Union[Location, Entrance], CompiledRule]
+    """indexed spots and the compiled rule they were indexed with"""
+    thresholds: Dict[Tuple[int, str], Dict[int, Set[Union[Location, Entrance]]]]
+    """spots by (player, item name) and the counts their rule compares it against"""
+    compiled_rules: Dict[Tuple[Any, int], CompiledRule]
+    """all rules compiled for this multiworld, so equal ones of a player are shared, see rule_builder.compile_rule"""
+
+    def __init__(self) -> None:
+        self.rules = {}
+        self.thresholds = {}
+        self.compiled_rules = {}
+
+    def get_rule(self, spot: Union[Location, Entrance]) -> Optional[CompiledRule]:
+        """Returns the compiled access rule of spot, indexing it by that rule,
+        or None if its access rule isn't compiled or it checks more than its access rule and parent region."""
+        compiled = get_compiled_rule(spot.access_rule)
+        if compiled is not None and type(spot).can_reach not in (Location.can_reach, Entrance.can_reach):
+            compiled = None
+        indexed = self.rules.get(spot, None)
+        if indexed is not compiled:
+            if indexed is not None:
+                del self.rules[spot]
+                for item, counts in indexed.thresholds.items():
+                    spots_by_count = self.thresholds[indexed.player, item]
+                    for count in counts:
+                        spots_by_count[count].discard(spot)
+            if compiled is not None:
+                self.rules[spot] = compiled
+                for item, counts in compiled.thresholds.items():
+                    spots_by_count = self.thresholds.setdefault((compiled.player, item), {})
+                    for count in counts:
+                        if count in spots_by_count:
+                            spots_by_count[count].add(spot)
+                        else:
+                            spots_by_count[count] = {spot}
+        return compiled
+
+    def get_unlocked(self, player: int, item: str, old_count: int, new_count: int) -> Set[Union[Location, Entrance]]:
+        """Returns the indexed spots whose rule can change its result when item goes from old_count to new_count."""
+        unlocked: Set[Union[Location, Entrance]] = set()
+        spots_by_count = self.thresholds.get((player, item), None)
+        if spots_by_count:
+            for count, spots in spots_by_count.items():
+                if old_count < count <= new_count:
+                    unlocked |= spots
+        return unlocked
+
+
+class SphereSearch:
+    """Finds the spheres of locations reachable with a CollectionState, for the caller to collect in between.
+
+    Locations of incremental_reachability worlds are indexed by their parent region and by the items and regions their
+    access rule read, so they are only checked again once one of those changed.
+    Locations with compiled access rules are looked up in the UnlockIndex of the multiworld instead, and are only
+    checked again once an item reached a count their rule compares against, or once a region they depend on became
+    reachable. Other locations are checked again whenever anything got collected.
+
+    Use it as a context manager, so it stops tracking the changes to the state once done."""
+    state: CollectionState
+    remaining: Set[Location]
+    """locations that weren't found reachable yet"""
+    candidates: Set[Location]
+    """remaining locations to check on the next search"""
+    unreached: Dict[Region, Set[Location]]
+    """remaining locations by a region that wasn't reachable when they were checked"""
+    blocked: Dict[ConnectionDependency, Set[Location]]
+    """remaining locations by the items their access rule read when it failed"""
+    counts: Dict[Tuple[int, str], int]
+    """counts of the items compiled access rules depend on, as of the last search"""
+    waiting: Set[Location]
+    """remaining locations to check once anything got collected"""
+    check_waiting: bool
+    changed_players: Set[int]
+    """players that collected items since the last search"""
+    changed_items: Set[Tuple[int, str]]
+    """items that changed count since the last search"""
+    outer_changes: Optional[Set[Tuple[int, str]]]
+    """changed_items of a search that was already running on the state, which has to learn about the changes too"""
+
+    def __init__(self, state: CollectionState, locations: Iterable[Location]) -> None:
+        self.state = state
+        self.remaining = set(locations)
+        worlds = state.multiworld.worlds
+        unlock_index = state.multiworld.unlock_index
+        self.waiting = {location for location in self.remaining
+                        if not worlds[location.player].incremental_reachability
+                        and unlock_index.get_rule(location) is None}
+        self.check_waiting = True
+        self.candidates = self.remaining - self.waiting
+        self.unreached = {}
+        self.blocked = {}
+        self.counts = {}
+        self.changed_players = set()
+        self.outer_changes = state.connection_dependencies.changed_items
+        self.changed_items = state.connection_dependencies.changed_items = set()
+
+    def __enter__(self) -> SphereSearch:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop tracking changes to the state, handing them to the search that was running on it before, if any."""
+        if self.outer_changes is not None:
+            self.outer_changes |= self.changed_items
+        self.state.connection_dependencies.changed_items = self.outer_changes
+
+    def collect(self, location: Location) -> bool:
+        assert location.item, f"tried to collect {location} with no Item"
+        changed = self.state.collect(location.item, True, location)
+        if changed:
+            self.changed_players.add(location.item.player)
+        return changed
+
+    def _unblock(self) -> None:
+        state = self.state
+        candidates = self.candidates
+        blocked = self.blocked
+        counts = self.counts
+        changed_items = self.changed_items
+        if self.outer_changes is not None:
+            self.outer_changes |= changed_items
+        # a nested search may have collected for players this one didn't
+        changed_players = self.changed_players
+        changed_players.update(player for player, _ in changed_items)
+        self.check_waiting = True
+        for item in changed_items:
+            if item in blocked:
+                candidates |= blocked.pop(item)
+        for player in changed_players:
+            if (player, None) in blocked:
+                candidates |= blocked.pop((player, None))
+            if not isinstance(state.prog_items[player], ProgItemCounter):
+                # replaced by a plain Counter, which doesn't report which items changed
+                for dependency in [dependency for dependency in blocked if dependency[0] == player]:
+                    candidates |= blocked.pop(dependency)
+                changed_items.update(item for item in counts if item[0] == player)
+        unlock_index = state.multiworld.unlock_index
+        for item in changed_items:
+            if item in counts:
+                player, name = item
+                old_count = counts[item]
+                new_count = counts[item] = state.prog_items[player][name]
+                if new_count > old_count:
+                    candidates |= unlock_index.get_unlocked(player, name, old_count, new_count)
+        for region in [region for region in self.unreached if region.player in changed_players]:
+            if region.can_reach(state):
+                candidates |= self.unreached.pop(region)
+        self.changed_items.clear()
+        self.changed_players = set()
+
+    def find_sphere(self) -> Set[Location]:
+        """Return the remaining locations reachable with the state, which are no longer remaining afterwards."""
+        if self.changed_players or self.changed_items:
+            self._unblock()
+        state = self.state
+        remaining = self.remaining
+        unreached = self.unreached
+        if self.check_waiting:
+            self.check_waiting = False
+            sphere = {location for location in self.waiting if location.can_reach(state)}
+            self.waiting -= sphere
+        else:
+            sphere = set()
+        for location in self.candidates:
+            if location not in remaining:
+                continue  # was indexed more than once
+            region = location.parent_region
+            assert region, f"called can_reach on a Location \"{location}\" with no parent_region"
+            if not region.can_reach(state):
+                if region in unreached:
+                    unreached[region].add(location)
+                else:
+                    unreached[region] = {location}
+            elif self._can_reach_indexed(location):
+                sphere.add(location)
+        self.candidates = set()
+        remaining -= sphere
+        return sphere
+
+    def _can_reach_indexed(self, location: Location) -> bool:
+        """Check location, indexing it by what its access rule depends on if it is blocked."""
+        state = self.state
+        compiled = state.multiworld.unlock_index.get_rule(location)
+        if compiled is None:
+            if state.multiworld.worlds[location.player].incremental_reachability:
+                return self._can_reach_recorded(location)
+            # its access rule got replaced since the search started
+            if location.can_reach(state):
+                return True
+            self.waiting.add(location)
+            return False
+        if location.can_reach(state):
+            return True
+        player = compiled.player
+        prog_items = state.prog_items[player]
+        counts = self.counts
+        for item in compiled.thresholds:
+            if (player, item) not in counts:
+                counts[player, item] = prog_items[item]
+        for region_name in compiled.regions:
+            region = state.multiworld.get_region(region_name, player)
+            if not region.can_reach(state):
+                if region in self.unreached:
+                    self.unreached[region].add(location)
+                else:
+                    self.unreached[region] = {location}
+        return False
+
+    def _can_reach_recorded(self, location: Location) -> bool:
+        """Check location, indexing it by the items and regions its access rule read if it is blocked."""
+        state = self.state
+        dependencies: Set[ConnectionDependency] = set()
+        prog_items, reachable_regions = state.prog_items, state.reachable_regions
+        state.prog_items = _RecordingTable(prog_items, _RecordingCounter, dependencies)
+        state.reachable_regions = _RecordingTable(reachable_regions, _RecordingRegionSet, dependencies)
+        try:
+            reachable = location.can_reach(state)
+        finally:
+            state.prog_items, state.reachable_regions = prog_items, reachable_regions
+        if not reachable:
+            if None in dependencies:
+                self.waiting.add(location)
+            else:
+                for dependency in dependencies:
+                    index = self.unreached if isinstance(dependency, Region) else self.blocked
+                    if dependency in index:
+                        index[dependency].add(location)
+                    else:
+                        index[dependency] = {location}
+        return reachable
+
+
 class EntranceType(IntEnum):
     ONE_WAY = 1
     TWO_WAY = 2
@@ -1505,6 +2314,7 @@ class Spoiler:
     playthrough: Dict[str, Union[List[str], Dict[str, str]]]  # sphere "0" is list, others are dict
     unreachables: Set[Location]
     paths: Dict[str, List[Union[Tuple[str, str], Tuple[str, None]]]]  # last step takes no further exits
+    progression_balancing: Optional[ProgressionBalancingStats]
 
     def __init__(self, multiworld: MultiWorld) -> None:
         self.multiworld = multiworld
@@ -1513,6 +2323,7 @@ class Spoiler:
         self.playthrough = {}
         self.unreachables = set()
         self.paths = {}
+        self.progression_balancing = None
 
     def set_entrance(self, entrance: str, exit_: str, direction: str, player: int) -> None:
         if self.multiworld.players == 1:
@@ -1531,35 +2342,37 @@ class Spoiler:
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
-        logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-
-            sphere_candidates -= sphere
-            collection_spheres.append(sphere)
-            state_cache.append(state.copy())
-
-            logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere),
-                          len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in sphere_candidates]):
-                    raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
-                                       f'Something went terribly wrong here.')
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+        with SphereSearch(state, prog_locations) as search:
+            sphere_candidates = search.remaining
+            logging.debug('Building up collection spheres.')
+            while sphere_candidates:
+
+                # build up spheres of collection radius.
+                # Everything in each sphere is independent from each other in dependencies
+                # and only depends on lower spheres
+
+                sphere = search.find_sphere()
+
+                for location in sphere:
+                    search.collect(location)
+
+                collection_spheres.append(sphere)
+                state_cache.append(state.copy())
+
+                logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
+                              len(sphere),
+                              len(prog_locations))
+                if not sphere:
+                    logging.debug('The following items could not be reached: %s', [
+                        '%s (Player %d) at %s (Player %d)' % (
+                            location.item.name, location.item.player, location.name, location.player)
+                        for location in sphere_candidates])
+                    if any([multiworld.worlds[location.item.player].options.accessibility != 'minimal' for location in sphere_candidates]):
+                        raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
+                                           f'Something went terribly wrong here.')
+                    else:
+                        self.unreachables = sphere_candidates
+                        break
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
@@ -1606,23 +2419,23 @@ class Spoiler:
         # used to access it was deemed not required.) So we need to do one final sphere collection pass
         # to build up the correct spheres
 
-        required_locations = {item for sphere in collection_spheres for item in sphere}
         state = CollectionState(multiworld)
-        collection_spheres = []
-        while required_locations:
-            sphere = set(filter(state.can_reach, required_locations))
+        with SphereSearch(state, (location for sphere in collection_spheres for location in sphere)) as search:
+            required_locations = search.remaining
+            collection_spheres = []
+            while required_locations:
+                sphere = search.find_sphere()
 
-            for location in sphere:
-                state.collect(location.item, True, location)
+                for location in sphere:
+                    search.collect(location)
 
-            collection_spheres.append(sphere)
+                collection_spheres.append(sphere)
 
-            logging.debug('Calculated final sphere %i, containing %i of %i progress items.', len(collection_spheres),
-                          len(sphere), len(required_locations))
+                logging.debug('Calculated final sphere %i, containing %i of %i progress items.',
+                              len(collection_spheres), len(sphere), len(required_locations) + len(sphere))
 
-            required_locations -= sphere
-            if not sphere:
-                raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
+                if not sphere:
+                    raise RuntimeError(f'Not all required items reachable. Unreachable locations: {required_locations}')
 
         # we can finally output our playthrough
         self.playthrough = {"0": sorted([self.multiworld.get_name_string_for_object(item) for item in
@@ -1696,6 +2509,8 @@ class Spoiler:
             outfile.write('Filling Algorithm:               %s\n' % self.multiworld.algorithm)
             outfile.write('Players:                         %d\n' % self.multiworld.players)
             outfile.write(f'Plando Options:                  {self.multiworld.plando_options}\n')
+            if self.progression_balancing:
+                outfile.write(f'Balancing Summary:               {self.progression_balancing.summary()}\n')
             AutoWorld.call_stage(self.multiworld, "write_spoiler_header", outfile)
 
             for player in range(1, self.multiworld.players + 1):
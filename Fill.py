@@ -1,10 +1,13 @@
 import collections
+import heapq
 import itertools
 import logging
+import time
 import typing
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock
+from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, PlandoItemBlock, \
+    ProgressionBalancingStats
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -33,6 +36,160 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class _LocationBucket:
+    """Unfilled locations of one player that share their item rule, in the order they were given to fill in."""
+    __slots__ = ("key", "positions", "first", "first_reachable", "epoch")
+
+    key: typing.Tuple[typing.Any, ...]
+    positions: typing.List[int]
+    first: int
+    """index into positions before which all locations are filled"""
+    first_reachable: int
+    """index into positions before which all locations are filled or unreachable in the state of epoch"""
+    epoch: int
+
+    def __init__(self, key: typing.Tuple[typing.Any, ...]) -> None:
+        self.key = key
+        self.positions = []
+        self.first = 0
+        self.first_reachable = 0
+        self.epoch = 0
+
+
+class _PlacementIndex:
+    """
+    The locations of fill_restrictive, for finding the first one in their order that can be filled with an item,
+    like going through them with Location.can_fill, without checking most of them.
+
+    Locations are bucketed by player and by their item_rule, always_allow and exclusion, as locations sharing those
+    accept the same items. Buckets are kept in a heap by their first unfilled location, so looking for a spot only
+    looks at buckets up to the first one that accepts the item. Filled locations are only flagged, and buckets skip
+    past them, and past locations found unreachable in the current state, when next looked at.
+    Reachability is only known for one state at a time, as the exploration state of the next batch of items may reach
+    more or less than the last one.
+    """
+    locations: typing.List[Location]
+    filled: typing.List[bool]
+    remaining: int
+    single_player_placement: bool
+    heaps: typing.Dict[typing.Optional[int], typing.List[typing.Tuple[int, _LocationBucket]]]
+    """buckets by their first unfilled location, by player if placing single player, else all under None"""
+    state: typing.Optional[CollectionState]
+    epoch: int
+    """counts the states set, buckets last looked at in an earlier one don't know what is reachable yet"""
+    reachable: typing.Dict[int, bool]
+    """whether locations by position are reachable in state"""
+
+    def __init__(self, locations: typing.Sequence[Location], single_player_placement: bool) -> None:
+        self.locations = list(locations)
+        self.filled = [False] * len(self.locations)
+        self.remaining = len(self.locations)
+        self.single_player_placement = single_player_placement
+        self.state = None
+        self.epoch = 0
+        self.reachable = {}
+        buckets: typing.Dict[typing.Tuple[typing.Any, ...], _LocationBucket] = {}
+        for position, location in enumerate(self.locations):
+            if type(location).can_fill is not Location.can_fill:
+                key: typing.Tuple[typing.Any, ...] = (location.player, location)
+            else:
+                key = (location.player, location.item_rule, location.always_allow,
+                       location.progress_type == LocationProgressType.EXCLUDED)
+            bucket = buckets.get(key, None)
+            if bucket is None:
+                bucket = buckets[key] = _LocationBucket(key)
+            bucket.positions.append(position)
+        self.heaps = {}
+        for bucket in buckets.values():
+            # positions never tie, as each location is in one bucket, so buckets don't get compared
+            self.heaps.setdefault(bucket.key[0] if single_player_placement else None, []).append(
+                (bucket.positions[0], bucket))
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+
+    def __len__(self) -> int:
+        return self.remaining
+
+    def set_state(self, state: CollectionState) -> None:
+        """Starts checking reachability in state, which must not change until the next call."""
+        self.state = state
+        self.epoch += 1
+        self.reachable = {}
+
+    def _first(self, bucket: _LocationBucket) -> typing.Optional[int]:
+        positions = bucket.positions
+        filled = self.filled
+        index = bucket.first
+        while index < len(positions) and filled[positions[index]]:
+            index += 1
+        bucket.first = index
+        return positions[index] if index < len(positions) else None
+
+    def _first_reachable(self, bucket: _LocationBucket) -> typing.Optional[int]:
+        positions = bucket.positions
+        filled = self.filled
+        reachable = self.reachable
+        if bucket.epoch != self.epoch:
+            bucket.epoch = self.epoch
+            bucket.first_reachable = bucket.first
+        index = max(bucket.first, bucket.first_reachable)
+        while index < len(positions):
+            position = positions[index]
+            if not filled[position]:
+                can_reach = reachable.get(position, None)
+                if can_reach is None:
+                    can_reach = reachable[position] = self.locations[position].can_reach(self.state)
+                if can_reach:
+                    break
+            index += 1
+        bucket.first_reachable = index
+        return positions[index] if index < len(positions) else None
+
+    def _find_in(self, bucket: _LocationBucket, first: int, item: Item, check_access: bool) -> typing.Optional[int]:
+        """The first location of bucket that can be filled with item, following Location.can_fill."""
+        state = self.state
+        location = self.locations[first]
+        if type(location).can_fill is not Location.can_fill:
+            return first if location.can_fill(state, item, check_access) else None
+        if location.always_allow(state, item) \
+                and item.name not in state.multiworld.worlds[item.player].options.non_local_items:
+            return first
+        if (location.progress_type == LocationProgressType.EXCLUDED and (item.advancement or item.useful)) \
+                or not location.item_rule(item):
+            return None
+        return self._first_reachable(bucket) if check_access else first
+
+    def find(self, item: Item, check_access: bool) -> typing.Optional[Location]:
+        """Returns the first unfilled location that can be filled with item, or None, and marks it as filled."""
+        heap = self.heaps.get(item.player if self.single_player_placement else None, None)
+        if not heap:
+            return None
+        looked_at: typing.List[typing.Tuple[int, _LocationBucket]] = []
+        found: typing.Optional[int] = None
+        while heap and (found is None or heap[0][0] < found):
+            position, bucket = heapq.heappop(heap)
+            first = self._first(bucket)
+            if first is None:
+                continue  # all filled
+            if first != position:
+                heapq.heappush(heap, (first, bucket))
+                continue
+            looked_at.append((first, bucket))
+            candidate = self._find_in(bucket, first, item, check_access)
+            if candidate is not None and (found is None or candidate < found):
+                found = candidate
+        for entry in looked_at:
+            heapq.heappush(heap, entry)
+        if found is None:
+            return None
+        self.filled[found] = True
+        self.remaining -= 1
+        return self.locations[found]
+
+    def get_unfilled(self) -> typing.List[Location]:
+        return [location for location, filled in zip(self.locations, self.filled) if not filled]
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -63,7 +220,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     total = min(len(item_pool), len(locations))
     placed = 0
 
-    while any(reachable_items.values()) and locations:
+    index = _PlacementIndex(locations, single_player_placement)
+    while any(reachable_items.values()) and index:
         if one_item_per_player:
             # grab one item per player
             items_to_place = [items.pop()
@@ -87,10 +245,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             if single_player_placement else None)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
+        # placements below don't collect into maximum_exploration_state, so reachability holds for this batch
+        index.set_state(maximum_exploration_state)
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not index:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
@@ -105,15 +265,8 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill = index.find(item_to_place, perform_access_check)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
                     # try swapping this item with previously placed items in a safe way then in an unsafe way
@@ -185,6 +338,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             if on_place:
                 on_place(spot_to_fill)
 
+    locations[:] = index.get_unfilled()
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
@@ -704,6 +858,11 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        stats = ProgressionBalancingStats()
+        # spheres after the current one, as found by the last search ahead for candidate items. They stay valid as long
+        # as no items get moved, so later spheres can be replayed from here instead of being searched for again.
+        next_spheres: typing.List[typing.Set[Location]] = []
+        phase_start = time.perf_counter()
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
@@ -716,11 +875,16 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         if len(total_locations_count) == 0:
             return
 
+        multiworld.spoiler.progression_balancing = stats
         while True:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            if next_spheres:
+                sphere_locations = next_spheres.pop(0)
+                stats.replayed_spheres += 1
+            else:
+                sphere_locations = get_sphere_locations(state, unchecked_locations)
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -734,6 +898,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
             }
             logging.debug(f"Reachable percentages: {debug_percentages}\n")
             sphere_num += 1
+            stats.spheres += 1
 
             if checked_locations:
                 max_percentage = max(map(lambda p: item_percentage(p, reachable_locations_count[p]),
@@ -750,11 +915,14 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
+                    stats.balanced_spheres += 1
+                    phase_start = stats.add_time("spheres", phase_start)
                     balancing_state = state.copy()
                     balancing_unchecked_locations = unchecked_locations.copy()
                     balancing_reachables = reachable_locations_count.copy()
                     balancing_sphere = sphere_locations.copy()
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
+                    balancing_sphere_num = 0
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
@@ -768,7 +936,13 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        if balancing_sphere_num < len(next_spheres):
+                            balancing_sphere = next_spheres[balancing_sphere_num]
+                            stats.replayed_spheres += 1
+                        else:
+                            balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                            next_spheres.append(balancing_sphere)
+                        balancing_sphere_num += 1
                         for location in balancing_sphere:
                             balancing_unchecked_locations.remove(location)
                             if not location.locked:
@@ -780,6 +954,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                             break
                         elif not balancing_sphere:
                             raise RuntimeError("Not all required items reachable. Something went terribly wrong here.")
+                    phase_start = stats.add_time("search", phase_start)
                     # Gather a set of locations which we can swap items into
                     unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     for l in unchecked_locations:
@@ -793,6 +968,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         multiworld.random.shuffle(items_to_test)
                         while items_to_test:
                             testing = items_to_test.pop()
+                            stats.swaps_tried += 1
                             reducing_state = state.copy()
                             for location in itertools.chain((
                                     l for l in items_to_replace
@@ -801,6 +977,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 reducing_state.collect(location.item, True, location)
 
                             reducing_state.sweep_for_advancements(locations=locations_to_test)
+                            stats.sweeps += 1
 
                             if multiworld.has_beaten_game(balancing_state):
                                 if not multiworld.has_beaten_game(reducing_state):
@@ -811,6 +988,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 if p < threshold_percentages[player]:
                                     items_to_replace.append(testing)
 
+                    phase_start = stats.add_time("testing", phase_start)
                     old_moved_item_count = moved_item_count
 
                     # sort then shuffle to maintain deterministic behaviour,
@@ -831,13 +1009,16 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 logging.debug(f"Progression balancing moved {new_location.item} to {new_location}, "
                                               f"displacing {old_location.item} into {old_location}")
                                 moved_item_count += 1
+                                stats.swaps_accepted += 1
                                 state.collect(new_location.item, True, new_location)
                                 break
                         else:
                             logging.warning(f"Could not Progression Balance {old_location.item}")
 
+                    phase_start = stats.add_time("swapping", phase_start)
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
+                        next_spheres.clear()
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
                         for location in get_sphere_locations(state, unlocked):
                             unchecked_locations.remove(location)
@@ -856,6 +1037,11 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 logging.warning("Progression Balancing ran out of paths.")
                 break
 
+        stats.add_time("spheres", phase_start)
+        logging.info(f"Progression balancing {stats.summary()}.")
+        logging.info("Progression balancing time: " +
+                     ", ".join(f"{phase} {taken:.2f}s" for phase, taken in stats.phase_times.items()))
+
 
 def swap_location_item(location_1: Location, location_2: Location, check_locked: bool = True) -> None:
     """Swaps Items of locations. Does NOT swap flags like shop_slot or locked, but does swap event"""
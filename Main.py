@@ -2,11 +2,9 @@ import collections
 import concurrent.futures
 import logging
 import os
-import pickle
 import tempfile
 import time
 import zipfile
-import zlib
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
@@ -49,13 +47,15 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     multiworld.state = CollectionState(multiworld)
     logger.info('Archipelago Version %s  -  Seed: %s\n', __version__, multiworld.seed)
 
-    logger.info(f"Found {len(AutoWorld.AutoWorldRegister.world_types)} World Types:")
-    longest_name = max(len(text) for text in AutoWorld.AutoWorldRegister.world_types)
+    # only the games in use, as going through all world types would load every world
+    world_types = {game: AutoWorld.AutoWorldRegister.world_types[game] for game in sorted(set(multiworld.game.values()))}
+    logger.info(f"Using {len(world_types)} World Types:")
+    longest_name = max(len(text) for text in world_types)
 
-    item_count = len(str(max(len(cls.item_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
-    location_count = len(str(max(len(cls.location_names) for cls in AutoWorld.AutoWorldRegister.world_types.values())))
+    item_count = len(str(max(len(cls.item_names) for cls in world_types.values())))
+    location_count = len(str(max(len(cls.location_names) for cls in world_types.values())))
 
-    for name, cls in AutoWorld.AutoWorldRegister.world_types.items():
+    for name, cls in world_types.items():
         if not cls.hidden and len(cls.item_names) > 0:
             logger.info(f" {name:{longest_name}}: Items: {len(cls.item_names):{item_count}} | "
                         f"Locations: {len(cls.location_names):{location_count}}")
@@ -66,7 +66,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
     if not args.skip_output and not args.spoiler_only:
         AutoWorld.call_stage(multiworld, "assert_generate")
 
-    AutoWorld.call_all(multiworld, "generate_early")
+    stage_threads = get_settings().generator.stage_threads
+    AutoWorld.call_all(multiworld, "generate_early", threads=stage_threads)
 
     logger.info('')
 
@@ -93,10 +94,10 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
             del early
 
     logger.info('Creating MultiWorld.')
-    AutoWorld.call_all(multiworld, "create_regions")
+    AutoWorld.call_all(multiworld, "create_regions", threads=stage_threads)
 
     logger.info('Creating Items.')
-    AutoWorld.call_all(multiworld, "create_items")
+    AutoWorld.call_all(multiworld, "create_items", threads=stage_threads)
 
     logger.info('Calculating Access Rules.')
 
@@ -105,7 +106,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
         multiworld.worlds[player].options.non_local_items.value -= multiworld.worlds[player].options.local_items.value
         multiworld.worlds[player].options.non_local_items.value -= set(multiworld.local_early_items[player])
 
-    AutoWorld.call_all(multiworld, "set_rules")
+    AutoWorld.call_all(multiworld, "set_rules", threads=stage_threads)
 
     for player in multiworld.player_ids:
         exclusion_rules(multiworld, player, multiworld.worlds[player].options.exclude_locations.value)
@@ -133,8 +134,8 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     multiworld.plando_item_blocks = parse_planned_blocks(multiworld)
 
-    AutoWorld.call_all(multiworld, "connect_entrances")
-    AutoWorld.call_all(multiworld, "generate_basic")
+    AutoWorld.call_all(multiworld, "connect_entrances", threads=stage_threads)
+    AutoWorld.call_all(multiworld, "generate_basic", threads=stage_threads)
 
     # remove starting inventory from pool items.
     # Because some worlds don't actually create items during create_items this has to be as late as possible.
@@ -183,7 +184,7 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
 
     logger.info('Running Pre Main Fill.')
 
-    AutoWorld.call_all(multiworld, "pre_fill")
+    AutoWorld.call_all(multiworld, "pre_fill", threads=stage_threads)
 
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
@@ -334,10 +335,9 @@ def main(args, seed=None, baked_server_options: dict[str, object] | None = None)
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
+                multidata = NetUtils.encode_multidata(multidata)
 
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
                     f.write(multidata)
 
             output_file_futures.append(pool.submit(write_multidata))
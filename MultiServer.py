@@ -12,6 +12,7 @@ import inspect
 import itertools
 import logging
 import math
+import mmap
 import operator
 import pickle
 import random
@@ -168,6 +169,164 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+class SaveJournal:
+    """
+    Appends the changes to a Context's save since its last full save to a journal file next to the save file,
+    so saving after a location check or a data storage operation only writes what changed.
+    Loading the save replays its journal on top of it. Each full save starts a new journal.
+
+    Received items only ever grow, so they are found by comparing their lengths. New location checks and hints are
+    reported with add_checks and add_hints, and only those get journaled. Other changes have to be marked with
+    Context.save_changes, which takes (field, key) pairs of the save.
+    """
+    compact_after: int = 100  # batches, after which the next save is a full save again
+    journaled_fields: typing.ClassVar[typing.FrozenSet[str]] = frozenset({
+        "hints", "hints_used", "client_game_state", "client_activity_timers", "stored_data", "group_collected"})
+
+    filename: str
+    journal_id: int
+    batches: int
+    full_save_needed: bool
+    changes: typing.Dict[typing.Tuple[str, typing.Any], None]
+    lengths: typing.Dict[typing.Tuple[str, typing.Any], int]
+    new_checks: typing.Dict[typing.Tuple[int, int], typing.Set[int]]
+    new_hints: typing.Dict[typing.Tuple[int, int], typing.Set[Hint]]
+    random_state: typing.Any
+    """state of the Context's random as of the last full save or batch"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.journal_id = 0
+        self.batches = 0
+        self.full_save_needed = True
+        self.changes = {}
+        self.lengths = {}
+        self.new_checks = {}
+        self.new_hints = {}
+        self.random_state = None
+
+    @property
+    def compaction_due(self) -> bool:
+        return self.full_save_needed or self.batches >= self.compact_after
+
+    def mark(self, changes: typing.Iterable[typing.Tuple[str, typing.Any]]) -> None:
+        for change in changes:
+            if change[0] not in self.journaled_fields:
+                raise ValueError(f"{change[0]} can't be journaled")
+            self.changes[change] = None
+
+    def add_checks(self, team_slot: typing.Tuple[int, int], locations: typing.Iterable[int]) -> None:
+        self.new_checks.setdefault(team_slot, set()).update(locations)
+
+    def add_hints(self, team_slot: typing.Tuple[int, int], hints: typing.Iterable[Hint]) -> None:
+        self.new_hints.setdefault(team_slot, set()).update(hints)
+
+    def begin_full_save(self, ctx: Context) -> None:
+        """Starts a new journal, to be called before getting the data for a full save."""
+        self.full_save_needed = False
+        self.changes = {}
+        self.new_checks = {}
+        self.new_hints = {}
+        self.journal_id += 1
+        self.batches = 0
+        self.lengths = {("received_items", key): len(items) for key, items in ctx.received_items.items()}
+        self.random_state = ctx.random.getstate()
+
+    def end_full_save(self) -> None:
+        """Empties the journal file, to be called once the full save is written."""
+        with open(self.filename, "wb") as f:
+            self.write_record(f, {"journal_id": self.journal_id})
+
+    def write_batch(self, ctx: Context) -> None:
+        changes, self.changes = self.changes, {}
+        new_checks, self.new_checks = self.new_checks, {}
+        new_hints, self.new_hints = self.new_hints, {}
+        entries: typing.List[typing.Tuple[str, typing.Any, typing.Any]] = []
+        for key, items in tuple(ctx.received_items.items()):
+            start = self.lengths.get(("received_items", key), 0)
+            if len(items) != start:
+                new_items = items[start:]
+                entries.append(("received_items", key, (start, new_items)))
+                self.lengths["received_items", key] = start + len(new_items)
+        entries.extend(("location_checks", key, checks) for key, checks in new_checks.items())
+        # hints marked as changed are written in full below, which already includes the added ones
+        entries.extend(("new_hints", key, hints) for key, hints in new_hints.items() if ("hints", key) not in changes)
+        for field, key in changes:
+            try:
+                value = getattr(ctx, field)[key]
+            except KeyError:
+                continue
+            if isinstance(value, datetime.datetime):
+                value = value.timestamp()
+            elif isinstance(value, set):
+                value = set(value)
+            entries.append((field, key, value))
+        random_state = ctx.random.getstate()
+        if random_state != self.random_state:
+            entries.append(("random_state", None, random_state))
+            self.random_state = random_state
+        with open(self.filename, "ab") as f:
+            self.write_record(f, entries)
+        self.batches += 1
+
+    def replay(self, ctx: Context, journal_id: typing.Optional[int]) -> int:
+        """Applies the batches of the journal file to ctx, if it belongs to the save with journal_id.
+        Returns the number of batches applied."""
+        batches = 0
+        try:
+            with open(self.filename, "rb") as f:
+                records = self.read_records(f)
+                header = next(records, None)
+                if journal_id is None or not header or header.get("journal_id") != journal_id:
+                    return 0
+                for entries in records:
+                    for field, key, value in entries:
+                        self._apply(ctx, field, key, value)
+                    batches += 1
+        except FileNotFoundError:
+            return 0
+        finally:
+            if journal_id is not None:
+                self.journal_id = journal_id
+        return batches
+
+    @staticmethod
+    def _apply(ctx: Context, field: str, key: typing.Any, value: typing.Any) -> None:
+        if field == "received_items":
+            start, new_items = value
+            ctx.received_items.setdefault(key, [])[start:] = new_items
+        elif field == "location_checks":
+            ctx.location_checks[key] |= value
+        elif field == "new_hints":
+            ctx.hints[key] |= value
+        elif field == "client_activity_timers":
+            ctx.client_activity_timers[key] = datetime.datetime.fromtimestamp(value, datetime.timezone.utc)
+        elif field == "random_state":
+            ctx.random.setstate(value)
+        else:
+            getattr(ctx, field)[key] = value
+
+    @staticmethod
+    def write_record(f: typing.BinaryIO, obj: typing.Any) -> None:
+        import os
+        data = zlib.compress(pickle.dumps(obj))
+        f.write(len(data).to_bytes(4, "big") + data)
+        f.flush()
+        os.fsync(f.fileno())
+
+    @staticmethod
+    def read_records(f: typing.BinaryIO) -> typing.Iterator[typing.Any]:
+        while True:
+            length = f.read(4)
+            if len(length) < 4:
+                return
+            length = int.from_bytes(length, "big")
+            data = f.read(length)
+            if len(data) < length:
+                return  # cut off by a crash while writing it
+            yield restricted_loads(zlib.decompress(data))
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
@@ -215,11 +374,13 @@ class Context:
         self.slot_info = {}
         self.log_network = log_network
         self.endpoints = []
+        self.received_messages = 0  # client commands processed, used to measure traffic
         self.clients = {}
         self.compatibility: int = compatibility
         self.shutdown_task = None
         self.data_filename = None
         self.save_filename = None
+        self.save_journal: typing.Optional[SaveJournal] = None
         self.saving = False
         self.player_names: typing.Dict[team_slot, str] = {}
         self.player_name_lookup: typing.Dict[str, team_slot] = {}
@@ -231,7 +392,7 @@ class Context:
         self.password = password
         self.server = None
         self.countdown_timer = 0
-        self.received_items = {}
+        self.received_items: typing.Dict[typing.Tuple[int, int, bool], typing.List[NetworkItem]] = {}
         self.start_inventory = {}
         self.name_aliases: typing.Dict[team_slot, str] = {}
         self.location_checks = collections.defaultdict(set)
@@ -239,6 +400,8 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) -> hints about it that may not be found yet, see recheck_location_hints
+        self.hint_index: typing.Dict[typing.Tuple[int, int, int], typing.Set[Hint]] = collections.defaultdict(set)
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -257,6 +420,8 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.outbox: typing.Dict[Endpoint, typing.List[str]] = {}
+        self.outbox_flush_scheduled = False
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -267,7 +432,8 @@ class Context:
         self.stored_data = {}
         self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
         self.read_data = {}
-        self.spheres = []
+        self._spheres = []
+        self._spheres_stored = False
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -298,8 +464,8 @@ class Context:
 
         for game_package in self.gamespackage.values():
             # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+            game_package.pop("item_name_groups", None)
+            game_package.pop("location_name_groups", None)
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -328,49 +494,78 @@ class Context:
         return self.gamespackage[game]["location_name_to_id"] if game in self.gamespackage else None
 
     # General networking
-    async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[dict]) -> bool:
+    # Outgoing messages are queued per endpoint and sent once per event loop iteration, so that everything caused by
+    # one incoming packet goes out as few frames as possible, encoded once for all endpoints that receive it.
+    max_frame_length = 1 << 16  # queued messages are only combined into frames up to this many characters
+
+    async def send_msgs(self, endpoint: Endpoint, msgs: typing.Iterable[typing.Dict[str, typing.Any]]) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
-        msg = self.dumper(msgs)
-        try:
-            await endpoint.socket.send(msg)
-        except websockets.ConnectionClosed:
-            self.logger.exception(f"Exception during send_msgs, could not send {msg}")
-            await self.disconnect(endpoint)
-            return False
-        else:
-            if self.log_network:
-                self.logger.info(f"Outgoing message: {msg}")
-            return True
+        return self.queue_encoded_msgs((endpoint,), self.dumper(msgs))
 
     async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
-        if not endpoint.socket or not endpoint.socket.open:
-            return False
-        try:
-            await endpoint.socket.send(msg)
-        except websockets.ConnectionClosed:
-            self.logger.exception("Exception during send_encoded_msgs")
-            await self.disconnect(endpoint)
-            return False
-        else:
-            if self.log_network:
-                self.logger.info(f"Outgoing message: {msg}")
-            return True
+        return self.queue_encoded_msgs((endpoint,), msg)
 
     async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
-        sockets = []
+        return self.queue_encoded_msgs(endpoints, msg)
+
+    def queue_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        """Queues an encoded list of messages to be sent to endpoints in the next event loop iteration.
+        Returns False if none of the endpoints had an open connection to queue them for."""
+        queued = False
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
-                sockets.append(endpoint.socket)
+                self.outbox.setdefault(endpoint, []).append(msg)
+                queued = True
+        if queued and not self.outbox_flush_scheduled:
+            self.outbox_flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self.flush_outbox)
+        return queued
+
+    def flush_outbox(self) -> None:
+        """Sends all queued messages, combined into frames, to endpoints that are queued the same ones together.
+        Endpoints whose connection closed since their messages were queued get disconnected instead."""
+        self.outbox_flush_scheduled = False
+        outbox, self.outbox = self.outbox, {}
+        receivers: typing.Dict[typing.Tuple[str, ...], typing.List[Endpoint]] = {}
+        for endpoint, msgs in outbox.items():
+            if endpoint.socket and endpoint.socket.open:
+                receivers.setdefault(tuple(msgs), []).append(endpoint)
+            elif endpoint in self.endpoints:
+                self.logger.warning(f"Could not send {len(msgs)} queued messages, connection closed")
+                async_start(self.disconnect(endpoint), name="disconnect closed endpoint")
+        for msgs, endpoints in receivers.items():
+            for frame in self.combine_encoded_msgs(msgs):
+                self.send_frame(endpoints, frame)
+
+    def combine_encoded_msgs(self, msgs: typing.Sequence[str]) -> typing.Iterator[str]:
+        """Joins encoded lists of messages into as few lists as possible, limited by max_frame_length."""
+        if len(msgs) == 1:
+            yield msgs[0]
+            return
+        parts: typing.List[str] = []
+        length = 0
+        for msg in msgs:
+            if msg == "[]":
+                continue
+            if parts and length + len(msg) > self.max_frame_length:
+                yield f"[{','.join(parts)}]"
+                parts.clear()
+                length = 0
+            parts.append(msg[1:-1])
+            length += len(msg)
+        if parts:
+            yield f"[{','.join(parts)}]"
+
+    def send_frame(self, endpoints: typing.Iterable[Endpoint], msg: str) -> None:
+        sockets = [endpoint.socket for endpoint in endpoints if endpoint.socket and endpoint.socket.open]
         try:
             websockets.broadcast(sockets, msg)
         except RuntimeError:
-            self.logger.exception("Exception during broadcast_send_encoded_msgs")
-            return False
+            self.logger.exception("Exception during send_frame")
         else:
             if self.log_network:
-                self.logger.info(f"Outgoing broadcast: {msg}")
-            return True
+                self.logger.info(f"Outgoing message: {msg}")
 
     def broadcast_all(self, msgs: typing.List[dict]):
         msg_is_text = all(msg["cmd"] == "PrintJSON" for msg in msgs)
@@ -380,7 +575,7 @@ class Context:
             for endpoint in self.endpoints
             if endpoint.auth and not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.queue_encoded_msgs(endpoints, data)
 
     def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
         self.logger.info("Notice (all): %s" % text)
@@ -394,11 +589,10 @@ class Context:
             for endpoint in itertools.chain.from_iterable(self.clients[team].values())
             if not (msg_is_text and endpoint.no_text)
         )
-        async_start(self.broadcast_send_encoded_msgs(endpoints, data))
+        self.queue_encoded_msgs(endpoints, data)
 
-    def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
-        msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+    def broadcast(self, endpoints: typing.Iterable[Endpoint], msgs: typing.List[typing.Dict[str, typing.Any]]):
+        self.queue_encoded_msgs(endpoints, self.dumper(msgs))
 
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
@@ -411,14 +605,13 @@ class Context:
         if not client.auth or client.no_text:
             return
         self.logger.info("Notice (Player %s in team %d): %s" % (client.name, client.team + 1, text))
-        async_start(self.send_msgs(client, [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}]))
+        self.broadcast((client,), [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}])
 
     def notify_client_multiple(self, client: Client, texts: typing.List[str], additional_arguments: dict = {}):
         if not client.auth or client.no_text:
             return
-        async_start(self.send_msgs(client,
-                                   [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
-                                    for text in texts]))
+        self.broadcast((client,), [{"cmd": "PrintJSON", "data": [{ "text": text }], **additional_arguments}
+                                   for text in texts])
 
     # loading
     def load(self, multidatapath: str, use_embedded_server_options: bool = False):
@@ -433,19 +626,22 @@ class Context:
                     raise Exception("No .archipelago found in archive.")
         else:
             with open(multidatapath, 'rb') as f:
-                data = f.read()
+                # sections of the multidata are only read once they are needed
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
         self._load(self.decompress(data), {}, use_embedded_server_options)
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
         format_version = data[0]
-        if format_version > 3:
+        if format_version > NetUtils.multidata_format_version:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version >= 4:
+            return NetUtils.MultiData(data)
         return restricted_loads(zlib.decompress(data[1:]))
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any], game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
 
         self.read_data = {}
@@ -484,9 +680,10 @@ class Context:
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
         self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        # decoded per slot on first access, see NetUtils.SlotDataSections
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -496,6 +693,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.index_hints()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -512,12 +710,13 @@ class Context:
             if game_name in game_data_packages:
                 data = game_data_packages[game_name]
             self.logger.info(f"Loading embedded data package for game {game_name}")
-            self.gamespackage[game_name] = data
+            # remove groups from data package, but keep them in self.item/location_name_groups
+            # data is not modified, as it may be shared with other rooms, see WebHostLib.customserver
+            self.gamespackage[game_name] = {key: value for key, value in data.items()
+                                            if key not in ("item_name_groups", "location_name_groups")}
             self.item_name_groups[game_name] = data["item_name_groups"]
             if "location_name_groups" in data:
                 self.location_name_groups[game_name] = data["location_name_groups"]
-                del data["location_name_groups"]
-            del data["item_name_groups"]  # remove from data package, but keep in self.item_name_groups
         self._init_game_data()
         for game_name, data in self.item_name_groups.items():
             self.read_data[f"item_name_groups_{game_name}"] = lambda lgame=game_name: self.item_name_groups[lgame]
@@ -525,12 +724,17 @@ class Context:
             self.read_data[f"location_name_groups_{game_name}"] = lambda lgame=game_name: self.location_name_groups[lgame]
 
         # sorted access spheres
-        self.spheres = decoded_obj.get("spheres", [])
+        if isinstance(decoded_obj, NetUtils.MultiData):
+            self.spheres = lambda: decoded_obj.get("spheres", [])  # decoded on first use
+        else:
+            self.spheres = decoded_obj.get("spheres", [])
 
     # saving
 
     def save(self, now=False) -> bool:
         if self.saving:
+            if self.save_journal:
+                self.save_journal.full_save_needed = True
             if now:
                 self.save_dirty = False
                 return self._save()
@@ -540,11 +744,36 @@ class Context:
 
         return False
 
+    def save_changes(self, *changes: typing.Tuple[str, typing.Any]) -> bool:
+        """Like save, if only new items and location checks and the given (field, key) pairs of the save changed,
+        which lets them be journaled instead of writing a full save."""
+        if self.save_journal:
+            if self.saving:
+                self.save_journal.mark(changes)
+                self.save_dirty = True
+                return True
+            return False
+        return self.save()
+
     def _save(self, exit_save: bool = False) -> bool:
         try:
+            journal = self.save_journal
+            if journal and not exit_save and not journal.compaction_due:
+                journal.write_batch(self)
+                return True
+            if journal:
+                journal.begin_full_save(self)
+            import os
             encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
+            # the journal only gets emptied once the new save is in place, so a crash in between keeps the old one
+            temp_filename = f"{self.save_filename}.tmp"
+            with open(temp_filename, "wb") as f:
                 f.write(zlib.compress(encoded_save))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_filename, self.save_filename)
+            if journal:
+                journal.end_full_save()
         except Exception as e:
             self.logger.exception(e)
             return False
@@ -559,10 +788,15 @@ class Context:
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            self.save_journal = SaveJournal(self.save_filename + ".journal")
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
                     self.set_save(save_data)
+                batches = self.save_journal.replay(self, save_data.get("journal_id"))
+                if batches:
+                    self.index_hints()
+                    self.logger.info(f"Replayed {batches} batches of changes from the save journal")
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
@@ -618,6 +852,7 @@ class Context:
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
             "stored_data": self.stored_data,
+            "journal_id": self.save_journal.journal_id if self.save_journal else None,
             "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
                              "server_password": self.server_password, "password": self.password,
                              "release_mode": self.release_mode,
@@ -628,7 +863,7 @@ class Context:
 
         return d
 
-    def set_save(self, savedata: dict):
+    def set_save(self, savedata: typing.Dict[str, typing.Any]):
         if self.connect_names != savedata["connect_names"]:
             raise Exception("This savegame does not appear to match the loaded multiworld.")
         if savedata["version"] > self.save_version:
@@ -664,6 +899,7 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+        self.index_hints()
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -700,18 +936,65 @@ class Context:
                         self.replace_hint(hint_team, player, hint, new_hint)
             self.hints[hint_team, hint_slot] = new_hints
 
+    def recheck_location_hints(self, team: int, slot: int, locations: typing.Iterable[int],
+                               changed: typing.Optional[typing.Set[team_slot]] = None) -> None:
+        """Refreshes the hints about the specified locations of team/slot, using hint_index. If a set is passed for
+        'changed', each (team,slot) pair that has at least one hint modified will be added to the set."""
+        for location in locations:
+            hints = self.hint_index.pop((team, slot, location), None)
+            if not hints:
+                continue
+            for hint in hints:
+                new_hint = hint.re_check(self, team)
+                if hint == new_hint:
+                    continue
+                for player in self.slot_set(hint.receiving_player) | {hint.finding_player}:
+                    if hint in self.hints[team, player]:
+                        self.replace_hint(team, player, hint, new_hint)
+                        if changed is not None:
+                            changed.add((team, player))
+
+    def index_hints(self) -> None:
+        """Rebuilds hint_index from hints."""
+        self.hint_index.clear()
+        for (team, _), hints in self.hints.items():
+            for hint in hints:
+                if not hint.found:
+                    self.hint_index[team, hint.finding_player, hint.location].add(hint)
+
     def get_rechecked_hints(self, team: int, slot: int):
         self.recheck_hints(team, slot)
         return self.hints[team, slot]
 
+    @property
+    def spheres(self) -> typing.List[typing.Dict[int, typing.Set[int]]]:
+        if callable(self._spheres):
+            self._spheres = self._spheres()
+        return self._spheres
+
+    @spheres.setter
+    def spheres(self, spheres: typing.Union[typing.List[typing.Dict[int, typing.Set[int]]], typing.Callable]) -> None:
+        """Takes the spheres, or a function to get them from once they are needed."""
+        self._spheres = spheres
+        self._spheres_stored = False
+
+    def _store_spheres(self) -> bool:
+        """Stores the spheres in the LocationStore for get_sphere, returns False if there are none."""
+        if not self._spheres_stored:
+            if not self.spheres:
+                return False
+            self.locations.set_spheres(self.spheres)
+            self._spheres_stored = True
+        return True
+
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
-        if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
-            raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
-                           f"Location or player may not exist.")
+        if self._store_spheres():
+            try:
+                return self.locations.get_sphere(player, location_id)
+            except KeyError:
+                raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
+                               f"Location or player may not exist.")
         return -1
 
     def get_players_package(self):
@@ -769,14 +1052,20 @@ class Context:
                 # we can check once if hint already exists
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
+                    self.hint_index[team, hint.finding_player, hint.location].add(hint)
                     new_hint_events.add(hint.finding_player)
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
                         new_hint_events.add(player)
+                    if self.save_journal:
+                        for player in {hint.finding_player, *self.slot_set(hint.receiving_player)}:
+                            self.save_journal.add_hints((team, player), (hint,))
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
         for slot in new_hint_events:
             self.on_new_hint(team, slot)
+        if new_hint_events:
+            self.save_changes()
         for slot, hint_data in concerns.items():
             if recipients is None or slot in recipients:
                 clients = filter(lambda c: not c.no_text, self.clients[team].get(slot, []))
@@ -784,7 +1073,7 @@ class Context:
                     continue
                 client_hints = [datum[1] for datum in sorted(hint_data, key=lambda x: x[0].finding_player != slot)]
                 for client in clients:
-                    async_start(self.send_msgs(client, client_hints))
+                    self.broadcast((client,), client_hints)
 
     def get_hint(self, team: int, finding_player: int, seeked_location: int) -> typing.Optional[Hint]:
         for hint in self.hints[team, finding_player]:
@@ -796,6 +1085,8 @@ class Context:
         if old_hint in self.hints[team, slot]:
             self.hints[team, slot].remove(old_hint)
             self.hints[team, slot].add(new_hint)
+            if not new_hint.found:
+                self.hint_index[team, new_hint.finding_player, new_hint.location].add(new_hint)
     
     # "events"
 
@@ -833,9 +1124,7 @@ def update_aliases(ctx: Context, team: int):
     cmd = ctx.dumper([{"cmd": "RoomUpdate",
                        "players": ctx.get_players_package()}])
 
-    for clients in ctx.clients[team].values():
-        for client in clients:
-            async_start(ctx.send_encoded_msgs(client, cmd))
+    ctx.queue_encoded_msgs(itertools.chain.from_iterable(ctx.clients[team].values()), cmd)
 
 
 async def server(websocket: "ServerConnection", path: str = "/", ctx: Context = None) -> None:
@@ -852,6 +1141,7 @@ async def server(websocket: "ServerConnection", path: str = "/", ctx: Context =
             if ctx.log_network:
                 ctx.logger.info(f"Incoming message: {data}")
             for msg in decode(data):
+                ctx.received_messages += 1
                 await process_client_cmd(ctx, client, msg)
     except Exception as e:
         if not isinstance(e, websockets.WebSocketException):
@@ -1020,17 +1310,22 @@ def get_start_inventory(ctx: Context, player: int, remote_start_inventory: bool)
 def send_new_items(ctx: Context):
     for team, clients in ctx.clients.items():
         for slot, clients in clients.items():
+            # clients of the same slot that are behind by the same items get the same message
+            encoded: typing.Dict[typing.Tuple[bool, bool, int], str] = {}
             for client in clients:
                 if client.no_items:
                     continue
                 start_inventory = get_start_inventory(ctx, slot, client.remote_start_inventory)
                 items = get_received_items(ctx, team, slot, client.remote_items)
                 if len(start_inventory) + len(items) > client.send_index:
-                    first_new_item = max(0, client.send_index - len(start_inventory))
-                    async_start(ctx.send_msgs(client, [{
-                        "cmd": "ReceivedItems",
-                        "index": client.send_index,
-                        "items": start_inventory[client.send_index:] + items[first_new_item:]}]))
+                    key = (client.remote_start_inventory, client.remote_items, client.send_index)
+                    if key not in encoded:
+                        first_new_item = max(0, client.send_index - len(start_inventory))
+                        encoded[key] = ctx.dumper([{
+                            "cmd": "ReceivedItems",
+                            "index": client.send_index,
+                            "items": start_inventory[client.send_index:] + items[first_new_item:]}])
+                    ctx.queue_encoded_msgs((client,), encoded[key])
                     client.send_index = len(start_inventory) + len(items)
 
 
@@ -1065,6 +1360,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.save_changes(("group_collected", group))
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -1116,6 +1412,8 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
         del sortable
 
         ctx.location_checks[team, slot] |= new_locations
+        if ctx.save_journal:
+            ctx.save_journal.add_checks((team, slot), new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
@@ -1123,10 +1421,13 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             "checked_locations": new_locations,  # send back new checks only
         }])
         updated_slots: typing.Set[tuple[int, int]] = set()
-        ctx.recheck_hints(team, slot, updated_slots)
+        ctx.recheck_location_hints(team, slot, new_locations, updated_slots)
         for hint_team, hint_slot in updated_slots:
             ctx.on_changed_hints(hint_team, hint_slot)
-        ctx.save()
+        changes = [("hints", hint_team_slot) for hint_team_slot in updated_slots]
+        if count_activity:
+            changes.append(("client_activity_timers", (team, slot)))
+        ctx.save_changes(*changes)
 
 
 def collect_hints(ctx: Context, team: int, slot: int, item: typing.Union[int, str], auto_status: HintStatus) \
@@ -1714,7 +2015,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                         self.output(f"You can't afford the hint. "
                                     f"You have {points_available} points and need at least "
                                     f"{self.ctx.get_hint_cost(self.client.slot)}.")
-                self.ctx.save()
+                self.ctx.save_changes(("hints_used", (self.client.team, self.client.slot)))
                 return True
 
         else:
@@ -1844,12 +2145,13 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             if (start_inventory or items) and not client.no_items:
                 reply.append({"cmd": 'ReceivedItems', "index": 0, "items": start_inventory + items})
                 client.send_index = len(start_inventory) + len(items)
-            if not client.auth:  # if this was a Re-Connect, don't print to console
-                client.auth = True
-                await on_client_joined(ctx, client)
             if args.get("slot_data", True):
                 connected_packet["slot_data"] = ctx.slot_data[client.slot]
+            # queue Connected first, before anything on_client_joined sends
             await ctx.send_msgs(client, reply)
+            if not client.auth:  # if this was a Re-Connect, don't print to console
+                client.auth = True
+                await on_client_joined(ctx, client)
 
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
@@ -1942,10 +2244,8 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                     hints.extend(collect_hint_location_id(ctx, client.team, client.slot, location,
                                                           HintStatus.HINT_UNSPECIFIED))
                 locs.append(NetworkItem(target_item, location, target_player, flags))
-            ctx.notify_hints(client.team, hints, only_new=create_as_hint == 2)
-            if locs and create_as_hint:
-                ctx.save()
             await ctx.send_msgs(client, [{'cmd': 'LocationInfo', 'locations': locs}])
+            ctx.notify_hints(client.team, hints, only_new=create_as_hint == 2)
         
         elif cmd == 'UpdateHint':
             location = args["location"]
@@ -1987,7 +2287,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             concerning_slots = ctx.slot_set(hint.receiving_player) | {hint.finding_player}
             for slot in concerning_slots:
                 ctx.replace_hint(client.team, slot, hint, new_hint)
-            ctx.save()
+            ctx.save_changes(*(("hints", (client.team, slot)) for slot in concerning_slots))
             for slot in concerning_slots:
                 ctx.on_changed_hints(client.team, slot)
 
@@ -2053,7 +2353,7 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
                 targets.add(client)
             if targets:
                 ctx.broadcast(targets, [args])
-            ctx.save()
+            ctx.save_changes(("stored_data", args["key"]))
 
         elif cmd == "SetNotify":
             if "keys" not in args or type(args["keys"]) != list:
@@ -2077,7 +2377,7 @@ def update_client_status(ctx: Context, client: Client, new_status: ClientStatus)
 
         ctx.client_game_state[client.team, client.slot] = new_status
         ctx.on_client_status_change(client.team, client.slot)
-        ctx.save()
+        ctx.save_changes(("client_game_state", (client.team, client.slot)))
 
 
 class ServerCommandProcessor(CommonCommandProcessor):
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import typing
 import enum
+import operator
 import warnings
 from json import JSONEncoder, JSONDecoder
 
 if typing.TYPE_CHECKING:
+    import mmap
+
     from websockets import WebSocketServerProtocol as ServerConnection
 
 from Utils import ByValue, Version
@@ -390,6 +393,135 @@ class Hint(typing.NamedTuple):
         return self.receiving_player == self.finding_player
 
 
+multidata_format_version = 4
+"""format version of .archipelago files written by encode_multidata. Versions up to 3 are one compressed pickle."""
+
+
+def _encode_section(value: typing.Any) -> bytes:
+    import pickle
+    import zlib
+    return zlib.compress(pickle.dumps(value), 9)
+
+
+def _decode_section(data: typing.Union[bytes, memoryview]) -> typing.Any:
+    import zlib
+    from Utils import restricted_loads
+    return restricted_loads(zlib.decompress(data))
+
+
+class _SectionTable:
+    """Table of contents of a multidata container: where each compressed section is in the data after it."""
+    sections: typing.Dict[str, typing.Tuple[int, int]]
+    slot_data: typing.Optional[typing.Dict[int, typing.Tuple[int, int]]]
+    """sections of each slot's slot_data, None if the multidata had no slot_data"""
+    data: memoryview
+
+    def __init__(self, data: typing.Union[bytes, memoryview, "mmap.mmap"]) -> None:
+        view = memoryview(data)
+        table_length = int.from_bytes(view[1:5], "big")
+        self.sections, self.slot_data = _decode_section(view[5:5 + table_length])
+        self.data = view[5 + table_length:]
+
+    def raw(self, offset: int, length: int) -> memoryview:
+        return self.data[offset:offset + length]
+
+
+class SlotDataSections(typing.Mapping[int, typing.Any]):
+    """slot_data of a multidata container, decoding each slot's on first access."""
+    def __init__(self, table: _SectionTable) -> None:
+        self._table = table
+        self._decoded: typing.Dict[int, typing.Any] = {}
+
+    def __getitem__(self, slot: int) -> typing.Any:
+        if slot in self._decoded:
+            return self._decoded[slot]
+        value = self._decoded[slot] = _decode_section(self._table.raw(*self._table.slot_data[slot]))
+        return value
+
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(self._table.slot_data)
+
+    def __len__(self) -> int:
+        return len(self._table.slot_data)
+
+    def raw(self, slot: int) -> typing.Optional[memoryview]:
+        """Returns the still compressed slot_data of slot, or None if it was decoded already."""
+        if slot in self._decoded:
+            return None
+        return self._table.raw(*self._table.slot_data[slot])
+
+
+class MultiData(typing.MutableMapping[str, typing.Any]):
+    """
+    Multidata read from a container of format version 4, which compresses each top-level key and each slot's
+    slot_data separately. Sections are only decompressed when first accessed, so a server can start without
+    decoding the slot_data, spheres and other data it does not need yet.
+    """
+    def __init__(self, data: typing.Union[bytes, memoryview, "mmap.mmap"]) -> None:
+        self._table = _SectionTable(data)
+        self._sections = dict(self._table.sections)
+        self._decoded: typing.Dict[str, typing.Any] = {}
+        if self._table.slot_data is not None:
+            self._decoded["slot_data"] = SlotDataSections(self._table)
+
+    def __getitem__(self, key: str) -> typing.Any:
+        if key in self._decoded:
+            return self._decoded[key]
+        value = self._decoded[key] = _decode_section(self._table.raw(*self._sections[key]))
+        return value
+
+    def __setitem__(self, key: str, value: typing.Any) -> None:
+        self._decoded[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self._decoded and key not in self._sections:
+            raise KeyError(key)
+        self._decoded.pop(key, None)
+        self._sections.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._decoded or key in self._sections
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(dict.fromkeys([*self._sections, *self._decoded]))
+
+    def __len__(self) -> int:
+        return len(self._sections.keys() | self._decoded.keys())
+
+    def raw(self, key: str) -> typing.Optional[memoryview]:
+        """Returns the still compressed section of key, or None if it was decoded or replaced."""
+        if key in self._decoded:
+            return None
+        return self._table.raw(*self._sections[key])
+
+
+def encode_multidata(multidata: typing.Mapping[str, typing.Any]) -> bytes:
+    """Encodes multidata into a container of multidata_format_version, see MultiData.
+    Sections of a MultiData that were not accessed are copied over without decoding them."""
+    sections: typing.Dict[str, typing.Tuple[int, int]] = {}
+    slot_data_sections: typing.Optional[typing.Dict[int, typing.Tuple[int, int]]] = None
+    blobs: typing.List[typing.Union[bytes, memoryview]] = []
+    offset = 0
+
+    def add(sections_from: typing.Mapping[typing.Any, typing.Any], key: typing.Any) -> typing.Tuple[int, int]:
+        nonlocal offset
+        blob = sections_from.raw(key) if isinstance(sections_from, (MultiData, SlotDataSections)) else None
+        if blob is None:
+            blob = _encode_section(sections_from[key])
+        blobs.append(blob)
+        offset += len(blob)
+        return offset - len(blob), len(blob)
+
+    for key in multidata:
+        if key == "slot_data":
+            slot_data = multidata[key]
+            slot_data_sections = {slot: add(slot_data, slot) for slot in slot_data}
+        else:
+            sections[key] = add(multidata, key)
+    table = _encode_section((sections, slot_data_sections))
+    return b"".join((bytes([multidata_format_version]), len(table).to_bytes(4, "big"), table, *blobs))
+
+
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
     def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
         super().__init__(values)
@@ -403,22 +535,52 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
-    def find_item(self, slots: typing.Set[int], seeked_item_id: int
-                  ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
+        # receiver -> item -> (sender, location, item, receiver, flags), for find_item and get_for_player
+        self._receiver_index: typing.Dict[int, typing.Dict[int, typing.List[typing.Tuple[int, ...]]]] = {}
         for finding_player, check_data in self.items():
             for location_id, (item_id, receiving_player, item_flags) in check_data.items():
-                if receiving_player in slots and item_id == seeked_item_id:
-                    yield finding_player, location_id, item_id, receiving_player, item_flags
+                self._receiver_index.setdefault(receiving_player, {}).setdefault(item_id, []).append(
+                    (finding_player, location_id, item_id, receiving_player, item_flags))
+        # sender -> location -> sphere, see set_spheres
+        self._spheres: typing.Dict[int, typing.Dict[int, int]] = {}
+
+    def find_item(self, slots: typing.Set[int], seeked_item_id: int
+                  ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
+        found = [entry for slot in slots for entry in self._receiver_index.get(slot, {}).get(seeked_item_id, ())]
+        # in entry order, by sender and location, no matter the order of slots
+        found.sort(key=operator.itemgetter(0, 1))
+        yield from found
 
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
         import collections
         all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
-        for source_slot, location_data in self.items():
-            for location_id, values in location_data.items():
-                if values[1] == slot:
-                    all_locations[source_slot].add(location_id)
+        for entries in self._receiver_index.get(slot, {}).values():
+            for source_slot, location_id, *_ in entries:
+                all_locations[source_slot].add(location_id)
         return all_locations
 
+    def set_spheres(self, spheres: typing.Sequence[typing.Dict[int, typing.Set[int]]]) -> None:
+        """Stores the sphere of each location, for get_sphere and get_spheres."""
+        self._spheres = {}
+        for sphere_number, sphere in enumerate(spheres):
+            for player, locations in sphere.items():
+                if player in self:
+                    player_locations = self[player]
+                    self._spheres.setdefault(player, {}).update(
+                        (location, sphere_number) for location in locations if location in player_locations)
+
+    def get_sphere(self, slot: int, location: int) -> int:
+        try:
+            return self._spheres[slot][location]
+        except KeyError:
+            raise KeyError(f"No sphere for location {location} of player {slot}")
+
+    def get_spheres(self, slot: int) -> typing.Dict[int, int]:
+        """Returns the sphere of each location of slot that is in one. Raises KeyError for unknown slots."""
+        if slot not in self:
+            raise KeyError(slot)
+        return dict(self._spheres.get(slot, {}))
+
     def get_checked(self, state: typing.Dict[typing.Tuple[int, int], typing.Set[int]], team: int, slot: int
                     ) -> typing.List[int]:
         checked = state[team, slot]
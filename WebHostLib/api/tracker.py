@@ -0,0 +1,60 @@
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from flask import abort, make_response, request
+from werkzeug import Response
+
+from . import api_endpoints
+from ..models import Room
+from ..tracker import get_room_multisave
+
+
+def get_room_etag(room: Room) -> str:
+    """Changes with the room's last_activity, which every save advances,
+    so unchanged trackers are answered without decoding the multisave."""
+    return f"{room.id.hex}-{room.last_activity.strftime('%Y%m%d%H%M%S%f')}"
+
+
+@api_endpoints.route('/tracker/<suuid:tracker>')
+def tracker_data(tracker: UUID) -> Response:
+    """Checked locations, received items, hints and status of every slot that changed after revision `since`.
+    Without a known `since`, all slots are returned and "full" is true.
+    Slots are only ever returned whole, so clients replace their data of returned slots."""
+    room = Room.get(tracker=tracker)
+    if room is None:
+        return abort(404)
+
+    etag = get_room_etag(room)
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
+        return response
+
+    multisave = get_room_multisave(room)
+
+    since = request.args.get("since", 0, type=int)
+    revisions = multisave.get("tracker_revisions", {"revision": 0, "slots": ()})
+    revision: int = revisions["revision"]
+    slot_revisions: Dict[Tuple[int, int], int] = dict(revisions["slots"])
+    full = not 0 < since <= revision
+
+    slots: List[Dict[str, Any]] = []
+    for team, slot in sorted(multisave.get("connect_names", {}).values()):
+        if not full and slot_revisions.get((team, slot), 0) <= since:
+            continue
+        slots.append({
+            "team": team,
+            "player": slot,
+            "checked_locations": sorted(multisave["location_checks"].get((team, slot), ())),
+            "received_items": [item._asdict() for item in multisave["received_items"].get((team, slot, True), ())],
+            "hints": [hint._asdict() for hint in multisave["hints"].get((team, slot), ())],
+            "status": multisave["client_game_state"].get((team, slot), 0),
+        })
+
+    response = make_response({
+        "revision": revision,
+        "full": full,
+        "slots": slots,
+    })
+    response.set_etag(etag)
+    return response
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import gc
 import json
 import logging
 import multiprocessing
+import time
 import typing
 from datetime import timedelta, datetime
 from threading import Event, Thread
@@ -13,6 +15,8 @@ from pony.orm import db_session, select, commit, PrimaryKey
 
 from Utils import restricted_loads
 from .locker import Locker, AlreadyRunningException
+from .notifications import RoomNotificationListener
+from .scheduler import GenerationScheduler
 
 _stop_event = Event()
 
@@ -45,7 +49,20 @@ def _mp_gen_game(gen_options: dict, meta: dict[str, Any] | None = None, owner=No
     return res
 
 
-def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation):
+def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation,
+                     scheduler: GenerationScheduler | None = None):
+    generation_id = generation.id
+
+    def on_success(seed_id):
+        if scheduler:
+            scheduler.finished(generation_id, True)
+        handle_generation_success(seed_id)
+
+    def on_failure(result: BaseException):
+        if scheduler:
+            scheduler.finished(generation_id, False)
+        handle_generation_failure(result)
+
     try:
         meta = json.loads(generation.meta)
         options = restricted_loads(generation.options)
@@ -54,8 +71,10 @@ def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation):
                          {"meta": meta,
                           "sid": generation.id,
                           "owner": generation.owner},
-                         handle_generation_success, handle_generation_failure)
+                         on_success, on_failure)
     except Exception as e:
+        if scheduler:
+            scheduler.finished(generation_id, False)
         generation.state = STATE_ERROR
         commit()
         logging.exception(e)
@@ -63,10 +82,22 @@ def launch_generator(pool: multiprocessing.pool.Pool, generation: Generation):
         generation.state = STATE_STARTED
 
 
+def get_generator_context() -> multiprocessing.context.BaseContext:
+    """Where available, generators are forked from a server process that already imported all worlds,
+    so neither starting nor recycling a generator has to load the worlds again."""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context()
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["__main__", "WebHostLib.autolauncher", "WebHostLib.generate"])
+    return context
+
+
 def init_generator(config: dict[str, Any]) -> None:
     from setproctitle import setproctitle
 
     setproctitle("Generator (idle)")
+    # keep garbage collection from touching, and thereby copying, the memory pages shared with the fork server
+    gc.freeze()
 
     try:
         import resource
@@ -99,27 +130,97 @@ def cleanup():
         logging.info(f"{rooms} Rooms, {seeds} Seeds and {slots} Slots have been deleted.")
 
 
+room_poll_interval = 5  # seconds between database polls for rooms to start, if notifications are enabled
+room_rebalance_interval = 60  # seconds between checks for overloaded hosters
+hoster_overloaded_lag = 0.1  # average event loop lag in seconds, above which a hoster moves rooms elsewhere
+
+
+def get_room_hoster(hosters: typing.List[MultiworldInstance], room_id: UUID) -> MultiworldInstance:
+    """Returns the hoster already hosting the room, or else the one best suited to take it."""
+    for hoster in hosters:
+        if room_id in hoster.room_ids:
+            return hoster
+    return min(hosters, key=lambda hoster: (hoster.overloaded, hoster.get_load()))
+
+
+def get_relocations(hosters: typing.List[MultiworldInstance]) -> typing.List[typing.Tuple[MultiworldInstance, UUID]]:
+    """For each overloaded hoster, picks the room that evens out its load with the least loaded hoster the most."""
+    relocations: typing.List[typing.Tuple[MultiworldInstance, UUID]] = []
+    for hoster in hosters:
+        if not hoster.overloaded or hoster.rooms_relocating or len(hoster.room_ids) < 2:
+            continue
+        target = min(hosters, key=MultiworldInstance.get_load)
+        if target.overloaded:
+            continue
+        load, target_load = hoster.get_load(), target.get_load()
+
+        def load_after_move(room_id: UUID) -> float:
+            """Load of the busier hoster after moving the room."""
+            room_load = hoster.get_room_load(room_id)
+            return max(load - room_load, target_load + room_load)
+
+        room_id = min(hoster.room_ids, key=load_after_move)
+        if load_after_move(room_id) < load:
+            relocations.append((hoster, room_id))
+    return relocations
+
+
 def autohost(config: dict):
+    def start_rooms(hosters: typing.List[MultiworldInstance], rooms: typing.Iterable[Room]) -> None:
+        for room in rooms:
+            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
+            if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
+                get_room_hoster(hosters, room.id).start_room(room.id)
+
     def keep_running():
         stop_event = _stop_event
         try:
             with Locker("autohost"):
                 cleanup()
-                hosters = []
-                for x in range(config["HOSTERS"]):
-                    hoster = MultiworldInstance(config, x)
-                    hosters.append(hoster)
-                    hoster.start()
-
-                while not stop_event.wait(0.1):
-                    with db_session:
-                        rooms = select(
-                            room for room in Room if
-                            room.last_activity >= datetime.utcnow() - timedelta(days=3))
-                        for room in rooms:
-                            # we have to filter twice, as the per-room timeout can't currently be PonyORM transpiled.
-                            if room.last_activity >= datetime.utcnow() - timedelta(seconds=room.timeout + 5):
-                                hosters[room.id.int % len(hosters)].start_room(room.id)
+                listener: typing.Optional[RoomNotificationListener] = None
+                if config["ROOM_NOTIFY_ADDRESS"]:
+                    try:
+                        listener = RoomNotificationListener(config["ROOM_NOTIFY_ADDRESS"])
+                    except OSError as e:
+                        logging.warning(f"Could not listen for room notifications, falling back to polling: {e}")
+
+                try:
+                    hosters = []
+                    for x in range(config["HOSTERS"]):
+                        hoster = MultiworldInstance(config, x, notifications=listener is not None)
+                        hosters.append(hoster)
+                        hoster.start()
+
+                    poll_interval = room_poll_interval if listener else 0
+                    next_poll = 0.
+                    next_rebalance = time.monotonic() + room_rebalance_interval
+                    while not stop_event.is_set():
+                        if listener:
+                            room_ids = listener.receive(0.1)
+                        else:
+                            room_ids = set()
+                            stop_event.wait(0.1)
+                        for hoster in hosters:
+                            hoster.update()
+                        if time.monotonic() >= next_rebalance:
+                            next_rebalance = time.monotonic() + room_rebalance_interval
+                            for hoster, room_id in get_relocations(hosters):
+                                hoster.relocate_room(room_id)
+                        if time.monotonic() >= next_poll:
+                            next_poll = time.monotonic() + poll_interval
+                            with db_session:
+                                start_rooms(hosters, select(
+                                    room for room in Room if
+                                    room.last_activity >= datetime.utcnow() - timedelta(days=3)))
+                        elif room_ids:
+                            with db_session:
+                                start_rooms(hosters, select(room for room in Room if room.id in room_ids))
+                        for room_id in room_ids:
+                            for hoster in hosters:
+                                hoster.notify_room(room_id)
+                finally:
+                    if listener:
+                        listener.close()
 
         except AlreadyRunningException:
             logging.info("Autohost reports as already running, not starting another.")
@@ -130,11 +231,13 @@ def autohost(config: dict):
 def autogen(config: dict):
     def keep_running():
         stop_event = _stop_event
+        scheduler = GenerationScheduler(config["GENERATORS"])
+        last_metrics = time.monotonic()
         try:
             with Locker("autogen"):
 
-                with multiprocessing.Pool(config["GENERATORS"], initializer=init_generator,
-                                          initargs=(config,), maxtasksperchild=10) as generator_pool:
+                with get_generator_context().Pool(config["GENERATORS"], initializer=init_generator,
+                                                  initargs=(config,), maxtasksperchild=10) as generator_pool:
                     with db_session:
                         to_start = select(generation for generation in Generation if generation.state == STATE_STARTED)
 
@@ -145,7 +248,8 @@ def autogen(config: dict):
                                 if sid:
                                     generation.delete()
                                 else:
-                                    launch_generator(generator_pool, generation)
+                                    scheduler.start(generation)
+                                    launch_generator(generator_pool, generation, scheduler)
 
                             commit()
                         select(generation for generation in Generation if generation.state == STATE_ERROR).delete()
@@ -156,8 +260,12 @@ def autogen(config: dict):
                             to_start = select(
                                 generation for generation in Generation
                                 if generation.state == STATE_QUEUED).for_update()
-                            for generation in to_start:
-                                launch_generator(generator_pool, generation)
+                            for generation in scheduler.schedule(to_start):
+                                launch_generator(generator_pool, generation, scheduler)
+                        # only worth logging while generations are waiting for a free generator
+                        if scheduler.queued and time.monotonic() - last_metrics > 60:
+                            last_metrics = time.monotonic()
+                            scheduler.log_metrics()
         except AlreadyRunningException:
             logging.info("Autogen reports as already running, not starting another.")
 
@@ -165,10 +273,11 @@ def autogen(config: dict):
 
 
 multiworlds: typing.Dict[type(Room.id), MultiworldInstance] = {}
+static_server_data_frozen = False
 
 
 class MultiworldInstance():
-    def __init__(self, config: dict, id: int):
+    def __init__(self, config: dict, id: int, notifications: bool = False):
         self.room_ids = set()
         self.process: typing.Optional[multiprocessing.Process] = None
         self.ponyconfig = config["PONY"]
@@ -177,29 +286,77 @@ class MultiworldInstance():
         self.host = config["HOST_ADDRESS"]
         self.rooms_to_start = multiprocessing.Queue()
         self.rooms_shutting_down = multiprocessing.Queue()
+        # only rooms of hosters that get notified of new commands can poll for them less often
+        self.room_notifications = multiprocessing.Queue() if notifications else None
+        self.hoster_loads = multiprocessing.Queue()
+        self.rooms_to_relocate = multiprocessing.Queue()
+        self.rooms_relocating = set()
+        self.load: typing.Optional[HosterLoad] = None  # latest report of the hoster process
         self.name = f"MultiHoster{id}"
 
     def start(self):
         if self.process and self.process.is_alive():
             return False
 
+        global static_server_data_frozen
+        static_server_data = get_static_server_data()
+        if not static_server_data_frozen:
+            # exclude the static data from garbage collection before the first fork, so hosters keep sharing its
+            # memory pages, without freezing the garbage of every later restart for good
+            gc.freeze()
+            static_server_data_frozen = True
         process = multiprocessing.Process(group=None, target=run_server_process,
-                                          args=(self.name, self.ponyconfig, get_static_server_data(),
+                                          args=(self.name, self.ponyconfig, static_server_data,
                                                 self.cert, self.key, self.host,
-                                                self.rooms_to_start, self.rooms_shutting_down),
+                                                self.rooms_to_start, self.rooms_shutting_down,
+                                                self.room_notifications, self.hoster_loads, self.rooms_to_relocate),
                                           name=self.name)
         process.start()
         self.process = process
 
-    def start_room(self, room_id):
+    def update(self):
+        """Collects rooms that shut down and the latest load report of the hoster process."""
         while not self.rooms_shutting_down.empty():
-            self.room_ids.remove(self.rooms_shutting_down.get(block=True, timeout=None))
+            room_id = self.rooms_shutting_down.get(block=True, timeout=None)
+            self.room_ids.remove(room_id)
+            self.rooms_relocating.discard(room_id)
+        while not self.hoster_loads.empty():
+            self.load = self.hoster_loads.get(block=True, timeout=None)
+            # rooms no longer reported are shutting down or were not running anymore when asked to move
+            self.rooms_relocating &= self.load.rooms.keys()
+
+    @property
+    def overloaded(self) -> bool:
+        return self.load is not None and self.load.lag > hoster_overloaded_lag
+
+    def get_room_load(self, room_id) -> float:
+        """Rough load of a room, counting the room itself, each connected client and each message per second as 1."""
+        room_load = self.load.rooms.get(room_id, None) if self.load else None
+        if room_load is None:
+            return 1.
+        return 1. + room_load.clients + room_load.messages_per_second
+
+    def get_load(self) -> float:
+        return sum(self.get_room_load(room_id) for room_id in self.room_ids)
+
+    def start_room(self, room_id):
+        self.update()
         if room_id in self.room_ids:
             pass  # should already be hosted currently.
         else:
             self.room_ids.add(room_id)
             self.rooms_to_start.put(room_id)
 
+    def notify_room(self, room_id):
+        if self.room_notifications and room_id in self.room_ids:
+            self.room_notifications.put(room_id)  # wake up the room to check for new commands
+
+    def relocate_room(self, room_id):
+        """Saves and shuts down the room, so autohost starts it again on a hoster with less load."""
+        logging.info(f"Moving room {room_id} off {self.name}, which is overloaded.")
+        self.rooms_relocating.add(room_id)
+        self.rooms_to_relocate.put(room_id)
+
     def stop(self):
         if self.process:
             self.process.terminate()
@@ -214,5 +371,5 @@ class MultiworldInstance():
 
 
 from .models import Room, Generation, STATE_QUEUED, STATE_STARTED, STATE_ERROR, db, Seed, Slot
-from .customserver import run_server_process, get_static_server_data
+from .customserver import HosterLoad, run_server_process, get_static_server_data
 from .generate import gen_game
@@ -5,7 +5,9 @@ import collections
 import datetime
 import functools
 import logging
+import mmap
 import multiprocessing
+import os
 import pickle
 import random
 import socket
@@ -22,7 +24,7 @@ import Utils
 from MultiServer import Context, server, auto_shutdown, ServerCommandProcessor, ClientMessageProcessor, load_server_cert
 from Utils import restricted_loads, cache_argsless
 from .locker import Locker
-from .models import Command, GameDataPackage, Room, db
+from .models import Command, GameDataPackage, Room, Seed, db
 
 
 class CustomClientMessageProcessor(ClientMessageProcessor):
@@ -52,6 +54,22 @@ MultiServer.client_message_processor = CustomClientMessageProcessor
 del MultiServer
 
 
+db_command_poll_interval = 5  # seconds between polls for room commands
+db_command_fallback_poll_interval = 60  # seconds between polls for room commands, if room notifications are enabled
+load_report_interval = 10  # seconds between load reports of a hoster to autohost
+lag_sample_interval = 1  # seconds between measurements of the event loop lag
+
+
+class RoomLoad(typing.NamedTuple):
+    clients: int
+    messages_per_second: float
+
+
+class HosterLoad(typing.NamedTuple):
+    lag: float  # average delay of the event loop in seconds
+    rooms: typing.Dict[typing.Any, RoomLoad]
+
+
 class DBCommandProcessor(ServerCommandProcessor):
     def output(self, text: str):
         self.ctx.logger.info(text)
@@ -71,6 +89,14 @@ class WebHostContext(Context):
         self.main_loop = asyncio.get_running_loop()
         self.video = {}
         self.tags = ["AP", "WebHost"]
+        # revisions for the tracker API, see update_tracker_revisions
+        self.tracker_revision = 0
+        self.tracker_slot_revisions: typing.Dict[typing.Tuple[int, int], int] = {}
+        self.tracker_lengths: typing.Dict[typing.Tuple[int, int], typing.Tuple[int, int]] = {}
+        self.tracker_changed_slots: typing.Set[typing.Tuple[int, int]] = set()
+        self.command_poll_interval = db_command_poll_interval
+        self.commands_pending = threading.Event()
+        self.relocating = False  # shut down to be started again on another hoster
 
     def __del__(self):
         try:
@@ -97,7 +123,9 @@ class WebHostContext(Context):
                         self.main_loop.call_soon_threadsafe(cmdprocessor, command.commandtext)
                         command.delete()
                     commit()
-            time.sleep(5)
+            # woken up early by room notifications, see WebHostLib.notifications
+            self.commands_pending.wait(self.command_poll_interval)
+            self.commands_pending.clear()
 
     @db_session
     def load(self, room_id: int):
@@ -108,7 +136,7 @@ class WebHostContext(Context):
         else:
             self.port = get_random_port()
 
-        multidata = self.decompress(room.seed.multidata)
+        multidata = self.decompress(get_seed_multidata(room.seed))
         game_data_packages = {}
 
         static_gamespackage = self.gamespackage  # this is shared across all rooms
@@ -127,9 +155,9 @@ class WebHostContext(Context):
                     # games package could be dropped from static data once all rooms embed data package
                     del multidata["datapackage"][game]
                 else:
-                    row = GameDataPackage.get(checksum=game_data["checksum"])
-                    if row:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8. multidata should be complete
-                        game_data_packages[game] = Utils.restricted_loads(row.data)
+                    game_data_package = get_game_data_package(game_data["checksum"])
+                    if game_data_package:  # None if rolled on >= 0.3.9 but uploaded to <= 0.3.8
+                        game_data_packages[game] = game_data_package  # multidata should be complete otherwise
                         continue
                     else:
                         self.logger.warning(f"Did not find game_data_package for {game}: {game_data['checksum']}")
@@ -154,7 +182,6 @@ class WebHostContext(Context):
             if savegame_data:
                 self.set_save(restricted_loads(Room.get(id=self.room_id).multisave))
             self._start_async_saving(atexit_save=False)
-        threading.Thread(target=self.listen_to_db_commands, daemon=True).start()
 
     @db_session
     def _save(self, exit_save: bool = False) -> bool:
@@ -163,18 +190,111 @@ class WebHostContext(Context):
         # saving only occurs on activity, so we can "abuse" this information to mark this as last_activity
         if not exit_save:  # we don't want to count a shutdown as activity, which would restart the server again
             room.last_activity = datetime.datetime.utcnow()
+        else:
+            # but every save has to change last_activity, which marks the save generation for the tracker
+            room.last_activity += datetime.timedelta(microseconds=1)
         return True
 
     def get_save(self) -> dict:
         d = super(WebHostContext, self).get_save()
         d["video"] = [(tuple(playerslot), videodata) for playerslot, videodata in self.video.items()]
+        self.update_tracker_revisions()
+        d["tracker_revisions"] = {
+            "revision": self.tracker_revision,
+            "slots": [(team_slot, revision) for team_slot, revision in self.tracker_slot_revisions.items()],
+        }
         return d
 
+    def set_save(self, savedata: dict):
+        super(WebHostContext, self).set_save(savedata)
+        if "tracker_revisions" in savedata:
+            self.tracker_revision = savedata["tracker_revisions"]["revision"]
+            self.tracker_slot_revisions = {tuple(team_slot): revision
+                                           for team_slot, revision in savedata["tracker_revisions"]["slots"]}
+        self.tracker_lengths = {team_slot: self.get_tracker_lengths(*team_slot)
+                                for team_slot in self.connect_names.values()}
+        self.tracker_changed_slots = set()
+
+    def on_changed_hints(self, team: int, slot: int):
+        super(WebHostContext, self).on_changed_hints(team, slot)
+        self.tracker_changed_slots.add((team, slot))
+
+    def on_client_status_change(self, team: int, slot: int):
+        super(WebHostContext, self).on_client_status_change(team, slot)
+        self.tracker_changed_slots.add((team, slot))
+
+    def get_tracker_lengths(self, team: int, slot: int) -> typing.Tuple[int, int]:
+        """Checked locations and received items only ever grow, so their lengths change whenever they do."""
+        return len(self.location_checks.get((team, slot), ())), len(self.received_items.get((team, slot, True), ()))
+
+    def update_tracker_revisions(self) -> None:
+        """Starts a new revision for the slots that changed since the last save, which WebHostLib.api.tracker uses
+        to only send the slots that changed since a revision a client already knows.
+        Hint and status changes are noted as they happen, see on_changed_hints and on_client_status_change."""
+        changed = self.tracker_changed_slots
+        for team_slot in self.connect_names.values():
+            lengths = self.get_tracker_lengths(*team_slot)
+            if self.tracker_lengths.get(team_slot, None) != lengths:
+                self.tracker_lengths[team_slot] = lengths
+                changed.add(team_slot)
+        if changed:
+            self.tracker_revision += 1
+            for team_slot in changed:
+                self.tracker_slot_revisions[team_slot] = self.tracker_revision
+            changed.clear()
+
 
 def get_random_port():
     return random.randint(49152, 65535)
 
 
+multidata_cache_max_age = datetime.timedelta(days=7)
+
+
+def get_seed_multidata(seed: Seed) -> mmap.mmap:
+    """
+    Returns the multidata of a seed, memory mapped from a cache file,
+    so all rooms of a seed across all hosting processes share one copy of it and don't have to fetch it again.
+    Multidata of format version 4 is then only decoded in parts as each room needs them, see NetUtils.MultiData.
+    """
+    path = Utils.cache_path("multidata", f"{seed.id}.archipelago")
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as temp_file:
+            temp_file.write(seed.multidata)
+        os.replace(temp_path, path)
+        f = open(path, "rb")
+    else:
+        os.utime(path)  # keep it from being pruned
+    with f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def prune_multidata_cache() -> None:
+    """Removes cached multidata that was not used within multidata_cache_max_age."""
+    cache = Utils.cache_path("multidata")
+    if not os.path.isdir(cache):
+        return
+    cutoff = time.time() - multidata_cache_max_age.total_seconds()
+    for entry in os.scandir(cache):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+        except OSError:
+            pass  # in use on Windows or removed by another process
+
+
+@functools.lru_cache(maxsize=64)
+def get_game_data_package(checksum: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
+    """Decoded GameDataPackage by checksum, shared by all rooms of a hosting process. Must not be modified."""
+    with db_session:
+        row = GameDataPackage.get(checksum=checksum)
+        return Utils.restricted_loads(row.data) if row else None
+
+
 @cache_argsless
 def get_static_server_data() -> dict:
     import worlds
@@ -226,7 +346,10 @@ def set_up_logging(room_id) -> logging.Logger:
 
 def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                        cert_file: typing.Optional[str], cert_key_file: typing.Optional[str],
-                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue):
+                       host: str, rooms_to_run: multiprocessing.Queue, rooms_shutting_down: multiprocessing.Queue,
+                       room_notifications: typing.Optional[multiprocessing.Queue] = None,
+                       hoster_loads: typing.Optional[multiprocessing.Queue] = None,
+                       rooms_to_relocate: typing.Optional[multiprocessing.Queue] = None):
     from setproctitle import setproctitle
 
     setproctitle(name)
@@ -249,6 +372,8 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     if "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded in the custom server.")
 
+    prune_multidata_cache()
+
     import gc
 
     if not cert_file:
@@ -270,12 +395,15 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
     gc.collect()  # free intermediate objects used during setup
 
     loop = asyncio.get_event_loop()
+    running_rooms: typing.Dict[typing.Any, WebHostContext] = {}
 
     async def start_room(room_id):
         with Locker(f"RoomLocker {room_id}"):
             try:
                 logger = set_up_logging(room_id)
                 ctx = WebHostContext(static_server_data, logger)
+                if room_notifications:
+                    ctx.command_poll_interval = db_command_fallback_poll_interval
                 ctx.load(room_id)
                 ctx.init_save()
                 assert ctx.server is None
@@ -305,6 +433,9 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                         room.last_port = port
                 else:
                     ctx.logger.exception("Could not determine port. Likely hosting failure.")
+                # commands can only be run once the server is up
+                running_rooms[room_id] = ctx
+                threading.Thread(target=ctx.listen_to_db_commands, daemon=True).start()
                 with db_session:
                     ctx.auto_shutdown = Room.get(id=room_id).timeout
                 if ctx.saving:
@@ -329,14 +460,20 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                     setattr(asyncio.current_task(), "save", None)
             finally:
                 try:
+                    running_rooms.pop(room_id, None)
                     ctx.save_dirty = False  # make sure the saving thread does not write to DB after final wakeup
                     ctx.exit_event.set()  # make sure the saving thread stops at some point
+                    ctx.commands_pending.set()  # and the command thread
                     # NOTE: async saving should probably be an async task and could be merged with shutdown_task
                     with (db_session):
-                        # ensure the Room does not spin up again on its own, minute of safety buffer
                         room = Room.get(id=room_id)
-                        room.last_activity = datetime.datetime.utcnow() - \
-                                             datetime.timedelta(minutes=1, seconds=room.timeout)
+                        if ctx.relocating:
+                            # keep the Room active, so autohost starts it again on another hoster
+                            room.last_activity = datetime.datetime.utcnow()
+                        else:
+                            # ensure the Room does not spin up again on its own, minute of safety buffer
+                            room.last_activity = datetime.datetime.utcnow() - \
+                                                 datetime.timedelta(minutes=1, seconds=room.timeout)
                     logging.info(f"Shutting down room {room_id} on {name}.")
                 finally:
                     await asyncio.sleep(5)
@@ -363,9 +500,60 @@ def run_server_process(name: str, ponyconfig: dict, static_server_data: dict,
                 logging.info(f"Starting room {next_room} on {name}.")
                 del task  # delete reference to task object
 
+    class Notifier(threading.Thread):
+        def run(self):
+            while 1:
+                room_id = room_notifications.get(block=True, timeout=None)
+                ctx = running_rooms.get(room_id, None)
+                if ctx:
+                    ctx.commands_pending.set()
+
+    def relocate_room(ctx: WebHostContext) -> None:
+        ctx.relocating = True
+        ctx.logger.info("Moving room to another hoster.")
+        ctx.server.ws_server.close()
+        ctx.exit_event.set()
+
+    class Relocator(threading.Thread):
+        def run(self):
+            while 1:
+                room_id = rooms_to_relocate.get(block=True, timeout=None)
+                ctx = running_rooms.get(room_id, None)
+                if ctx:
+                    loop.call_soon_threadsafe(relocate_room, ctx)
+
+    async def report_load():
+        lags: typing.List[float] = []
+        received_messages: typing.Dict[typing.Any, int] = {}
+        last_report = loop.time()
+        while 1:
+            sleep_start = loop.time()
+            await asyncio.sleep(lag_sample_interval)
+            now = loop.time()
+            lags.append(now - sleep_start - lag_sample_interval)
+            if now - last_report >= load_report_interval:
+                rooms: typing.Dict[typing.Any, RoomLoad] = {}
+                for room_id, ctx in running_rooms.items():
+                    messages = ctx.received_messages - received_messages.get(room_id, 0)
+                    rooms[room_id] = RoomLoad(len(ctx.endpoints), messages / (now - last_report))
+                received_messages = {room_id: ctx.received_messages for room_id, ctx in running_rooms.items()}
+                hoster_loads.put(HosterLoad(sum(lags) / len(lags), rooms))
+                lags.clear()
+                last_report = now
+
     starter = Starter()
     starter.daemon = True
     starter.start()
+    if room_notifications:
+        notifier = Notifier()
+        notifier.daemon = True
+        notifier.start()
+    if rooms_to_relocate:
+        relocator = Relocator()
+        relocator.daemon = True
+        relocator.start()
+    if hoster_loads:
+        loop.create_task(report_load())
     try:
         loop.run_forever()
     finally:
@@ -17,11 +17,15 @@ from Main import main as ERmain
 from Utils import __version__
 from WebHostLib import app
 from settings import ServerOptions, GeneratorOptions
+from worlds import load_all_worlds
 from worlds.alttp.EntranceRandomizer import parse_arguments
 from .check import get_yaml_data, roll_options
 from .models import Generation, STATE_ERROR, STATE_QUEUED, Seed, UUID
 from .upload import upload_zip_to_db
 
+# any game can be requested and generators fork from the process importing this, see autolauncher.get_generator_context
+load_all_worlds()
+
 
 def get_meta(options_source: dict, race: bool = False) -> Dict[str, Union[List[str], Dict[str, Any]]]:
     plando_options: Set[str] = set()
@@ -0,0 +1,64 @@
+"""
+Best effort notifications from the website to autohost, so rooms get started and receive their commands right away,
+instead of waiting for the next database poll. Anything that gets lost is still picked up by polling.
+"""
+import logging
+import select
+import socket
+import typing
+from uuid import UUID
+
+Address = typing.Tuple[str, int]
+
+
+def notify_room(address: typing.Optional[Address], room_id: UUID) -> None:
+    """Signal that a room has new activity or commands. Changes have to be committed to the database beforehand."""
+    if not address:
+        return
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.sendto(room_id.bytes, tuple(address))
+    except OSError as e:
+        logging.debug(f"Could not notify autohost of room {room_id}: {e}")
+
+
+class RoomNotificationListener:
+    """Receives notify_room datagrams. Each datagram only holds a room id, the database stays the source of truth."""
+    sock: socket.socket
+
+    def __init__(self, address: Address):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            self.sock.bind(tuple(address))
+        except OSError:
+            self.sock.close()
+            raise
+        self.sock.setblocking(False)
+
+    @property
+    def address(self) -> Address:
+        return self.sock.getsockname()
+
+    def receive(self, timeout: float) -> typing.Set[UUID]:
+        """Waits up to timeout for notifications, then returns the ids of all rooms notified so far."""
+        room_ids: typing.Set[UUID] = set()
+        if select.select((self.sock,), (), (), timeout)[0]:
+            while True:
+                try:
+                    data = self.sock.recv(64)
+                except (BlockingIOError, InterruptedError):
+                    break
+                except OSError:  # Windows reports ICMP errors of earlier datagrams here
+                    continue
+                if len(data) == 16:
+                    room_ids.add(UUID(bytes=data))
+        return room_ids
+
+    def close(self) -> None:
+        self.sock.close()
+
+    def __enter__(self) -> "RoomNotificationListener":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
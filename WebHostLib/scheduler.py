@@ -0,0 +1,201 @@
+"""Decides which queued Generations autogen starts next, see WebHostLib.autolauncher.autogen."""
+from __future__ import annotations
+
+import collections
+import enum
+import logging
+import threading
+import time
+import typing
+from uuid import UUID
+
+from Utils import parse_yamls, restricted_loads
+from .models import STATE_ERROR
+
+if typing.TYPE_CHECKING:
+    from .models import Generation
+
+
+class Lane(enum.Enum):
+    small = "small"
+    medium = "medium"
+    large = "large"
+
+
+class GenerationJob(typing.NamedTuple):
+    id: UUID
+    owner: UUID
+    players: int
+    games: typing.Dict[str, float]  # player count per game, split between the games of weighted choices
+    cost: float  # estimated seconds
+    lane: Lane
+    queued_at: float  # time.monotonic when the scheduler first saw it
+
+
+def get_game_shares(game: typing.Any) -> typing.Dict[str, float]:
+    """Splits one player between the games their game option may roll, like Generate.get_choice would pick them."""
+    if isinstance(game, list):
+        game = dict.fromkeys(game, 1)
+    if isinstance(game, dict):
+        total = sum(map(int, game.values()))
+        if total:
+            return {str(name): int(weight) / total for name, weight in game.items() if int(weight)}
+        game = None
+    return {str(game): 1.}
+
+
+def get_player_options(options: typing.Dict[str, typing.Any]) -> typing.List[typing.Dict[str, typing.Any]]:
+    """Returns the options of each player of a Generation. Like in WebHostLib.check.roll_options, an options file
+    may hold several players as yaml documents."""
+    players: typing.List[typing.Dict[str, typing.Any]] = []
+    for settings in options.values():
+        if isinstance(settings, dict):
+            players.append(settings)
+        else:
+            players.extend(document for document in parse_yamls(settings) if document is not None)
+    return players
+
+
+class GenerationScheduler:
+    """
+    Estimates the cost of each queued Generation from its player count and games, using a running average of
+    past generation times per game and player.
+    Cheap jobs always have fast_generators pool processes kept free for them, at most large_generators pool
+    processes run large jobs at once, and owners take turns, so a few big jobs can't hold up everyone else.
+    """
+    default_player_seconds = 5.
+    small_cost = 30.
+    large_cost = 600.
+    history_weight = 0.2  # weight of each new sample in the running averages
+    wait_times_kept = 100
+
+    generators: int
+    fast_generators: int
+    large_generators: int
+    player_seconds: typing.Dict[str, float]
+    queued: typing.Dict[UUID, GenerationJob]
+    running: typing.Dict[UUID, typing.Tuple[GenerationJob, float]]
+    wait_times: typing.Deque[float]
+
+    def __init__(self, generators: int, fast_generators: typing.Optional[int] = None,
+                 large_generators: typing.Optional[int] = None) -> None:
+        self.generators = generators
+        if fast_generators is None:
+            fast_generators = generators // 4
+        if large_generators is None:
+            large_generators = max(1, generators // 2)
+        # leave at least one process to jobs that are not small
+        self.fast_generators = min(fast_generators, generators - 1)
+        self.large_generators = large_generators
+        self.player_seconds = {}
+        self.queued = {}
+        self.running = {}
+        self.wait_times = collections.deque(maxlen=self.wait_times_kept)
+        self.lock = threading.Lock()  # finished is called from the pool's result thread
+
+    def estimate_cost(self, games: typing.Dict[str, float]) -> float:
+        return sum(self.player_seconds.get(game, self.default_player_seconds) * players
+                   for game, players in games.items())
+
+    def get_lane(self, cost: float) -> Lane:
+        if cost <= self.small_cost:
+            return Lane.small
+        if cost >= self.large_cost:
+            return Lane.large
+        return Lane.medium
+
+    def add(self, generation: Generation) -> GenerationJob:
+        """Returns the job of a generation, estimating its cost if the scheduler did not see it yet."""
+        job = self.queued.get(generation.id, None)
+        if job is None:
+            players = get_player_options(restricted_loads(generation.options))
+            games: typing.Dict[str, float] = collections.defaultdict(float)
+            for settings in players:
+                for game, share in get_game_shares(settings.get("game", None)).items():
+                    games[game] += share
+            cost = self.estimate_cost(games)
+            job = self.queued[generation.id] = GenerationJob(generation.id, generation.owner, len(players),
+                                                             dict(games), cost, self.get_lane(cost), time.monotonic())
+        return job
+
+    def _try_add(self, generation: Generation) -> typing.Optional[GenerationJob]:
+        """Like add, but marks generations whose options can't be read as failed instead of raising."""
+        try:
+            return self.add(generation)
+        except Exception as e:
+            logging.exception(e)
+            generation.state = STATE_ERROR
+            return None
+
+    def _fits(self, job: GenerationJob, running: typing.Counter[Lane]) -> bool:
+        if sum(running.values()) >= self.generators:
+            return False
+        if job.lane == Lane.small:
+            return True
+        if running[Lane.medium] + running[Lane.large] >= self.generators - self.fast_generators:
+            return False
+        return job.lane != Lane.large or running[Lane.large] < self.large_generators
+
+    def schedule(self, generations: typing.Iterable[Generation]) -> typing.List[Generation]:
+        """Takes all currently queued generations and returns the ones to start now, which are then counted as
+        running until finished gets called for them."""
+        queued = {generation.id: generation for generation in generations}
+        with self.lock:
+            for generation_id in self.queued.keys() - queued.keys():
+                del self.queued[generation_id]  # deleted or started elsewhere
+            jobs = [job for job in map(self._try_add, queued.values()) if job]
+            running = collections.Counter(job.lane for job, _ in self.running.values())
+            owner_load = collections.Counter(job.owner for job, _ in self.running.values())
+
+            to_start: typing.List[Generation] = []
+            now = time.monotonic()
+            while jobs:
+                # owner with the fewest running jobs first, then oldest job first
+                jobs.sort(key=lambda job: (owner_load[job.owner], job.queued_at))
+                job = next((job for job in jobs if self._fits(job, running)), None)
+                if job is None:
+                    break
+                jobs.remove(job)
+                del self.queued[job.id]
+                self.running[job.id] = job, now
+                self.wait_times.append(now - job.queued_at)
+                running[job.lane] += 1
+                owner_load[job.owner] += 1
+                to_start.append(queued[job.id])
+            return to_start
+
+    def start(self, generation: Generation) -> None:
+        """Counts a generation as running that was started without going through schedule, like when resuming."""
+        with self.lock:
+            job = self._try_add(generation)
+            if job:
+                del self.queued[job.id]
+                self.running[job.id] = job, time.monotonic()
+
+    def finished(self, generation_id: UUID, success: bool) -> None:
+        """Frees the pool process of a generation and learns from its duration, if it succeeded."""
+        with self.lock:
+            job, started_at = self.running.pop(generation_id, (None, 0.))
+            if job is None or not success or not job.players:
+                return
+            sample = (time.monotonic() - started_at) / job.players
+            for game in job.games:
+                average = self.player_seconds.get(game, None)
+                self.player_seconds[game] = sample if average is None \
+                    else average + (sample - average) * self.history_weight
+
+    def metrics(self) -> typing.Dict[str, typing.Any]:
+        """Queue depth and running jobs per lane, as well as wait times in seconds."""
+        with self.lock:
+            now = time.monotonic()
+            return {
+                "queued": {lane.value: sum(job.lane == lane for job in self.queued.values()) for lane in Lane},
+                "running": {lane.value: sum(job.lane == lane for job, _ in self.running.values()) for lane in Lane},
+                "longest_wait": max((now - job.queued_at for job in self.queued.values()), default=0.),
+                "average_wait": sum(self.wait_times) / len(self.wait_times) if self.wait_times else 0.,
+            }
+
+    def log_metrics(self) -> None:
+        metrics = self.metrics()
+        logging.info(f"Generation queue: {metrics['queued']}, running: {metrics['running']}, "
+                     f"longest wait {metrics['longest_wait']:.0f}s, average wait {metrics['average_wait']:.0f}s")
@@ -1,5 +1,7 @@
 import datetime
 import collections
+import functools
+import threading
 from dataclasses import dataclass
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple, NamedTuple, Counter
 from uuid import UUID
@@ -12,12 +14,17 @@ from MultiServer import Context, get_saving_second
 from NetUtils import ClientStatus, Hint, NetworkItem, NetworkSlot, SlotType
 from Utils import restricted_loads, KeyedDefaultDict
 from . import app, cache
-from .models import GameDataPackage, Room
+from .models import GameDataPackage, Room, Seed
 
 # Multisave is currently updated, at most, every minute.
 TRACKER_CACHE_TIMEOUT_IN_SECONDS = 60
+# Number of seeds, data packages and room saves kept decoded for tracker requests of this process.
+TRACKER_SEED_CACHE_SIZE = 32
+TRACKER_GAME_CACHE_SIZE = 256
+TRACKER_MULTISAVE_CACHE_SIZE = 64
 
-_multidata_cache = {}
+_multisave_cache: "collections.OrderedDict[UUID, Tuple[datetime.datetime, Dict[str, Any]]]" = collections.OrderedDict()
+_multisave_cache_lock = threading.Lock()
 _multiworld_trackers: Dict[str, Callable] = {}
 _player_trackers: Dict[str, Callable] = {}
 
@@ -41,6 +48,64 @@ def _cache_results(func: Callable) -> Callable:
     return method_wrapper
 
 
+class IdToNameTable(Dict[int, str]):
+    """Id to name table of a data package, shared by all tracker requests.
+    Unknown ids get a placeholder name, which is not stored, so the table keeps the size of the data package."""
+    unknown: str
+
+    def __init__(self, unknown: str, names: Dict[int, str]):
+        super().__init__(names)
+        self.unknown = unknown
+
+    def __missing__(self, code: int) -> str:
+        return f"Unknown {self.unknown} (ID: {code})"
+
+
+class GameNameTables(NamedTuple):
+    item_name_to_id: Dict[str, int]
+    location_name_to_id: Dict[str, int]
+    item_id_to_name: Dict[int, str]
+    location_id_to_name: Dict[int, str]
+
+
+@functools.lru_cache(maxsize=TRACKER_SEED_CACHE_SIZE)
+def get_seed_tracker_data(seed_id: UUID) -> Dict[str, Any]:
+    """Returns the decoded multidata of a seed, shared by all tracker requests. Must not be modified."""
+    return Context.decompress(Seed.get(id=seed_id).multidata)
+
+
+@functools.lru_cache(maxsize=TRACKER_GAME_CACHE_SIZE)
+def get_game_name_tables(checksum: str) -> GameNameTables:
+    """Returns the id and name lookup tables of a game's data package, shared by all tracker requests."""
+    game_package = restricted_loads(GameDataPackage.get(checksum=checksum).data)
+    return GameNameTables(
+        game_package["item_name_to_id"],
+        game_package["location_name_to_id"],
+        IdToNameTable("Item", {id: name for name, id in game_package["item_name_to_id"].items()}),
+        IdToNameTable("Location", {id: name for name, id in game_package["location_name_to_id"].items()}),
+    )
+
+
+def get_room_multisave(room: Room) -> Dict[str, Any]:
+    """Returns the decoded multisave of a room, shared by all tracker requests. Must not be modified.
+
+    Rooms update their last_activity whenever they save, including shutdown saves which only advance it by a
+    microsecond, so it marks the save generation, as for If-Modified-Since.
+    """
+    with _multisave_cache_lock:
+        cached = _multisave_cache.get(room.id, None)
+        if cached and cached[0] == room.last_activity:
+            _multisave_cache.move_to_end(room.id)
+            return cached[1]
+    multisave = restricted_loads(room.multisave) if room.multisave else {}
+    with _multisave_cache_lock:
+        _multisave_cache[room.id] = room.last_activity, multisave
+        _multisave_cache.move_to_end(room.id)
+        while len(_multisave_cache) > TRACKER_MULTISAVE_CACHE_SIZE:
+            _multisave_cache.popitem(last=False)
+    return multisave
+
+
 @dataclass
 class TrackerData:
     """A helper dataclass that is instantiated each time an HTTP request comes in for tracker data.
@@ -56,8 +121,8 @@ class TrackerData:
     def __init__(self, room: Room):
         """Initialize a new RoomMultidata object for the current room."""
         self.room = room
-        self._multidata = Context.decompress(room.seed.multidata)
-        self._multisave = restricted_loads(room.multisave) if room.multisave else {}
+        self._multidata = get_seed_tracker_data(room.seed.id)
+        self._multisave = get_room_multisave(room)
         self._tracker_cache = {}
 
         self.item_name_to_id: Dict[str, Dict[str, int]] = {}
@@ -71,15 +136,13 @@ class TrackerData:
             game_name: KeyedDefaultDict(lambda code: f"Unknown Game {game_name} - Location (ID: {code})")
         })
         for game, game_package in self._multidata["datapackage"].items():
-            game_package = restricted_loads(GameDataPackage.get(checksum=game_package["checksum"]).data)
-            self.item_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Item (ID: {code})", {
-                id: name for name, id in game_package["item_name_to_id"].items()})
-            self.location_id_to_name[game] = KeyedDefaultDict(lambda code: f"Unknown Location (ID: {code})", {
-                id: name for name, id in game_package["location_name_to_id"].items()})
+            name_tables = get_game_name_tables(game_package["checksum"])
+            self.item_id_to_name[game] = name_tables.item_id_to_name
+            self.location_id_to_name[game] = name_tables.location_id_to_name
 
             # Normal lookup tables as well.
-            self.item_name_to_id[game] = game_package["item_name_to_id"]
-            self.location_name_to_id[game] = game_package["location_name_to_id"]
+            self.item_name_to_id[game] = name_tables.item_name_to_id
+            self.location_name_to_id[game] = name_tables.location_name_to_id
 
     def get_seed_name(self) -> str:
         """Retrieves the seed name."""
@@ -1,6 +1,5 @@
 #cython: language_level=3
 #distutils: language = c
-#distutils: depends = intset.h
 
 """
 Provides faster implementation of some core parts.
@@ -13,7 +12,7 @@ import warnings
 from cpython cimport PyObject
 from typing import Any, Dict, Iterable, Iterator, Generator, Sequence, Tuple, TypeVar, Union, Set, List, TYPE_CHECKING
 from cymem.cymem cimport Pool
-from libc.stdint cimport int64_t, uint32_t
+from libc.stdint cimport int64_t, uint32_t, INT64_MAX, INT64_MIN
 from collections import defaultdict
 
 cdef extern from *:
@@ -31,28 +30,6 @@ ctypedef int64_t ap_id_t
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
 cdef size_t INVALID_SIZE = <size_t>(-1)  # this is all 0xff... adding 1 results in 0, but it's not negative
 
-# configure INTSET for player
-cdef extern from *:
-    """
-    #define INTSET_NAME ap_player_set
-    #define INTSET_TYPE uint32_t  // has to match ap_player_t
-    """
-
-# create INTSET for player
-cdef extern from "intset.h":
-    """
-    #undef INTSET_NAME
-    #undef INTSET_TYPE
-    """
-    ctypedef struct ap_player_set:
-        pass
-
-    ap_player_set* ap_player_set_new(size_t bucket_count) nogil
-    void ap_player_set_free(ap_player_set* set) nogil
-    bint ap_player_set_add(ap_player_set* set, ap_player_t val) nogil
-    bint ap_player_set_contains(ap_player_set* set, ap_player_t val) nogil
-
-
 cdef struct LocationEntry:
     # layout is so that
     # 64bit player: location+sender and item+receiver 128bit comparisons, if supported
@@ -96,6 +73,10 @@ cdef class LocationStore:
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
     cdef PyObject** _raw_proxies  # 8K/1000 players, faster access to _proxies, but does not keep a ref
+    cdef size_t* receiver_order  # 0.8MB/100k items, entry indices sorted by receiver and item
+    cdef IndexEntry* receiver_index  # 16KB/1000 players, range of receiver_order for each receiver
+    cdef size_t receiver_index_size
+    cdef uint32_t* sphere_numbers  # 0.4MB/100k items, sphere + 1 for each entry, 0 if not in any, after set_spheres
 
     def get_size(self):
         from sys import getsizeof
@@ -106,6 +87,9 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        size += sizeof(self.receiver_order[0]) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
+        if self.sphere_numbers:
+            size += sizeof(self.sphere_numbers[0]) * self.entry_count
         return size
 
     def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
@@ -117,6 +101,7 @@ cdef class LocationStore:
 
         # iterate over everything to get all maxima and validate everything
         cdef size_t max_sender = INVALID_SIZE  # keep track of highest used player id for indexing
+        cdef size_t max_receiver = 0
         cdef size_t sender_count = 0
         cdef size_t count = 0
         for sender, locations in locations_dict.items():
@@ -131,6 +116,7 @@ cdef class LocationStore:
                 receiver = data[1]
                 if receiver < 1 or receiver > MAX_PLAYER_ID:
                     raise ValueError(f"Invalid player id {receiver} for item")
+                max_receiver = max(max_receiver, receiver)
                 count += 1
             sender_count += 1
 
@@ -148,12 +134,15 @@ cdef class LocationStore:
         if count:
             # leaving entries as NULL if there are none, makes potential memory errors more visible
             self.entries = <LocationEntry*>self._mem.alloc(count, sizeof(LocationEntry))
+            self.receiver_order = <size_t*>self._mem.alloc(count, sizeof(size_t))
         self.sender_index = <IndexEntry*>self._mem.alloc(max_sender + 1, sizeof(IndexEntry))
         self._raw_proxies = <PyObject**>self._mem.alloc(max_sender + 1, sizeof(PyObject*))
+        self.receiver_index = <IndexEntry*>self._mem.alloc(max_receiver + 1, sizeof(IndexEntry))
 
         assert (not self.entries) == (not count)
         assert self.sender_index
         assert self._raw_proxies
+        assert self.receiver_index
 
         # build entries and index
         cdef size_t i = 0
@@ -172,6 +161,20 @@ cdef class LocationStore:
                 self.sender_index[sender].count += 1
                 i += 1
 
+        # build receiver index, keeping the sender and location order for the same receiver and item
+        cdef size_t entry_index
+        cdef size_t receiver_start = 0
+        cdef LocationEntry* entry
+        for _, _, entry_index in sorted([(self.entries[i].receiver, self.entries[i].item, i) for i in range(count)]):
+            self.receiver_order[receiver_start] = entry_index
+            receiver_start += 1
+        for i in range(count):
+            entry = self.entries + self.receiver_order[i]
+            if not self.receiver_index[entry.receiver].count:
+                self.receiver_index[entry.receiver].start = i
+            self.receiver_index[entry.receiver].count += 1
+        self.receiver_index_size = max_receiver + 1
+
         # build pyobject caches
         self._proxies.append(None)  # player 0
         assert self.sender_index[0].count == 0
@@ -217,47 +220,89 @@ cdef class LocationStore:
     # specialized accessors
     def find_item(self, slots: Set[int], seeked_item_id: int) -> Generator[Tuple[int, int, int, int, int], None, None]:
         cdef ap_id_t item = seeked_item_id
-        cdef ap_player_t receiver
-        cdef ap_player_set* receivers
-        cdef size_t slot_count = len(slots)
-        if slot_count == 1:
-            # specialized implementation for single slot
-            receiver = list(slots)[0]
-            with nogil:
-                for entry in self.entries[:self.entry_count]:
-                    if entry.item == item and entry.receiver == receiver:
-                        with gil:
-                            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-        elif slot_count:
-            # generic implementation with lookup in set
-            receivers = ap_player_set_new(min(1023, slot_count))  # limit top level struct to 16KB
-            if not receivers:
-                raise MemoryError()
-            try:
-                for receiver in slots:
-                    if not ap_player_set_add(receivers, receiver):
-                        raise MemoryError()
-                with nogil:
-                    for entry in self.entries[:self.entry_count]:
-                        if entry.item == item and ap_player_set_contains(receivers, entry.receiver):
-                            with gil:
-                                yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
-            finally:
-                ap_player_set_free(receivers)
+        cdef size_t l, r, m, e
+        cdef LocationEntry* entry
+        cdef list found = []
+        for slot in slots:
+            if slot < 1 or slot >= self.receiver_index_size:
+                continue
+            # binary search for the first entry of item in the range of receiver
+            l = self.receiver_index[<size_t>slot].start
+            e = l + self.receiver_index[<size_t>slot].count
+            r = e
+            while l < r:
+                m = (l + r) // 2
+                if self.entries[self.receiver_order[m]].item < item:
+                    l = m + 1
+                else:
+                    r = m
+            while l < e and self.entries[self.receiver_order[l]].item == item:
+                found.append(self.receiver_order[l])
+                l += 1
+        # back to entry order, by sender and location, no matter the order of slots
+        found.sort()
+        for entry_index in found:
+            entry = self.entries + <size_t>entry_index
+            yield entry.sender, entry.location, entry.item, entry.receiver, entry.flags
 
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
-        cdef ap_player_t receiver = slot
         all_locations: Dict[int, Set[int]] = {}
-        with nogil:
-            for entry in self.entries[:self.entry_count]:
-                if entry.receiver == receiver:
-                    with gil:
-                        sender: int = entry.sender
-                        if sender not in all_locations:
-                            all_locations[sender] = set()
-                        all_locations[sender].add(entry.location)
+        if slot < 1 or slot >= self.receiver_index_size:
+            return all_locations
+        cdef LocationEntry* entry
+        cdef size_t i
+        cdef size_t start = self.receiver_index[<size_t>slot].start
+        cdef size_t count = self.receiver_index[<size_t>slot].count
+        for i in range(start, start + count):
+            entry = self.entries + self.receiver_order[i]
+            sender: int = entry.sender
+            if sender not in all_locations:
+                all_locations[sender] = set()
+            all_locations[sender].add(entry.location)
         return all_locations
 
+    def set_spheres(self, spheres: Sequence[Dict[int, Set[int]]]) -> None:
+        """Stores the sphere of each location, for get_sphere and get_spheres."""
+        cdef LocationEntry* entry
+        cdef size_t i
+        if not self.entry_count:
+            return
+        if not self.sphere_numbers:
+            self.sphere_numbers = <uint32_t*>self._mem.alloc(self.entry_count, sizeof(uint32_t))
+        else:
+            for i in range(self.entry_count):
+                self.sphere_numbers[i] = 0
+        for sphere_number, sphere in enumerate(spheres):
+            for player, locations in sphere.items():
+                if player < 1 or player >= self.sender_index_size:
+                    continue
+                for location in locations:
+                    entry = (<PlayerLocationProxy>self._raw_proxies[<size_t>player])._get(location)
+                    if entry:
+                        self.sphere_numbers[entry - self.entries] = sphere_number + 1
+
+    def get_sphere(self, slot: int, location: int) -> int:
+        cdef LocationEntry* entry = NULL
+        # bounds are checked on the python ints, converting them would raise OverflowError instead of KeyError
+        if self.sphere_numbers != NULL and 0 < slot < self.sender_index_size and INT64_MIN <= location <= INT64_MAX:
+            entry = (<PlayerLocationProxy>self._raw_proxies[<size_t>slot])._get(location)
+        if not entry or not self.sphere_numbers[entry - self.entries]:
+            raise KeyError(f"No sphere for location {location} of player {slot}")
+        return self.sphere_numbers[entry - self.entries] - 1
+
+    def get_spheres(self, slot: int) -> Dict[int, int]:
+        """Returns the sphere of each location of slot that is in one. Raises KeyError for unknown slots."""
+        if not 0 < slot < self.sender_index_size:
+            raise KeyError(slot)
+        cdef size_t sender = slot
+        cdef size_t i
+        cdef size_t start = self.sender_index[sender].start
+        cdef size_t count = self.sender_index[sender].count
+        if not self.sphere_numbers:
+            return {}
+        return {self.entries[i].location: self.sphere_numbers[i] - 1
+                for i in range(start, start + count) if self.sphere_numbers[i]}
+
     def get_checked(self, state: State, team: int, slot: int) -> List[int]:
         cdef ap_player_t sender = slot
         if sender < 0 or sender >= self.sender_index_size:
@@ -2,10 +2,10 @@ import itertools
 import logging
 import random
 import time
-from collections import deque
+from collections import Counter, deque
 from collections.abc import Callable, Iterable
 
-from BaseClasses import CollectionState, Entrance, Region, EntranceType
+from BaseClasses import CollectionState, Entrance, Location, Region, EntranceType
 from Options import Accessibility
 from worlds.AutoWorld import World
 
@@ -49,63 +49,76 @@ class EntranceLookup:
     others: GroupLookup
     _random: random.Random
     _expands_graph_cache: dict[Entrance, bool]
+    _region_search_cache: dict[Region, tuple[bool, set[str]]]
     _coupled: bool
     _usable_exits: set[Entrance]
+    counters: Counter[str]
+    """Profiling counters, see ERPlacementState.counters"""
 
-    def __init__(self, rng: random.Random, coupled: bool, usable_exits: set[Entrance]):
+    def __init__(self, rng: random.Random, coupled: bool, usable_exits: set[Entrance],
+                 counters: Counter[str] | None = None):
         self.dead_ends = EntranceLookup.GroupLookup()
         self.others = EntranceLookup.GroupLookup()
         self._random = rng
         self._expands_graph_cache = {}
+        self._region_search_cache = {}
         self._coupled = coupled
         self._usable_exits = usable_exits
+        self.counters = Counter() if counters is None else counters
 
-    def _can_expand_graph(self, entrance: Entrance) -> bool:
+    def _search_region(self, start: Region) -> tuple[bool, set[str]]:
         """
-        Checks whether an entrance is able to expand the region graph, either by
-        providing access to randomizable exits or by granting access to items or
-        regions used in logic conditions.
-
-        :param entrance: A randomizable (no parent) region entrance
+        Searches the region graph from a region, returning whether any region found is progression or has
+        progression locations, and the names of the randomizable exits found otherwise.
         """
-        # we've seen this, return cached result
-        if entrance in self._expands_graph_cache:
-            return self._expands_graph_cache[entrance]
+        if start in self._region_search_cache:
+            return self._region_search_cache[start]
 
-        visited = set()
+        self.counters["graph_searches"] += 1
+        exit_names: set[str] = set()
+        visited = {start}
         q: deque[Region] = deque()
-        q.append(entrance.connected_region)
+        q.append(start)
 
         while q:
             region = q.popleft()
-            visited.add(region)
-
-            # check if the region itself is progression
-            if region in region.multiworld.indirect_connections:
-                self._expands_graph_cache[entrance] = True
-                return True
 
-            # check if any placed locations are progression
-            for loc in region.locations:
-                if loc.advancement:
-                    self._expands_graph_cache[entrance] = True
-                    return True
+            # check if the region itself is progression, or if any placed locations are progression
+            if region in region.multiworld.indirect_connections or any(loc.advancement for loc in region.locations):
+                self._region_search_cache[start] = True, exit_names
+                return True, exit_names
 
-            # check if there is a randomized exit out (expands the graph directly) or else search any connected
-            # regions to see if they are/have progression
             for exit_ in region.exits:
-                # randomizable exits which are not reverse of the incoming entrance.
-                # uncoupled mode is an exception because in this case going back in the door you just came in could
-                # actually lead somewhere new
-                if (not exit_.connected_region and (not self._coupled or exit_.name != entrance.name)
-                        and exit_ in self._usable_exits):
-                    self._expands_graph_cache[entrance] = True
-                    return True
-                elif exit_.connected_region and exit_.connected_region not in visited:
+                if not exit_.connected_region:
+                    if exit_ in self._usable_exits:
+                        exit_names.add(exit_.name)
+                elif exit_.connected_region not in visited:
+                    visited.add(exit_.connected_region)
                     q.append(exit_.connected_region)
 
-        self._expands_graph_cache[entrance] = False
-        return False
+        self._region_search_cache[start] = False, exit_names
+        return False, exit_names
+
+    def _can_expand_graph(self, entrance: Entrance) -> bool:
+        """
+        Checks whether an entrance is able to expand the region graph, either by
+        providing access to randomizable exits or by granting access to items or
+        regions used in logic conditions.
+
+        :param entrance: A randomizable (no parent) region entrance
+        """
+        # we've seen this, return cached result
+        if entrance in self._expands_graph_cache:
+            return self._expands_graph_cache[entrance]
+
+        # the search only depends on the region, so it is shared between all entrances to it
+        progression, exit_names = self._search_region(entrance.connected_region)
+        # randomizable exits which are not reverse of the incoming entrance expand the graph directly.
+        # uncoupled mode is an exception because in this case going back in the door you just came in could
+        # actually lead somewhere new
+        expands = progression or bool(exit_names - {entrance.name} if self._coupled else exit_names)
+        self._expands_graph_cache[entrance] = expands
+        return expands
 
     def add(self, entrance: Entrance) -> None:
         lookup = self.others if self._can_expand_graph(entrance) else self.dead_ends
@@ -148,6 +161,18 @@ class ERPlacementState:
     """The CollectionState backing the entrance randomization logic"""
     coupled: bool
     """Whether entrance randomization is operating in coupled mode"""
+    counters: Counter[str]
+    """
+    Profiling counters of the randomization: placements, target_checks (targets tested against an exit),
+    source_checks (exits tested with is_valid_source_transition), speculative_sweeps, full_updates and
+    incremental_updates (of the reachable regions) and graph_searches (by EntranceLookup for dead ends)
+    """
+    full_update_needed: bool
+    """Whether the next reachability update has to check everything again, like after on_connect changed the state"""
+    _reachable_exits: set[Entrance]
+    """Exits which passed the default is_valid_source_transition. The state only grows, so they stay reachable."""
+    _advancement_locations: set[Location]
+    """Filled progression locations which may still have to be collected by a sweep"""
 
     def __init__(self, world: World, coupled: bool):
         self.placements = []
@@ -155,18 +180,33 @@ class ERPlacementState:
         self.world = world
         self.coupled = coupled
         self.collection_state = world.multiworld.get_all_state(False, True)
+        self.counters = Counter()
+        self.full_update_needed = True
+        self._reachable_exits = set()
+        self._advancement_locations = set()
 
     @property
     def placed_regions(self) -> set[Region]:
         return self.collection_state.reachable_regions[self.world.player]
 
+    def _is_valid_source_transition(self, exit_: Entrance) -> bool:
+        self.counters["source_checks"] += 1
+        if type(exit_).is_valid_source_transition is not Entrance.is_valid_source_transition:
+            # may depend on the placement state
+            return exit_.is_valid_source_transition(self)
+        if exit_.is_valid_source_transition(self):
+            self._reachable_exits.add(exit_)
+            return True
+        return False
+
     def find_placeable_exits(self, check_validity: bool, usable_exits: list[Entrance]) -> list[Entrance]:
         if check_validity:
             blocked_connections = self.collection_state.blocked_connections[self.world.player]
+            reachable_exits = self._reachable_exits
             placeable_randomized_exits = [ex for ex in usable_exits
                                           if not ex.connected_region
                                           and ex in blocked_connections
-                                          and ex.is_valid_source_transition(self)]
+                                          and (ex in reachable_exits or self._is_valid_source_transition(ex))]
         else:
             # this is on a beaten minimal attempt, so any exit anywhere is fair game
             placeable_randomized_exits = [ex for ex in usable_exits if not ex.connected_region]
@@ -183,16 +223,48 @@ class ERPlacementState:
         self.placements.append(source_exit)
         self.pairings.append((source_exit.name, target_entrance.name))
 
+    def _sweep(self, state: CollectionState, connections: Iterable[Entrance] | None) -> None:
+        """
+        Updates the reachable regions of state and collects the advancements that became reachable.
+        If connections are given, the region search only continues from them, as nothing else changed since the
+        last sweep. Collecting an item marks the state stale, which makes the next region check search everything.
+        """
+        player = self.world.player
+        if connections is None or self.full_update_needed:
+            connections = None
+            self.counters["full_updates"] += 1
+            self._advancement_locations = {location for location in self.world.multiworld.get_filled_locations()
+                                           if location.advancement}
+        else:
+            self.counters["incremental_updates"] += 1
+        state.update_reachable_regions(player, connections)
+        state.sweep_for_advancements(self._advancement_locations)
+
+    def update_reachability(self, connections: Iterable[Entrance] | None = None) -> None:
+        """
+        Updates the collection state after connecting entrances.
+
+        :param connections: The exits which were connected since the last update. If not given, or if
+                            full_update_needed is set, every blocked connection and filled location is checked again.
+        """
+        self._sweep(self.collection_state, connections)
+        self._advancement_locations -= self.collection_state.advancements
+        self.full_update_needed = False
+
     def test_speculative_connection(self, source_exit: Entrance, target_entrance: Entrance,
                                     usable_exits: set[Entrance]) -> bool:
+        self.counters["speculative_sweeps"] += 1
         copied_state = self.collection_state.copy()
         # simulated connection. A real connection is unsafe because the region graph is shallow-copied and would
         # propagate back to the real multiworld.
-        copied_state.reachable_regions[self.world.player].add(target_entrance.connected_region)
+        target_region = target_entrance.connected_region
+        copied_state.reachable_regions[self.world.player].add(target_region)
+        copied_state.connection_dependencies.unsettle(target_region)
         copied_state.blocked_connections[self.world.player].remove(source_exit)
-        copied_state.blocked_connections[self.world.player].update(target_entrance.connected_region.exits)
-        copied_state.update_reachable_regions(self.world.player)
-        copied_state.sweep_for_advancements()
+        copied_state.blocked_connections[self.world.player].update(target_region.exits)
+        # only the new region can lead anywhere new, the rest of the state is the same as the last update
+        self._sweep(copied_state, itertools.chain(target_region.exits,
+                                                  self.world.multiworld.indirect_connections.get(target_region, ())))
         # test that at there are newly reachable randomized exits that are ACTUALLY reachable
         available_randomized_exits = copied_state.blocked_connections[self.world.player]
         for _exit in available_randomized_exits:
@@ -351,7 +423,7 @@ def randomize_entrances(
 
     # used when membership checks are needed on the exit list, e.g. speculative sweep
     exits_set = set(exits)
-    entrance_lookup = EntranceLookup(world.random, coupled, exits_set)
+    entrance_lookup = EntranceLookup(world.random, coupled, exits_set, er_state.counters)
     for entrance in er_targets:
         entrance_lookup.add(entrance)
 
@@ -359,15 +431,17 @@ def randomize_entrances(
     er_state.collection_state.update_reachable_regions(world.player)
 
     def do_placement(source_exit: Entrance, target_entrance: Entrance) -> None:
+        er_state.counters["placements"] += 1
         placed_exits, removed_entrances = er_state.connect(source_exit, target_entrance)
         # remove the placed targets from consideration
         for entrance in removed_entrances:
             entrance_lookup.remove(entrance)
         # propagate new connections
-        er_state.collection_state.update_reachable_regions(world.player)
-        er_state.collection_state.sweep_for_advancements()
+        er_state.update_reachability(placed_exits)
         if on_connect:
             on_connect(er_state, placed_exits)
+            # the callback may change the state in any way
+            er_state.full_update_needed = True
 
     def needs_speculative_sweep(dead_end: bool, require_new_exits: bool, placeable_exits: list[Entrance]) -> bool:
         # speculative sweep is expensive. We currently only do it as a last resort, if we might cap off the graph
@@ -400,6 +474,7 @@ def randomize_entrances(
     def find_pairing(dead_end: bool, require_new_exits: bool) -> bool:
         nonlocal perform_validity_check
         placeable_exits = er_state.find_placeable_exits(perform_validity_check, exits)
+        placed_regions = er_state.placed_regions
         for source_exit in placeable_exits:
             target_groups = target_group_lookup[source_exit.randomization_group]
             for target_entrance in entrance_lookup.get_targets(target_groups, dead_end, preserve_group_order):
@@ -410,7 +485,8 @@ def randomize_entrances(
                 # very last exit and check whatever exits we open up are functionally accessible.
                 # this requirement can be ignored on a beaten minimal, islands are no issue there.
                 exit_requirement_satisfied = (not perform_validity_check or not require_new_exits
-                                              or target_entrance.connected_region not in er_state.placed_regions)
+                                              or target_entrance.connected_region not in placed_regions)
+                er_state.counters["target_checks"] += 1
                 if exit_requirement_satisfied and source_exit.can_connect_to(target_entrance, dead_end, er_state):
                     if (needs_speculative_sweep(dead_end, require_new_exits, placeable_exits)
                             and not er_state.test_speculative_connection(source_exit, target_entrance, exits_set)):
@@ -487,5 +563,6 @@ def randomize_entrances(
     if running_time > 1.0:
         logging.info(f"Took {running_time:.4f} seconds during entrance randomization for player {world.player},"
                      f"named {world.multiworld.player_name[world.player]}")
+    logging.debug(f"Entrance randomization counters for player {world.player}: {dict(er_state.counters)}")
 
     return er_state
@@ -0,0 +1,383 @@
+"""
+Access rules built from requirements instead of opaque callables, which can be analysed for what they depend on and
+get compiled into flat requirement tables and a generated function for access_rule.
+
+    from rule_builder import CanReachRegion, Has, has_any, set_rule
+
+    set_rule(world, location, Has("Hookshot") & (has_any("Bow", "Boomerang") | CanReachRegion("Lost Woods")))
+
+Compiled rules are plain callables, so they work everywhere lambdas do, and identical rules of a player share one
+compiled rule.
+"""
+from __future__ import annotations
+
+import dataclasses
+import itertools
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from BaseClasses import CollectionState, Entrance, Location
+    from worlds.AutoWorld import World
+
+__all__ = ["Rule", "Has", "HasFromList", "HasGroup", "CanReachRegion", "And", "Or", "TRUE", "FALSE", "has_all",
+           "has_any", "Term", "CompiledRule", "compile_rule", "get_compiled_rule", "set_rule", "add_rule",
+           "evaluate_rules"]
+
+max_terms = 64
+"""Rules needing more alternatives than this in their requirement table are evaluated as a tree instead"""
+max_results = 1024
+"""Results each compiled rule remembers, the oldest are forgotten first"""
+
+
+class Rule:
+    """Base of all rule nodes. Rules are immutable and hashable."""
+
+    def __and__(self, other: Rule) -> Rule:
+        return And(self, other)
+
+    def __or__(self, other: Rule) -> Rule:
+        return Or(self, other)
+
+    def expand(self, world: World) -> Rule:
+        """Returns this rule with everything depending on the world, like item groups, resolved."""
+        return self
+
+    def to_terms(self) -> FrozenSet[Term]:
+        """The alternatives of this rule, each a set of requirements that all have to be met."""
+        raise NotImplementedError
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        """Builds the rule like a hand-written lambda, without compiling it."""
+        raise NotImplementedError
+
+
+class Term(NamedTuple):
+    """One alternative of a requirement table. All of its requirements have to be met."""
+    items: FrozenSet[Tuple[str, int]] = frozenset()
+    """(item name, count) the state needs at least count of"""
+    sums: FrozenSet[Tuple[Tuple[str, ...], int]] = frozenset()
+    """(item names, count) the state needs at least count of in total"""
+    regions: FrozenSet[str] = frozenset()
+    """names of regions that need to be reachable"""
+
+    def merge(self, other: Term) -> Term:
+        counts = dict(self.items)
+        for item, count in other.items:
+            counts[item] = max(counts.get(item, 0), count)
+        return Term(frozenset(counts.items()), self.sums | other.sums, self.regions | other.regions)
+
+    def implies(self, other: Term) -> bool:
+        """Whether meeting this term means other is met as well."""
+        if not (other.sums <= self.sums and other.regions <= self.regions):
+            return False
+        counts = dict(self.items)
+        return all(counts.get(item, 0) >= count for item, count in other.items)
+
+    def __len__(self) -> int:
+        return len(self.items) + len(self.sums) + len(self.regions)
+
+
+@dataclasses.dataclass(frozen=True)
+class Has(Rule):
+    item: str
+    count: int = 1
+
+    def to_terms(self) -> FrozenSet[Term]:
+        if self.count <= 0:
+            return frozenset((Term(),))
+        return frozenset((Term(items=frozenset(((self.item, self.count),))),))
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        item, count = self.item, self.count
+        return lambda state: state.has(item, player, count)
+
+
+@dataclasses.dataclass(frozen=True)
+class HasFromList(Rule):
+    """At least count items in total of any of items, like CollectionState.has_from_list."""
+    items: Tuple[str, ...]
+    count: int = 1
+
+    def __init__(self, items: Iterable[str], count: int = 1) -> None:
+        object.__setattr__(self, "items", tuple(sorted(set(items))))
+        object.__setattr__(self, "count", count)
+
+    def to_terms(self) -> FrozenSet[Term]:
+        if self.count <= 0:
+            return frozenset((Term(),))
+        if len(self.items) == 1:
+            return Has(self.items[0], self.count).to_terms()
+        if self.count == 1:
+            return frozenset(itertools.chain.from_iterable(Has(item).to_terms() for item in self.items))
+        return frozenset((Term(sums=frozenset(((self.items, self.count),))),))
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        items, count = self.items, self.count
+        return lambda state: state.has_from_list(items, player, count)
+
+
+@dataclasses.dataclass(frozen=True)
+class HasGroup(Rule):
+    """At least count items in total of an item_name_group of the world, like CollectionState.has_group."""
+    group: str
+    count: int = 1
+
+    def expand(self, world: World) -> Rule:
+        return HasFromList(world.item_name_groups[self.group], self.count)
+
+    def to_terms(self) -> FrozenSet[Term]:
+        raise TypeError(f"HasGroup({self.group!r}) has no requirement table, expand it with a world first")
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        group, count = self.group, self.count
+        return lambda state: state.has_group(group, player, count)
+
+
+@dataclasses.dataclass(frozen=True)
+class CanReachRegion(Rule):
+    """The region has to be reachable. Remember to register an indirect condition for entrances using this."""
+    region: str
+
+    def to_terms(self) -> FrozenSet[Term]:
+        return frozenset((Term(regions=frozenset((self.region,))),))
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        region = self.region
+        return lambda state: state.can_reach_region(region, player)
+
+
+@dataclasses.dataclass(frozen=True)
+class And(Rule):
+    """All of rules have to be met. Without any rules it is always met."""
+    rules: Tuple[Rule, ...]
+
+    def __init__(self, *rules: Rule) -> None:
+        # flatten nested conjunctions, so equal requirements compare equal
+        flat: List[Rule] = []
+        for rule in rules:
+            flat.extend(rule.rules if isinstance(rule, And) else (rule,))
+        object.__setattr__(self, "rules", tuple(dict.fromkeys(flat)))
+
+    def expand(self, world: World) -> Rule:
+        return And(*(rule.expand(world) for rule in self.rules))
+
+    def to_terms(self) -> FrozenSet[Term]:
+        terms = frozenset((Term(),))
+        for rule in self.rules:
+            terms = _simplify(left.merge(right) for left in terms for right in rule.to_terms())
+        return terms
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        if self.rules and all(isinstance(rule, Has) and rule.count == 1 for rule in self.rules):
+            items = tuple(rule.item for rule in self.rules)
+            return lambda state: state.has_all(items, player)
+        rules = [rule.to_callable(player) for rule in self.rules]
+        if len(rules) == 2:
+            first, second = rules
+            return lambda state: first(state) and second(state)
+        return lambda state: all(rule(state) for rule in rules)
+
+
+@dataclasses.dataclass(frozen=True)
+class Or(Rule):
+    """Any of rules has to be met. Without any rules it is never met."""
+    rules: Tuple[Rule, ...]
+
+    def __init__(self, *rules: Rule) -> None:
+        flat: List[Rule] = []
+        for rule in rules:
+            flat.extend(rule.rules if isinstance(rule, Or) else (rule,))
+        object.__setattr__(self, "rules", tuple(dict.fromkeys(flat)))
+
+    def expand(self, world: World) -> Rule:
+        return Or(*(rule.expand(world) for rule in self.rules))
+
+    def to_terms(self) -> FrozenSet[Term]:
+        return _simplify(itertools.chain.from_iterable(rule.to_terms() for rule in self.rules))
+
+    def to_callable(self, player: int) -> Callable[[CollectionState], bool]:
+        if self.rules and all(isinstance(rule, Has) and rule.count == 1 for rule in self.rules):
+            items = tuple(rule.item for rule in self.rules)
+            return lambda state: state.has_any(items, player)
+        rules = [rule.to_callable(player) for rule in self.rules]
+        if len(rules) == 2:
+            first, second = rules
+            return lambda state: first(state) or second(state)
+        return lambda state: any(rule(state) for rule in rules)
+
+
+TRUE = And()
+FALSE = Or()
+
+
+def has_all(*items: str) -> Rule:
+    return And(*(Has(item) for item in items))
+
+
+def has_any(*items: str) -> Rule:
+    return Or(*(Has(item) for item in items))
+
+
+class _TooComplex(Exception):
+    pass
+
+
+def _simplify(terms: Iterable[Term]) -> FrozenSet[Term]:
+    """Drops terms that are met whenever a simpler one is."""
+    kept: List[Term] = []
+    # a term can only imply terms with as many requirements and counts or less, which come first
+    for term in sorted(set(terms), key=lambda term: (len(term), sum(count for _, count in term.items))):
+        if not any(term.implies(other) for other in kept):
+            kept.append(term)
+            if len(kept) > max_terms:
+                raise _TooComplex
+    return frozenset(kept)
+
+
+@dataclasses.dataclass(eq=False)
+class CompiledRule:
+    """What a compiled access_rule requires, get it from the access_rule with get_compiled_rule."""
+    rule: Rule
+    """the rule, with everything depending on the world resolved"""
+    player: int
+    terms: Optional[Tuple[Term, ...]]
+    """the flat requirement table, cheapest alternatives first, or None if the rule is evaluated as a tree"""
+    thresholds: Dict[str, Tuple[int, ...]]
+    """item names the rule depends on, and the counts at which collecting them can change its result"""
+    regions: FrozenSet[str]
+    """names of regions the rule depends on"""
+    evaluate: Callable[[CollectionState], bool]
+    """the compiled access_rule"""
+    results: Dict[Tuple[Any, ...], bool] = dataclasses.field(default_factory=dict)
+    """results by the capped item counts and region reachability they were evaluated with, see evaluate_rules.
+    At most max_results are kept."""
+
+    @property
+    def items(self) -> FrozenSet[str]:
+        return frozenset(self.thresholds)
+
+    def get_key(self, counts: Dict[str, int], regions: Dict[str, bool]) -> Tuple[Any, ...]:
+        """The counts of this rule's items, capped at the highest count they are compared against, and the
+        reachability of its regions. Evaluating the rule with the same key gives the same result."""
+        return (tuple(min(counts.get(item, 0), thresholds[-1]) for item, thresholds in self.thresholds.items())
+                + tuple(regions[region] for region in self.regions))
+
+
+def _analyse(rule: Rule) -> Tuple[Dict[str, Tuple[int, ...]], FrozenSet[str]]:
+    thresholds: Dict[str, set] = {}
+    regions = set()
+    pending = [rule]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Has):
+            thresholds.setdefault(node.item, set()).add(node.count)
+        elif isinstance(node, HasFromList):
+            # together with the others, each count of any of them up to the sum's can complete it
+            for item in node.items:
+                thresholds.setdefault(item, set()).update(range(1, node.count + 1))
+        elif isinstance(node, CanReachRegion):
+            regions.add(node.region)
+        elif isinstance(node, (And, Or)):
+            pending.extend(node.rules)
+    return {item: tuple(sorted(counts)) for item, counts in sorted(thresholds.items())}, frozenset(regions)
+
+
+def _generate(terms: Tuple[Term, ...], player: int) -> Callable[[CollectionState], bool]:
+    """Generates a function evaluating a requirement table, with all names bound as constants."""
+    namespace: Dict[str, Any] = {"player": player}
+
+    def constant(value: str) -> str:
+        name = f"_{len(namespace)}"
+        namespace[name] = value
+        return name
+
+    alternatives = []
+    for term in terms:
+        checks = [f"counts.get({constant(item)}, 0) >= {count}" for item, count in sorted(term.items)]
+        checks += [" + ".join(f"counts.get({constant(item)}, 0)" for item in items) + f" >= {count}"
+                   for items, count in sorted(term.sums)]
+        checks += [f"state.can_reach_region({constant(region)}, player)" for region in sorted(term.regions)]
+        alternatives.append(" and ".join(checks) or "True")
+    body = " or ".join(f"({alternative})" for alternative in alternatives) or "False"
+    exec(f"def access_rule(state):\n    counts = state.prog_items[player]\n    return {body}\n", namespace)
+    return namespace["access_rule"]
+
+
+def compile_rule(rule: Rule, world: World) -> Callable[[CollectionState], bool]:
+    """Compiles rule for the player of world, returning a function to use as access_rule.
+    Compiled rules, and the results they remember, are kept by the multiworld's UnlockIndex."""
+    rule = rule.expand(world)
+    try:
+        table: Optional[FrozenSet[Term]] = rule.to_terms()
+    except _TooComplex:
+        table = None
+    # by the requirement table, or by the rule if it is evaluated as a tree
+    key = rule if table is None else table, world.player
+    compiled_rules = world.multiworld.unlock_index.compiled_rules
+    compiled = compiled_rules.get(key, None)
+    if compiled is None:
+        if table is None:
+            terms = None
+            evaluate = rule.to_callable(world.player)
+        else:
+            terms = tuple(sorted(table, key=lambda term: (len(term), term)))
+            evaluate = _generate(terms, world.player)
+        thresholds, regions = _analyse(rule)
+        compiled = compiled_rules[key] = CompiledRule(rule, world.player, terms, thresholds, regions, evaluate)
+        evaluate.compiled_rule = compiled  # type: ignore[attr-defined]
+    return compiled.evaluate
+
+
+def get_compiled_rule(access_rule: Callable[[CollectionState], bool]) -> Optional[CompiledRule]:
+    """Returns what a compiled access_rule requires, or None for other callables."""
+    return getattr(access_rule, "compiled_rule", None)
+
+
+def set_rule(world: World, spot: Union[Location, Entrance], rule: Rule) -> None:
+    spot.access_rule = compile_rule(rule, world)
+
+
+def add_rule(world: World, spot: Union[Location, Entrance], rule: Rule, combine: str = "and") -> None:
+    """Like worlds.generic.Rules.add_rule, but keeps the result analysable if the old rule was compiled as well."""
+    old_rule = get_compiled_rule(spot.access_rule)
+    if old_rule is None:
+        from worlds.generic.Rules import add_rule as add_callable_rule
+        add_callable_rule(spot, compile_rule(rule, world), combine)
+    else:
+        set_rule(world, spot, old_rule.rule & rule if combine == "and" else old_rule.rule | rule)
+
+
+def evaluate_rules(access_rules: Iterable[Callable[[CollectionState], bool]],
+                   state: CollectionState) -> Dict[Callable[[CollectionState], bool], bool]:
+    """
+    Evaluates many access rules at once, returning the result of each.
+    Compiled rules are only evaluated once per state even if many spots share them, and remember their results by the
+    item counts they depend on, so states that differ only in counts beyond their thresholds reuse earlier results.
+    Region reachability is looked up once for all rules.
+    """
+    results: Dict[Callable[[CollectionState], bool], bool] = {}
+    counts: Dict[int, Dict[str, int]] = {}  # prog_items by player
+    regions: Dict[int, Dict[str, bool]] = {}
+    for access_rule in access_rules:
+        if access_rule in results:
+            continue
+        compiled = get_compiled_rule(access_rule)
+        if compiled is None:
+            results[access_rule] = access_rule(state)
+            continue
+        player = compiled.player
+        if player not in counts:
+            counts[player] = state.prog_items[player]
+            regions[player] = {}
+        player_regions = regions[player]
+        for region in compiled.regions:
+            if region not in player_regions:
+                player_regions[region] = state.can_reach_region(region, player)
+        key = compiled.get_key(counts[player], player_regions)
+        result = compiled.results.get(key, None)
+        if result is None:
+            if len(compiled.results) >= max_results:
+                del compiled.results[next(iter(compiled.results))]
+            result = compiled.results[key] = access_rule(state)
+        results[access_rule] = result
+    return results
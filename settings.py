@@ -675,6 +675,12 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class StageThreads(int):
+        """
+        Amount of threads generation steps of worlds that declare them isolated may run in concurrently.
+        1 runs every world one after another.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -684,6 +690,7 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    stage_threads: StageThreads = StageThreads(1)
     loglevel: str = "info"
     logtime: bool = False
 
@@ -52,10 +52,13 @@ if __name__ == "__main__":
     import ModuleUpdate
     ModuleUpdate.update(yes="--yes" in sys.argv or "-y" in sys.argv)
 
+from worlds import load_all_worlds
 from worlds.LauncherComponents import components, icon_paths
 from Utils import version_tuple, is_windows, is_linux
 from Cython.Build import cythonize
 
+load_all_worlds()  # worlds add their components when they load
+
 
 # On  Python < 3.10 LogicMixin is not currently supported.
 non_apworlds: set[str] = {
@@ -5,3 +5,9 @@ if __name__ == "__main__":
     load_worlds.run_load_worlds_benchmark()
     import locations
     locations.run_locations_benchmark()
+    import reachability
+    reachability.run_reachability_benchmark()
+    import tracker
+    tracker.run_tracker_benchmark()
+    import entrances
+    entrances.run_entrances_benchmark()
@@ -0,0 +1,84 @@
+def run_entrances_benchmark():
+    """Time randomize_entrances on grids of regions in coupled and uncoupled mode, comparing the incremental
+    reachability updates against checking every blocked connection after each placement."""
+    import argparse
+    import logging
+    import gc
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import CollectionState, EntranceType, Location, MultiWorld, Region
+    from entrance_rando import ERPlacementState, randomize_entrances
+    from worlds import AutoWorld
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    # left, right, top and bottom transitions each connect to their opposite
+    group_lookup = {1: [2], 2: [1], 3: [4], 4: [3]}
+
+    def add_transition(region: Region, direction: str, group: int) -> None:
+        exit_ = region.create_exit(f"{region.name} {direction}")
+        target = region.create_er_target(f"{region.name} {direction}")
+        for entrance in (exit_, target):
+            entrance.randomization_group = group
+            entrance.randomization_type = EntranceType.TWO_WAY
+
+    def setup_multiworld(size: int) -> MultiWorld:
+        multiworld = MultiWorld(1)
+        multiworld.game = {1: "Archipelago"}
+        multiworld.player_name = {1: "Tester"}
+        multiworld.set_seed(0)
+        multiworld.state = CollectionState(multiworld)
+        args = argparse.Namespace()
+        for name, option in AutoWorld.AutoWorldRegister.world_types["Archipelago"].options_dataclass.type_hints.items():
+            setattr(args, name, {1: option.from_any(option.default)})
+        multiworld.set_options(args)
+        menu = Region("Menu", 1, multiworld)
+        multiworld.regions.append(menu)
+        for row in range(size):
+            for column in range(size):
+                region = Region(f"Region {row * size + column}", 1, multiworld)
+                region.locations.append(Location(1, f"{region.name} Location", None, region))
+                multiworld.regions.append(region)
+                if not row and not column:
+                    menu.connect(region)
+                if column:
+                    add_transition(region, "Left", 1)
+                if column != size - 1:
+                    add_transition(region, "Right", 2)
+                if row:
+                    add_transition(region, "Top", 3)
+                if row != size - 1:
+                    add_transition(region, "Bottom", 4)
+        return multiworld
+
+    def force_full_update(er_state: ERPlacementState, _) -> None:
+        er_state.full_update_needed = True
+
+    def randomize(size: int, coupled: bool, incremental: bool) -> ERPlacementState:
+        multiworld = setup_multiworld(size)
+        gc.collect()
+        name = f"{size}x{size} {'coupled' if coupled else 'uncoupled'} {'incremental' if incremental else 'full'}"
+        with TimeIt(name, logger):
+            return randomize_entrances(multiworld.worlds[1], coupled, group_lookup,
+                                       on_connect=None if incremental else force_full_update)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10, 20, 30])
+    args, _ = parser.parse_known_args()
+
+    for size in args.sizes:
+        for coupled in (False, True):
+            full = randomize(size, coupled, False)
+            incremental = randomize(size, coupled, True)
+            logger.info(f"Counters: {dict(incremental.counters)}")
+            if full.pairings != incremental.pairings:
+                logger.warning(f"{size}x{size} pairings differ between full and incremental updates.")
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_entrances_benchmark()
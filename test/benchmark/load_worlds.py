@@ -1,10 +1,17 @@
 def run_load_worlds_benchmark():
-    """List worlds and their load time.
+    """List worlds and their load time, then compare the time it takes to import worlds and to get the data package
+    without and with the world index and data packages cached, which means loading all worlds or only the ones that
+    changed.
     Note that any first-time imports will be attributed to that world, as it is cached afterwards.
-    Likely best used with isolated worlds to measure their time alone."""
+    Likely best used with isolated worlds to measure their time alone.
+    Note that this deletes the caches, which get rebuilt on the next import of worlds."""
     import logging
+    import os
+    import shutil
+    import subprocess
+    import sys
 
-    from Utils import init_logging
+    from Utils import cache_path, init_logging, local_path
 
     # get some general imports cached, to prevent it from being attributed to one world.
     import orjson
@@ -12,14 +19,30 @@ def run_load_worlds_benchmark():
 
     import BaseClasses, Launcher, Fill
 
-    from worlds import world_sources
+    from worlds import load_all_worlds, world_sources
 
     init_logging("Benchmark Runner")
     logger = logging.getLogger("Benchmark")
 
+    load_all_worlds()
     for module in world_sources:
         logger.info(f"{module} took {module.time_taken:.4f} seconds.")
 
+    def time_startup(statement: str) -> float:
+        code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=local_path(), stderr=subprocess.DEVNULL)
+        return float(output.split()[-1])
+
+    for name, statement in (("Importing worlds", "import worlds"),
+                            ("Getting the data package", "from worlds import network_data_package")):
+        index_path = cache_path("world_index.json")
+        if os.path.exists(index_path):
+            os.unlink(index_path)
+        shutil.rmtree(cache_path("datapackage"), ignore_errors=True)
+        cold = time_startup(statement)
+        warm = time_startup(statement)
+        logger.info(f"{name} took {cold:.4f} seconds without caches and {warm:.4f} seconds with them.")
+
 
 if __name__ == "__main__":
     from path_change import change_home
@@ -10,6 +10,7 @@ def run_locations_benchmark():
 
     from Utils import init_logging
     from BaseClasses import MultiWorld, CollectionState, Location
+    from rule_builder import Has, HasFromList, compile_rule, evaluate_rules, has_all, has_any
     from worlds import AutoWorld
     from worlds.AutoWorld import call_all
 
@@ -48,6 +49,41 @@ def run_locations_benchmark():
                 gc.collect()
             return t.dif
 
+        def rule_builder_test(self, multiworld: MultiWorld, locations: typing.List[Location],
+                              all_state: CollectionState, state: CollectionState, state_name: str) -> None:
+            """Compare rules of common shapes over the game's progression items built like lambdas against compiled
+            rules, and calling a rule for each location against evaluating them in bulk."""
+            items = sorted(all_state.prog_items[1])[:6]
+            if len(items) < 6:
+                return
+            a, b, c, d, e, f = items
+            rules = [Has(a), Has(a, 2), has_all(a, b, c), has_any(a, b, c), Has(a) & (Has(b) | Has(c, 2)),
+                     (Has(a) | Has(b)) & (Has(c) | Has(d)) & (Has(e) | Has(f)), HasFromList(items, 4)]
+            callables = [rule.to_callable(1) for rule in rules]
+            compiled = [compile_rule(rule, multiworld.worlds[1]) for rule in rules]
+            timings = []
+            for access_rules in (callables, compiled):
+                with TimeIt("rules") as t:
+                    for access_rule in access_rules:
+                        for _ in range(self.rule_iterations):
+                            access_rule(state)
+                timings.append(t.dif)
+            # spread the rules over the game's locations
+            location_callables = [callables[i % len(rules)] for i in range(len(locations))]
+            location_compiled = [compiled[i % len(rules)] for i in range(len(locations))]
+            iterations = self.rule_iterations // 100
+            with TimeIt("lambdas") as t:
+                for _ in range(iterations):
+                    [access_rule(state) for access_rule in location_callables]
+            timings.append(t.dif)
+            with TimeIt("bulk") as t:
+                for _ in range(iterations):
+                    evaluate_rules(location_compiled, state)
+            timings.append(t.dif)
+            logger.info(f"{multiworld.game[1]} compiled rules took {timings[1] / timings[0]:.2%} of the time of "
+                        f"lambdas in {state_name}, evaluating them in bulk for {len(locations)} locations took "
+                        f"{timings[3] / timings[2]:.2%}.")
+
         def main(self):
             for game in sorted(AutoWorld.AutoWorldRegister.world_types):
                 summary_data: typing.Dict[str, collections.Counter[str]] = {
@@ -85,6 +121,9 @@ def run_locations_benchmark():
                         time_taken = self.location_test(location, all_state, "all_state")
                         summary_data["all_state"][location.name] = time_taken
 
+                    self.rule_builder_test(multiworld, locations, all_state, multiworld.state, "empty_state")
+                    self.rule_builder_test(multiworld, locations, all_state, all_state, "all_state")
+
                     total_empty_state = sum(summary_data["empty_state"].values())
                     total_all_state = sum(summary_data["all_state"].values())
 
@@ -0,0 +1,92 @@
+def run_reachability_benchmark():
+    """Compare full region sweeps against incremental reachability on large filled multiworlds, per game.
+    Worlds reading LogicMixin state in their entrance rules can't use incremental reachability, which shows up as
+    mismatching spheres."""
+    import argparse
+    import logging
+    import gc
+    import typing
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from BaseClasses import MultiWorld, CollectionState, Location
+    from Fill import distribute_items_restrictive
+    from worlds import AutoWorld
+    from worlds.AutoWorld import call_all
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        gen_steps: typing.Tuple[str, ...] = (
+            "generate_early",
+            "create_regions",
+            "create_items",
+            "set_rules",
+            "connect_entrances",
+            "generate_basic",
+            "pre_fill",
+        )
+
+        def __init__(self, players: int, games: typing.Sequence[str]):
+            self.players = players
+            self.games = games
+
+        def setup_multiworld(self, game: str) -> MultiWorld:
+            multiworld = MultiWorld(self.players)
+            multiworld.game = {player: game for player in multiworld.player_ids}
+            multiworld.player_name = {player: f"Tester{player}" for player in multiworld.player_ids}
+            multiworld.set_seed(0)
+            multiworld.state = CollectionState(multiworld)
+            args = argparse.Namespace()
+            for name, option in AutoWorld.AutoWorldRegister.world_types[game].options_dataclass.type_hints.items():
+                setattr(args, name, {player: option.from_any(option.default) for player in multiworld.player_ids})
+            multiworld.set_options(args)
+            for step in self.gen_steps:
+                call_all(multiworld, step)
+            distribute_items_restrictive(multiworld)
+            call_all(multiworld, "post_fill")
+            return multiworld
+
+        @staticmethod
+        def set_incremental(multiworld: MultiWorld, incremental: bool) -> None:
+            for world in multiworld.worlds.values():
+                world.incremental_reachability = incremental
+
+        def sweep(self, multiworld: MultiWorld, incremental: bool,
+                  name: str) -> typing.Tuple[float, typing.List[typing.Set[Location]]]:
+            self.set_incremental(multiworld, incremental)
+            gc.collect()
+            with TimeIt(f"{name} spheres of {self.players} players", logger) as t:
+                spheres = list(multiworld.get_spheres())
+            return t.dif, spheres
+
+        def main(self):
+            for game in self.games:
+                try:
+                    multiworld = self.setup_multiworld(game)
+                    full_time, full_spheres = self.sweep(multiworld, False, f"{game} full sweep")
+                    incremental_time, incremental_spheres = self.sweep(multiworld, True, f"{game} incremental")
+                    self.set_incremental(multiworld, False)
+                    logger.info(f"{game}: incremental reachability took {incremental_time / full_time:.2%} "
+                                f"of the full sweep time over {len(full_spheres)} spheres.")
+                    if full_spheres != incremental_spheres:
+                        logger.warning(f"{game}: spheres differ, its entrance rules likely read untracked state.")
+                except Exception as e:
+                    logger.exception(e)
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--games", nargs="*", default=[])
+    args, _ = parser.parse_known_args()
+    games = args.games or sorted(game for game, world_type in AutoWorld.AutoWorldRegister.world_types.items()
+                                 if not world_type.hidden)
+    runner = BenchmarkRunner(args.players, games)
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_reachability_benchmark()
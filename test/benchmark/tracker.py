@@ -0,0 +1,140 @@
+def run_tracker_benchmark():
+    """Time WebHost tracker pages of a large room, each decoding the room from scratch and with decoded data cached
+    between requests."""
+    import argparse
+    import logging
+    import pickle
+    import random
+    import typing
+    from uuid import uuid4
+
+    from time_it import TimeIt
+
+    from Utils import init_logging
+    from NetUtils import Hint, HintStatus, NetworkItem, NetworkSlot, SlotType, encode_multidata
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    class BenchmarkRunner:
+        game = "Benchmark Game"
+        items = 200
+        locations = 300
+
+        def __init__(self, players: int, requests: int):
+            self.players = players
+            self.requests = requests
+
+        def create_room(self) -> typing.Any:
+            from pony.orm import db_session
+            from WebHostLib.models import GameDataPackage, Room, Seed
+
+            random.seed(0)
+            data_package = {
+                "item_name_to_id": {f"Item {code}": code for code in range(1, self.items + 1)},
+                "location_name_to_id": {f"Location {code}": code for code in range(1, self.locations + 1)},
+                "checksum": uuid4().hex,
+            }
+            players = range(1, self.players + 1)
+            locations = {
+                player: {location: (random.randint(1, self.items), random.choice(players), 0)
+                         for location in range(1, self.locations + 1)}
+                for player in players
+            }
+            multidata = {
+                "slot_data": {player: {} for player in players},
+                "slot_info": {player: NetworkSlot(f"Player{player}", self.game, SlotType.player) for player in players},
+                "connect_names": {f"Player{player}": (0, player) for player in players},
+                "locations": locations,
+                "checks_in_area": {},
+                "precollected_items": {player: [] for player in players},
+                "precollected_hints": {player: set() for player in players},
+                "spheres": [],
+                "seed_name": "0",
+                "datapackage": {self.game: data_package},
+            }
+            location_checks = {(0, player): set(random.sample(range(1, self.locations + 1), self.locations // 2))
+                               for player in players}
+            received_items = {(0, player, True): [] for player in players}
+            hints = {(0, player): set() for player in players}
+            for (team, player), checks in location_checks.items():
+                for location in sorted(checks):
+                    item, receiver, flags = locations[player][location]
+                    received_items[team, receiver, True].append(NetworkItem(item, location, player, flags))
+                for location in random.sample(range(1, self.locations + 1), 5):
+                    item, receiver, flags = locations[player][location]
+                    hint = Hint(receiver, player, location, item, location in checks, "", flags,
+                                HintStatus.HINT_FOUND if location in checks else HintStatus.HINT_UNSPECIFIED)
+                    hints[team, player].add(hint)
+                    hints[team, receiver].add(hint)
+            multisave = {
+                "location_checks": location_checks,
+                "received_items": received_items,
+                "hints": hints,
+                "client_game_state": {},
+                "client_activity_timers": (),
+            }
+            with db_session:
+                GameDataPackage(checksum=data_package["checksum"], data=pickle.dumps(data_package))
+                seed = Seed(multidata=encode_multidata(multidata), owner=uuid4())
+                room = Room(seed=seed, owner=seed.owner, tracker=uuid4(), multisave=pickle.dumps(multisave))
+                return room.id
+
+        @staticmethod
+        def clear_caches() -> None:
+            from WebHostLib import tracker
+
+            tracker.get_seed_tracker_data.cache_clear()
+            tracker.get_game_name_tables.cache_clear()
+            with tracker._multisave_cache_lock:
+                tracker._multisave_cache.clear()
+
+        def render(self, app: typing.Any, room_id: typing.Any, cached: bool, name: str) -> float:
+            from pony.orm import db_session
+            from WebHostLib.models import Room
+            from WebHostLib.tracker import get_timeout_and_multiworld_tracker, get_timeout_and_player_tracker
+
+            self.clear_caches()
+            with TimeIt(f"{self.requests} {name} of {self.players} players "
+                        f"{'with' if cached else 'without'} cache", logger) as t:
+                for request in range(self.requests):
+                    if not cached:
+                        self.clear_caches()
+                    with app.test_request_context(), db_session:
+                        room = Room.get(id=room_id)
+                        if name == "multiworld trackers":
+                            get_timeout_and_multiworld_tracker(room, "Generic")
+                        else:
+                            get_timeout_and_player_tracker(room, 0, request % self.players + 1, True)
+            return t.dif
+
+        def main(self):
+            from WebHostLib import app as raw_app
+            from WebHost import get_app
+
+            raw_app.config["PONY"] = {
+                "provider": "sqlite",
+                "filename": ":memory:",
+                "create_db": True,
+            }
+            raw_app.config["TESTING"] = True
+            raw_app.config["HOST_ADDRESS"] = "localhost"
+            app = get_app()
+            room_id = self.create_room()
+            for name in ("multiworld trackers", "player trackers"):
+                uncached_time = self.render(app, room_id, False, name)
+                cached_time = self.render(app, room_id, True, name)
+                logger.info(f"{name}: caching took {cached_time / uncached_time:.2%} of the time.")
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=20)
+    args, _ = parser.parse_known_args()
+    runner = BenchmarkRunner(args.players, args.requests)
+    runner.main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_tracker_benchmark()
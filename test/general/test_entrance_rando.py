@@ -243,6 +243,26 @@ class TestRandomizeEntrances(unittest.TestCase):
             self.assertEqual(e1.parent_region.name, e1.parent_region.name)
             self.assertEqual(e1.connected_region.name, e2.connected_region.name)
 
+    def test_incremental_updates(self):
+        """tests that updating reachability from the placed exits gives the same result as a full update"""
+        def force_full_update(state: ERPlacementState, _: list[Entrance]):
+            state.full_update_needed = True
+
+        for coupled in (False, True):
+            with self.subTest(coupled=coupled):
+                multiworld1 = generate_test_multiworld()
+                generate_disconnected_region_grid(multiworld1, 5)
+                multiworld2 = generate_test_multiworld()
+                generate_disconnected_region_grid(multiworld2, 5)
+
+                result1 = randomize_entrances(multiworld1.worlds[1], coupled, directionally_matched_group_lookup)
+                result2 = randomize_entrances(multiworld2.worlds[1], coupled, directionally_matched_group_lookup,
+                                              on_connect=force_full_update)
+                self.assertEqual(result1.pairings, result2.pairings)
+                self.assertEqual(result1.counters["full_updates"], 1)
+                self.assertEqual(result1.counters["incremental_updates"], result1.counters["placements"] - 1)
+                self.assertEqual(result2.counters["incremental_updates"], 0)
+
     def test_all_entrances_placed(self):
         """tests that all entrances and exits were placed, all regions are connected, and no dangling edges exist"""
         multiworld = generate_test_multiworld()
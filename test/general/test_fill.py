@@ -463,6 +463,43 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_reachability_checked_once_per_state(self):
+        """Test that a location's access is checked once per exploration state, and always_allow is still respected"""
+        multiworld = generate_test_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 2, basic_item_count=1)
+        player2 = generate_player_data(multiworld, 2, 1, basic_item_count=1)
+        blocked = player1.locations[0]
+        checks = 0
+
+        def rule(state) -> bool:
+            nonlocal checks
+            checks += 1
+            return False
+
+        set_rule(blocked, rule)
+        allowed_item = player2.basic_items[0]
+        blocked.always_allow = lambda state, item: item is allowed_item
+        fill_restrictive(multiworld, multiworld.state, [blocked, player1.locations[1], player2.locations[0]],
+                         player1.basic_items + player2.basic_items)
+
+        self.assertIs(blocked.item, allowed_item)
+        self.assertEqual(checks, 1)
+
+    def test_first_fitting_location(self):
+        """Test that items go to the first location in order that can take them, and unfilled ones keep their order"""
+        multiworld = generate_test_multiworld()
+        player1 = generate_player_data(multiworld, 1, 5, 1, 1)
+        no_progression, excluded, unreachable, first_open, second_open = player1.locations
+        no_progression.item_rule = lambda item: not item.advancement
+        excluded.progress_type = LocationProgressType.EXCLUDED
+        set_rule(unreachable, lambda state: False)
+        locations = player1.locations.copy()
+        fill_restrictive(multiworld, multiworld.state, locations, player1.basic_items + player1.prog_items)
+
+        self.assertIs(first_open.item, player1.prog_items[0])
+        self.assertIs(no_progression.item, player1.basic_items[0])
+        self.assertEqual(locations, [excluded, unreachable, second_open])
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -806,6 +843,31 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
         self.assertRegionContains(
             self.player1.regions[1], self.player2.prog_items[0])
 
+    def test_records_balancing_stats(self) -> None:
+        """Tests that progression balancing records what it did for the spoiler"""
+        self.multiworld.worlds[self.player1.id].options.progression_balancing.value = 50
+        self.multiworld.worlds[self.player2.id].options.progression_balancing.value = 50
+
+        balance_multiworld_progression(self.multiworld)
+
+        stats = self.multiworld.spoiler.progression_balancing
+        self.assertIsNotNone(stats)
+        self.assertEqual(stats.swaps_accepted, 1)
+        self.assertGreaterEqual(stats.swaps_tried, stats.swaps_accepted)
+        self.assertGreater(stats.balanced_spheres, 0)
+        self.assertIn("spheres", stats.phase_times)
+
+    def test_no_balancing_stats_when_all_locked(self) -> None:
+        """Tests that no balancing summary is recorded when every location is locked"""
+        self.multiworld.worlds[self.player1.id].options.progression_balancing.value = 50
+        self.multiworld.worlds[self.player2.id].options.progression_balancing.value = 50
+        for location in self.multiworld.get_locations():
+            location.locked = True
+
+        balance_multiworld_progression(self.multiworld)
+
+        self.assertIsNone(self.multiworld.spoiler.progression_balancing)
+
     def test_balances_progression_light(self) -> None:
         """Test that progression balancing still moves items earlier on minimum value"""
         self.multiworld.worlds[self.player1.id].options.progression_balancing.value = 1
@@ -1,8 +1,11 @@
 import unittest
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Set
 
-from BaseClasses import CollectionState
+from BaseClasses import CollectionState, Item, ItemClassification, Location, Region, SphereSearch
+from rule_builder import TRUE, CanReachRegion, Has, HasFromList, Rule, compile_rule, get_compiled_rule
 from worlds.AutoWorld import AutoWorldRegister
-from . import setup_solo_multiworld, gen_steps
+from . import generate_items, generate_test_multiworld, setup_solo_multiworld, gen_steps
 
 
 class TestBase(unittest.TestCase):
@@ -79,3 +82,233 @@ class TestBase(unittest.TestCase):
                             locations.add(location)
                     self.assertGreater(len(locations), 0,
                                        msg="Need to be able to reach at least one location to get started.")
+
+
+class TestIncrementalReachability(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.rule_calls = Counter()
+        regions = {player: [self.multiworld.get_region("Menu", player)] for player in self.multiworld.player_ids}
+        for player in self.multiworld.player_ids:
+            for index in range(1, 6):
+                region = Region(f"Region {index}", player, self.multiworld)
+                self.multiworld.regions.append(region)
+                regions[player].append(region)
+        self.items = {player: generate_items(4, player, True) for player in self.multiworld.player_ids}
+        for player, (menu, first, second, third, fourth, fifth) in regions.items():
+            self.connect_regions(player, menu, first, second, third, fourth, fifth)
+
+    def connect_regions(self, player: int, menu: Region, first: Region, second: Region, third: Region, fourth: Region,
+                        fifth: Region) -> None:
+        def counted(name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+            def counted_rule(state: CollectionState) -> bool:
+                self.rule_calls[f"P{player} {name}"] += 1
+                return rule(state)
+            return counted_rule
+
+        other = 3 - player
+        item_names = [item.name for item in self.items[player]]
+        menu.connect(first, f"P{player} first", counted("first", lambda state: state.has(item_names[0], player)))
+        menu.connect(second, f"P{player} second", counted("second", lambda state: state.has(item_names[1], player, 2)))
+        first.connect(third, f"P{player} third", counted(
+            "third", lambda state: state.has(f"player{other}_progitem3", other)))
+        # indirect condition is intentionally not registered, the recorded region read should cover it
+        first.connect(fourth, f"P{player} fourth", counted(
+            "fourth", lambda state: state.can_reach_region("Region 2", player)))
+        menu.connect(fifth, f"P{player} fifth", counted(
+            "fifth", lambda state: state.count_group("Everything", player) > 0 or state.has(item_names[2], player)))
+
+    def reachable_region_names(self, state: CollectionState) -> Dict[int, Set[str]]:
+        return {player: {region.name for region in self.multiworld.get_regions(player) if region.can_reach(state)}
+                for player in self.multiworld.player_ids}
+
+    def test_same_regions_as_full_sweep(self) -> None:
+        """Ensure incremental reachability reaches exactly the same regions as the full sweep after every collect."""
+        for world in self.multiworld.worlds.values():
+            # fourth's indirect condition isn't registered, so the reference has to find it without
+            world.explicit_indirect_conditions = False
+        full_state = CollectionState(self.multiworld)
+        for world in self.multiworld.worlds.values():
+            world.incremental_reachability = True
+        incremental_state = CollectionState(self.multiworld)
+        collect_order = [
+            self.items[1][3], self.items[1][1], self.items[2][3], self.items[1][0], self.items[1][1],
+            self.items[2][0], self.items[1][2], self.items[2][1], self.items[2][1],
+        ]
+        for item in collect_order:
+            with self.subTest(item=item.name):
+                for world in self.multiworld.worlds.values():
+                    world.incremental_reachability = False
+                full_state.collect(item, True)
+                expected = self.reachable_region_names(full_state)
+                for world in self.multiworld.worlds.values():
+                    world.incremental_reachability = True
+                incremental_state.collect(item, True)
+                self.assertEqual(expected, self.reachable_region_names(incremental_state))
+                copied_state = incremental_state.copy()
+                self.assertEqual(expected, self.reachable_region_names(copied_state))
+
+    def test_settled_connections_not_rechecked(self) -> None:
+        """Ensure blocked connections are only checked again once something they depend on changed."""
+        self.multiworld.worlds[1].incremental_reachability = True
+        state = CollectionState(self.multiworld)
+        # counters skip reporting changes while nothing depends on them
+        self.assertFalse(state.connection_dependencies)
+        state.update_reachable_regions(1)
+        self.assertTrue(state.connection_dependencies)
+        self.rule_calls.clear()
+
+        state.collect(self.items[1][1], True)
+        state.update_reachable_regions(1)
+        self.assertEqual({"P1 second": 1}, dict(self.rule_calls))
+        self.rule_calls.clear()
+
+        state.collect(self.items[1][1], True)
+        state.update_reachable_regions(1)
+        # second is reachable now, which fourth asks for, but fourth is only queued once first is reachable
+        self.assertEqual({"P1 second": 1}, dict(self.rule_calls))
+        self.rule_calls.clear()
+
+        state.collect(self.items[1][0], True)
+        state.update_reachable_regions(1)
+        self.assertEqual({"P1 first": 1, "P1 third": 1, "P1 fourth": 1}, dict(self.rule_calls))
+        self.assertTrue(state.can_reach_region("Region 4", 1))
+        self.rule_calls.clear()
+
+        # an item of the other player only re-checks connections which asked for it
+        state.collect(self.items[2][0], True)
+        state.update_reachable_regions(1)
+        self.assertEqual({}, dict(self.rule_calls))
+        state.collect(self.items[2][3], True)
+        state.update_reachable_regions(1)
+        self.assertEqual({"P1 third": 1}, dict(self.rule_calls))
+
+
+class TestSphereSearch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.rule_calls = Counter()
+        for player in self.multiworld.player_ids:
+            self.create_locations(player, generate_items(4, player, True, code=1))
+
+    def create_locations(self, player: int, items: List[Item]) -> None:
+        def counted(name: str, rule: Callable[[CollectionState], bool]) -> Callable[[CollectionState], bool]:
+            def counted_rule(state: CollectionState) -> bool:
+                self.rule_calls[f"P{player} {name}"] += 1
+                return rule(state)
+            return counted_rule
+
+        other = 3 - player
+        menu = self.multiworld.get_region("Menu", player)
+        locked = Region("Locked", player, self.multiworld)
+        self.multiworld.regions.append(locked)
+        menu.connect(locked, f"P{player} Lock", lambda state: state.has(items[0].name, player))
+        names = [f"P{player} {name}" for name in ("free", "own item", "other item", "locked")]
+        locations = [Location(player, name, index, menu) for index, name in enumerate(names, 1)]
+        locations[-1].parent_region = locked
+        locations[1].access_rule = counted("own item", lambda state: state.has(items[1].name, player))
+        locations[2].access_rule = counted("other item", lambda state: state.has(f"player{other}_progitem1", other))
+        menu.locations += locations[:3]
+        locked.locations.append(locations[3])
+        for location, item in zip(locations, (items[0], items[2], items[3], items[1])):
+            location.place_locked_item(item)
+
+    def sphere_names(self, spheres: Iterable[Set[Location]]) -> List[List[str]]:
+        return [sorted(location.name for location in sphere) for sphere in spheres]
+
+    def test_same_spheres(self) -> None:
+        """Ensure spheres come out the same no matter if locations are indexed by what their rules read."""
+        expected = [["P1 free", "P2 free"], ["P1 locked", "P2 locked"],
+                    ["P1 other item", "P1 own item", "P2 other item", "P2 own item"]]
+        for incremental in (False, True):
+            for world in self.multiworld.worlds.values():
+                world.incremental_reachability = incremental
+            with self.subTest(incremental_reachability=incremental):
+                self.assertEqual(expected, self.sphere_names(self.multiworld.get_spheres()))
+                self.assertEqual(expected, self.sphere_names(self.multiworld.get_sendable_spheres()))
+                self.assertTrue(self.multiworld.fulfills_accessibility())
+
+    def test_blocked_locations_not_rechecked(self) -> None:
+        """Ensure locations of incremental_reachability worlds are only checked again once an item they read
+        changed, while other locations are checked every sphere."""
+        self.multiworld.worlds[1].incremental_reachability = True
+        list(self.multiworld.get_spheres())
+        self.assertEqual({"P1 own item": 2, "P1 other item": 2, "P2 own item": 3, "P2 other item": 3},
+                         dict(self.rule_calls))
+
+
+class TestUnlockIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.world = self.multiworld.worlds[1]
+        self.menu = self.multiworld.get_region("Menu", 1)
+        vault = Region("Vault", 1, self.multiworld)
+        self.multiworld.regions.append(vault)
+        self.menu.connect(vault, "Vault Door", lambda state: state.has("Gem", 1))
+        self.rule_calls = Counter()
+        self.locations = {
+            "Start": self.create_location("Start", TRUE, "Key"),
+            "First": self.create_location("First", Has("Key"), "Key"),
+            "Second": self.create_location("Second", Has("Key", 2), "Gem"),
+            "Third": self.create_location("Third", HasFromList(("Key", "Gem"), 3), "Gem"),
+            "Locked": self.create_location("Locked", Has("Gem", 3), "Gem"),
+            "Vault": self.create_location("Vault", Has("Key") & CanReachRegion("Vault"), "Junk"),
+        }
+
+    def create_location(self, name: str, rule: Rule, item: str) -> Location:
+        compiled = get_compiled_rule(compile_rule(rule, self.world))
+
+        def counted_rule(state: CollectionState) -> bool:
+            self.rule_calls[name] += 1
+            return compiled.evaluate(state)
+
+        counted_rule.compiled_rule = compiled  # type: ignore[attr-defined]
+        location = Location(1, name, None, self.menu)
+        location.access_rule = counted_rule
+        location.place_locked_item(Item(item, ItemClassification.progression, None, 1))
+        self.menu.locations.append(location)
+        return location
+
+    def test_sweep(self) -> None:
+        """Ensure locations with compiled rules are only checked again once an item reached a count their rule
+        compares against or a region they depend on became reachable."""
+        state = CollectionState(self.multiworld)
+        state.sweep_for_advancements()
+        self.assertEqual(state.advancements, set(self.locations.values()) - {self.locations["Locked"]})
+        self.assertEqual({"Start": 1, "First": 2, "Second": 2, "Third": 4, "Locked": 1, "Vault": 3},
+                         dict(self.rule_calls))
+
+    def test_reindexed(self) -> None:
+        """Ensure spots are indexed by the rule they have when they are looked up."""
+        unlock_index = self.multiworld.unlock_index
+        location = self.locations["Second"]
+        self.assertEqual(unlock_index.get_unlocked(1, "Key", 1, 2), set())
+        unlock_index.get_rule(location)
+        self.assertEqual(unlock_index.get_unlocked(1, "Key", 1, 2), {location})
+        self.assertEqual(unlock_index.get_unlocked(1, "Key", 2, 5), set())
+        location.access_rule = compile_rule(Has("Gem"), self.world)
+        unlock_index.get_rule(location)
+        self.assertEqual(unlock_index.get_unlocked(1, "Key", 1, 2), set())
+        self.assertEqual(unlock_index.get_unlocked(1, "Gem", 0, 1), {location})
+        location.access_rule = lambda state: True
+        self.assertIsNone(unlock_index.get_rule(location))
+        self.assertEqual(unlock_index.get_unlocked(1, "Gem", 0, 1), set())
+
+    def test_nested_sweep(self) -> None:
+        """Ensure a search learns about items collected by a sweep of its state."""
+        state = CollectionState(self.multiworld)
+        with SphereSearch(state, [self.locations["Second"]]) as search:
+            self.assertEqual(search.find_sphere(), set())
+            state.sweep_for_advancements([self.locations["Start"], self.locations["First"]])
+            self.assertEqual(search.find_sphere(), {self.locations["Second"]})
+        self.assertIsNone(state.connection_dependencies.changed_items)
+
+    def test_stops_tracking(self) -> None:
+        """Ensure a search stops tracking the changes to its state once it is done, even if left early."""
+        state = CollectionState(self.multiworld)
+        self.multiworld.fulfills_accessibility(state)
+        self.assertIsNone(state.connection_dependencies.changed_items)
+        with self.assertRaises(RuntimeError):
+            with SphereSearch(state, self.locations.values()):
+                raise RuntimeError
+        self.assertIsNone(state.connection_dependencies.changed_items)
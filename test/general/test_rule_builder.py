@@ -0,0 +1,119 @@
+import itertools
+import unittest
+
+from BaseClasses import CollectionState, Item, ItemClassification, Location, Region
+import rule_builder
+from rule_builder import (FALSE, TRUE, And, CanReachRegion, Has, HasFromList, HasGroup, Or, Term, add_rule,
+                          compile_rule, evaluate_rules, get_compiled_rule, has_all, has_any, set_rule)
+from test.general import generate_test_multiworld
+
+
+class TestRuleBuilder(unittest.TestCase):
+    items = ("A", "B", "C")
+
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.world = self.multiworld.worlds[1]
+        self.world.item_name_groups = {"Letters": set(self.items)}
+        menu = self.multiworld.get_region("Menu", 1)
+        self.region = Region("Castle", 1, self.multiworld)
+        self.multiworld.regions.append(self.region)
+        self.entrance = menu.connect(self.region, rule=lambda state: state.has("Key", 1))
+        self.location = Location(1, "Chest", None, menu)
+        menu.locations.append(self.location)
+
+    def collect(self, state: CollectionState, *items: str) -> CollectionState:
+        for item in items:
+            state.collect(Item(item, ItemClassification.progression, None, 1), True)
+        return state
+
+    def get_states(self):
+        """All states with up to two of each item, with and without the Castle reachable"""
+        for counts in itertools.product(range(3), repeat=len(self.items)):
+            for key in ((), ("Key",)):
+                items = [item for item, count in zip(self.items, counts) for _ in range(count)]
+                yield self.collect(CollectionState(self.multiworld), *items, *key)
+
+    def test_matches_callable(self) -> None:
+        """Tests that compiled rules give the same results as rules built like lambdas"""
+        rules = [
+            TRUE, FALSE, Has("A"), Has("A", 2), has_all("A", "B"), has_any("A", "B", "C"),
+            Has("A") & (Has("B") | Has("C", 2)), (Has("A") | Has("B")) & (Has("B", 2) | Has("C")),
+            HasFromList(self.items, 3), HasGroup("Letters", 2) & CanReachRegion("Castle"),
+            Or(Has("A", 2) & CanReachRegion("Castle"), And(Has("B"), HasFromList(("A", "C"), 2))),
+        ]
+        for rule in rules:
+            with self.subTest(rule=rule):
+                compiled = compile_rule(rule, self.world)
+                expected = rule.expand(self.world).to_callable(1)
+                for state in self.get_states():
+                    self.assertEqual(compiled(state), expected(state), state.prog_items[1])
+
+    def test_requirement_table(self) -> None:
+        """Tests that rules compile to the simplest alternatives"""
+        compiled = get_compiled_rule(compile_rule(Has("A") & (Has("A", 2) | Has("B")) | Has("A", 3), self.world))
+        self.assertEqual(set(compiled.terms), {Term(items=frozenset({("A", 2)})),
+                                               Term(items=frozenset({("A", 1), ("B", 1)}))})
+        self.assertEqual(compiled.thresholds, {"A": (1, 2, 3), "B": (1,)})
+        self.assertEqual(compiled.regions, frozenset())
+        compiled = get_compiled_rule(compile_rule(HasGroup("Letters") & CanReachRegion("Castle"), self.world))
+        self.assertEqual(compiled.items, frozenset(self.items))
+        self.assertEqual(compiled.regions, {"Castle"})
+
+    def test_too_complex(self) -> None:
+        """Tests that rules with too many alternatives are evaluated as a tree"""
+        rule = And(*(has_any(f"A{i}", f"B{i}") for i in range(8)))
+        compiled = get_compiled_rule(compile_rule(rule, self.world))
+        self.assertIsNone(compiled.terms)
+        self.assertEqual(len(compiled.items), 16)
+        state = self.collect(CollectionState(self.multiworld), *(f"A{i}" for i in range(8)))
+        self.assertTrue(compiled.evaluate(state))
+
+    def test_shared(self) -> None:
+        """Tests that equal rules of a player share one compiled rule, but only within their multiworld"""
+        self.assertIs(compile_rule(Has("A") & Has("B"), self.world), compile_rule(has_all("B", "A"), self.world))
+        self.assertIsNot(compile_rule(Has("A"), self.world), compile_rule(Has("A", 2), self.world))
+        other_world = generate_test_multiworld().worlds[1]
+        self.assertIsNot(compile_rule(Has("A"), self.world), compile_rule(Has("A"), other_world))
+
+    def test_add_rule(self) -> None:
+        """Tests that adding to a compiled rule keeps it compiled, and adding to other rules still works"""
+        set_rule(self.world, self.location, Has("A"))
+        add_rule(self.world, self.location, Has("B"))
+        self.assertEqual(get_compiled_rule(self.location.access_rule).rule, has_all("A", "B"))
+        add_rule(self.world, self.entrance, Has("A"), "or")
+        self.assertIsNone(get_compiled_rule(self.entrance.access_rule))
+        self.assertTrue(self.entrance.can_reach(self.collect(CollectionState(self.multiworld), "A")))
+
+    def test_evaluate_rules(self) -> None:
+        """Tests that bulk evaluation gives the same results and reuses them for states past the thresholds"""
+        rules = [compile_rule(Has("A", 2), self.world), compile_rule(Has("B") & CanReachRegion("Castle"), self.world),
+                 lambda state: state.has("C", 1)]
+        for state in self.get_states():
+            self.assertEqual(evaluate_rules(rules, state), {rule: rule(state) for rule in rules})
+        compiled = get_compiled_rule(rules[0])
+        compiled.results.clear()
+        evaluate_rules(rules, self.collect(CollectionState(self.multiworld), "A", "A"))
+        evaluate_rules(rules, self.collect(CollectionState(self.multiworld), "A", "A", "A"))
+        self.assertEqual(compiled.results, {(2,): True})
+
+    def test_results_bounded(self) -> None:
+        """Tests that compiled rules forget their oldest results beyond max_results"""
+        rule = compile_rule(HasFromList(self.items, 6), self.world)
+        compiled = get_compiled_rule(rule)
+        compiled.results.clear()
+        old_max_results = rule_builder.max_results
+        rule_builder.max_results = 4
+        try:
+            for state in self.get_states():
+                evaluate_rules([rule], state)
+                self.assertLessEqual(len(compiled.results), 4)
+        finally:
+            rule_builder.max_results = old_max_results
+        self.assertEqual(len(compiled.results), 4)
+
+    def test_group_needs_world(self) -> None:
+        """Tests that item groups can't be turned into a requirement table before they are expanded"""
+        with self.assertRaisesRegex(TypeError, "expand"):
+            HasGroup("Letters").to_terms()
+        self.assertEqual(HasGroup("Letters").expand(self.world).to_terms(), HasFromList(self.items).to_terms())
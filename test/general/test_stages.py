@@ -0,0 +1,43 @@
+import time
+import unittest
+
+from BaseClasses import Item, ItemClassification, MultiWorld
+from worlds.AutoWorld import call_all
+from . import setup_multiworld, TestWorld as SimpleWorld
+
+
+def setup_isolated_multiworld(players: int) -> MultiWorld:
+    multiworld = setup_multiworld([SimpleWorld] * players, (), seed=0)
+    for world in multiworld.worlds.values():
+        def create_items(world=world) -> None:
+            for i in range(10):
+                # give other threads a chance to run in between
+                time.sleep(0)
+                multiworld.itempool.append(Item(f"Item {world.random.randrange(100)}", ItemClassification.filler,
+                                                None, world.player))
+
+        world.isolated_stages = frozenset({"create_items"})
+        world.create_items = create_items
+    return multiworld
+
+
+class TestIsolatedStages(unittest.TestCase):
+    def test_same_itempool(self) -> None:
+        """Tests that running isolated stages in threads results in the same item pool as running them in order"""
+        serial = setup_isolated_multiworld(4)
+        call_all(serial, "create_items")
+        threaded = setup_isolated_multiworld(4)
+        call_all(threaded, "create_items", threads=4)
+        self.assertEqual([(item.player, item.name) for item in serial.itempool],
+                         [(item.player, item.name) for item in threaded.itempool])
+
+    def test_no_global_random(self) -> None:
+        """Tests that isolated stages can't use the global random state"""
+        multiworld = setup_multiworld([SimpleWorld] * 2, ())
+        for world in multiworld.worlds.values():
+            world.isolated_stages = frozenset({"generate_early"})
+            world.generate_early = lambda: multiworld.random.random()
+        with self.assertRaises(RuntimeError):
+            call_all(multiworld, "generate_early", threads=2)
+        self.assertTrue(multiworld.random.passthrough)
+        call_all(multiworld, "generate_early")
@@ -1,7 +1,8 @@
 import unittest
 
+from BaseClasses import CollectionState, ProgItemCounter, ProgItemIndex, Region
 from worlds.AutoWorld import AutoWorldRegister, call_all
-from . import setup_solo_multiworld
+from . import generate_items, generate_locations, generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -27,3 +28,127 @@ class TestBase(unittest.TestCase):
                     with self.subTest("Step", step=step):
                         call_all(multiworld, step)
                         self.assertTrue(multiworld.get_all_state(False, allow_partial_entrances=True))
+
+
+class TestStateCopy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        self.items = {player: generate_items(3, player, True) for player in self.multiworld.player_ids}
+        self.regions = {}
+        for player in self.multiworld.player_ids:
+            region = Region("Locked", player, self.multiworld)
+            self.multiworld.regions.append(region)
+            self.regions[player] = region
+            generate_locations(1, player, region)
+            item_name = self.items[player][0].name
+            self.multiworld.get_region("Menu", player).connect(
+                region, f"Player {player} Lock", lambda state, item=item_name, player=player: state.has(item, player))
+
+    def test_copy_is_independent(self) -> None:
+        """Ensure a copy and its original don't see each other's changes, no matter which of them touches a player
+        first."""
+        state = CollectionState(self.multiworld)
+        state.collect(self.items[1][1], True)
+        self.assertFalse(self.regions[1].can_reach(state))
+        location = self.regions[2].locations[0]
+
+        copy = state.copy()
+        state.collect(self.items[1][0], True, location)
+        copy.collect(self.items[2][0], True)
+
+        self.assertTrue(self.regions[1].can_reach(state))
+        self.assertFalse(self.regions[2].can_reach(state))
+        self.assertFalse(self.regions[1].can_reach(copy))
+        self.assertTrue(self.regions[2].can_reach(copy))
+        self.assertEqual(state.count(self.items[1][1].name, 1), 1)
+        self.assertEqual(copy.count(self.items[1][1].name, 1), 1)
+        self.assertIn(location, state.locations_checked)
+        self.assertNotIn(location, copy.locations_checked)
+        self.assertIn(self.regions[2], copy.path)
+        self.assertNotIn(self.regions[2], state.path)
+
+        copy_of_copy = copy.copy()
+        copy.remove(self.items[2][0])
+        self.assertFalse(self.regions[2].can_reach(copy))
+        self.assertTrue(self.regions[2].can_reach(copy_of_copy))
+        self.assertEqual(copy_of_copy.prog_items, {1: {self.items[1][1].name: 1}, 2: {self.items[2][0].name: 1}})
+
+    def test_copy_in_access_rule(self) -> None:
+        """Ensure a copy made by an access rule while its state is being swept is independent of the sweep."""
+        copies = []
+
+        def copying_rule(state: CollectionState) -> bool:
+            copy = state.copy()
+            copy.collect(self.items[1][2], True)
+            copies.append((copy, set(state.reachable_regions[1])))
+            return state.has(self.items[1][1].name, 1)
+
+        region = Region("Copying", 1, self.multiworld)
+        self.multiworld.regions.append(region)
+        self.regions[1].connect(region, "Copying Lock", copying_rule)
+        state = CollectionState(self.multiworld)
+        state.collect(self.items[1][0], True)
+        state.collect(self.items[1][1], True)
+
+        self.assertTrue(region.can_reach(state))
+        self.assertTrue(self.regions[1].can_reach(state))
+        self.assertFalse(state.has(self.items[1][2].name, 1))
+        self.assertTrue(copies)
+        for copy, reachable_regions in copies:
+            self.assertTrue(copy.has(self.items[1][2].name, 1))
+            self.assertEqual(reachable_regions, copy.reachable_regions[1])
+
+
+class TestProgItemCounter(unittest.TestCase):
+    def test_counter_behavior(self) -> None:
+        """Ensure prog_items still behave like a Counter for worlds that use them directly."""
+        counter = ProgItemCounter(ProgItemIndex(), ["Sword", "Sword", "Bow"])
+        counter["Arrows"] += 30
+        counter.update({"Bow": 1})
+        counter["Bow"] -= 2
+        self.assertEqual(counter, {"Sword": 2, "Arrows": 30})
+        self.assertEqual(counter["Missing"], 0)
+        self.assertEqual(counter.get("Missing", 5), 5)
+        self.assertNotIn("Bow", counter)
+        self.assertEqual(list(counter), ["Sword", "Arrows"])
+        self.assertEqual(len(counter), 2)
+        self.assertEqual(counter.total(), 32)
+        self.assertEqual(counter.most_common(1), [("Arrows", 30)])
+        self.assertEqual(counter.pop("Arrows"), 30)
+        self.assertEqual(counter.pop("Arrows", None), None)
+        del counter["Sword"]
+        self.assertFalse(counter)
+
+    def test_shared_index(self) -> None:
+        """Ensure counters sharing an index count item names that got their slot after they were copied."""
+        counter = ProgItemCounter(ProgItemIndex(), {"Sword": 1})
+        copy = counter.copy()
+        counter["Shield"] = 1
+        counter["Score"] = 2.5
+        self.assertEqual(copy["Shield"], 0)
+        self.assertEqual(copy, {"Sword": 1})
+        copy["Score"] = 1
+        self.assertEqual(counter, {"Sword": 1, "Shield": 1, "Score": 2.5})
+        self.assertEqual(copy, {"Sword": 1, "Score": 1})
+
+
+class TestItemGroups(unittest.TestCase):
+    def test_group_counts(self):
+        """Tests item group helpers count the same whether the group or the collected items are smaller"""
+        multiworld = generate_test_multiworld()
+        items = generate_items(6, 1, True)
+        state = CollectionState(multiworld)
+        for item in items[:3] + items[:1]:
+            state.collect(item, True)
+        small_group = {item.name for item in items[:2]}
+        large_group = {item.name for item in items[1:]} | {f"Missing {i}" for i in range(10)}
+        multiworld.worlds[1].item_name_groups = {"Small": small_group, "Large": large_group}
+
+        for group, count, unique in (("Small", 3, 2), ("Large", 2, 2)):
+            with self.subTest(group=group):
+                self.assertEqual(state.count_group(group, 1), count)
+                self.assertEqual(state.count_group_unique(group, 1), unique)
+                self.assertTrue(state.has_group(group, 1, count))
+                self.assertFalse(state.has_group(group, 1, count + 1))
+                self.assertTrue(state.has_group_unique(group, 1, unique))
+                self.assertFalse(state.has_group_unique(group, 1, unique + 1))
@@ -0,0 +1,81 @@
+import json
+import subprocess
+import sys
+import unittest
+
+from Utils import local_path
+from worlds import (WorldSource, _read_data_package_cache, _write_data_package_cache, game_sources,
+                    get_source_data_packages, load_all_worlds, world_index, world_sources)
+from worlds.AutoWorld import AutoWorldRegister
+from worlds.Files import AutoPatchRegister
+from worlds.LauncherComponents import components
+
+
+class TestWorldIndex(unittest.TestCase):
+    def test_games_indexed(self) -> None:
+        """Tests that every game of a world source can be loaded through the world index."""
+        sources_by_module = {world_source.module_name: world_source for world_source in world_sources}
+        for game, world_type in AutoWorldRegister.world_types.items():
+            package, _, module = world_type.__module__.partition(".")
+            world_source = sources_by_module.get(module.split(".")[0], None) if package == "worlds" else None
+            if world_source:
+                with self.subTest(game):
+                    self.assertIs(game_sources.get(game, None), world_source)
+
+    def test_unknown_game(self) -> None:
+        """Tests that looking up games no world registers behaves like a regular dict."""
+        world_types = AutoWorldRegister.world_types
+        self.assertNotIn("Not A Game", world_types)
+        self.assertIsNone(world_types.get("Not A Game"))
+        self.assertEqual(world_types.get("Not A Game", "default"), "default")
+        with self.assertRaises(KeyError):
+            world_types["Not A Game"]
+        self.assertNotIn(None, world_types)
+
+    def test_data_package_cache(self) -> None:
+        """Tests that cached data packages have the same names and ids as the ones the worlds build."""
+        for world_source in world_sources:
+            if world_source.resolved_path in world_index:
+                data_packages = get_source_data_packages(world_source)
+                self.assertEqual(set(data_packages), set(world_index[world_source.resolved_path]["games"]))
+                if _read_data_package_cache(world_source) is None:
+                    _write_data_package_cache(world_source, data_packages)
+                for game, data_package in _read_data_package_cache(world_source).items():
+                    with self.subTest(game):
+                        # some worlds order their names differently in each process, which changes the checksum
+                        del data_package["checksum"]
+                        expected = dict(data_packages[game])
+                        del expected["checksum"]
+                        self.assertEqual(data_package, expected)
+
+    def test_failed_world(self) -> None:
+        """Tests that the games of a world source that failed to load are left out of its data packages."""
+        world_source = WorldSource("not_a_world", loaded=True)
+        world_index[world_source.resolved_path] = {"games": ["Not A Game"]}
+        try:
+            self.assertEqual(get_source_data_packages(world_source), {})
+        finally:
+            del world_index[world_source.resolved_path]
+
+    def test_registries_with_warm_index(self) -> None:
+        """Tests that launcher components and patch handlers of worlds not loaded on import still register."""
+        load_all_worlds()
+        script = (
+            "import ModuleUpdate\n"
+            "ModuleUpdate.update_ran = True  # the Launcher would ask to install missing requirements\n"
+            "import json, worlds\n"
+            "loaded = sum(world_source.loaded for world_source in worlds.world_sources)\n"
+            "import Launcher\n"
+            "from worlds.Files import AutoPatchRegister\n"
+            "from worlds.LauncherComponents import components\n"
+            "AutoPatchRegister.get_handler('')\n"
+            "print(json.dumps([loaded, [component.display_name for component in components],\n"
+            "                  list(AutoPatchRegister.file_endings)]))\n"
+        )
+        output = subprocess.run([sys.executable, "-c", script], cwd=local_path(), capture_output=True, text=True,
+                                check=True).stdout
+        loaded, component_names, file_endings = json.loads(output.splitlines()[-1])
+        self.assertLess(loaded, len(world_sources), "index was not used")
+        # the Launcher adds a few components of its own
+        self.assertEqual({component.display_name for component in components} - set(component_names), set())
+        self.assertEqual(set(file_endings), set(AutoPatchRegister.file_endings))
@@ -99,6 +99,7 @@ def stop_room(app_client: "FlaskClient",
 
     from WebHostLib.models import Command, Room
     from WebHostLib import app
+    from WebHostLib.notifications import notify_room
 
     poll_interval = 2
 
@@ -120,6 +121,7 @@ def stop_room(app_client: "FlaskClient",
             original_timeout = room.timeout
             room.timeout = 1  # avoid spinning it up again
             Command(room=room, commandtext="/exit")
+    notify_room(app.config["ROOM_NOTIFY_ADDRESS"], room_uuid)
 
     try:
         if address and timeout is not None:
@@ -175,8 +177,11 @@ def get_multidata_for_room(webhost_client: "FlaskClient", room_id: str) -> bytes
 
 
 def set_multidata_for_room(webhost_client: "FlaskClient", room_id: str, data: bytes) -> None:
+    import os
+
     from pony.orm import db_session
 
+    from Utils import cache_path
     from WebHostLib.models import Room
     from WebHostLib import app
 
@@ -184,6 +189,11 @@ def set_multidata_for_room(webhost_client: "FlaskClient", room_id: str, data: by
     with db_session:
         room: Room = Room.get(id=room_uuid)
         room.seed.multidata = data
+        # seeds are not supposed to change, so drop the copy hosters cache
+        try:
+            os.unlink(cache_path("multidata", f"{room.seed.id}.archipelago"))
+        except FileNotFoundError:
+            pass
 
 
 def stop_autohost(graceful: bool = True) -> None:
@@ -111,6 +111,9 @@ class Base:
                              [(4, 9, 99, 3, 0), (5, 9, 99, 5, 0)])
             self.assertEqual(sorted(self.store.find_item(set(range(2048)), 13)),
                              [(1, 13, 13, 1, 0)])
+            # in order of sender and location, not of the receiving slots
+            self.assertEqual(list(self.store.find_item({3, 4, 5}, 99)),
+                             [(3, 9, 99, 4, 0), (4, 9, 99, 3, 0), (5, 9, 99, 5, 0)])
 
         def test_get_for_player(self) -> None:
             self.assertEqual(self.store.get_for_player(3), {4: {9}})
@@ -165,6 +168,26 @@ class Base:
             with self.assertRaises(KeyError):
                 self.store.get_remaining(bad_state, 0, 9999)
 
+        def test_spheres(self) -> None:
+            with self.assertRaises(KeyError):
+                self.store.get_sphere(1, 11)
+            self.assertEqual(self.store.get_spheres(1), {})
+            self.store.set_spheres([{1: {11, 13}, 2: {21}, 6: {1}}, {1: {12, 14}, 4: {9}}])
+            self.assertEqual(self.store.get_sphere(1, 11), 0)
+            self.assertEqual(self.store.get_sphere(1, 12), 1)
+            self.assertEqual(self.store.get_sphere(4, 9), 1)
+            for slot, location in ((1, 14), (2, 22), (3, 9), (6, 1), (0, 1), (-1, 1), (2 ** 64, 1), (1, 2 ** 64)):
+                with self.assertRaises(KeyError):
+                    self.store.get_sphere(slot, location)
+            self.assertEqual(self.store.get_spheres(1), {11: 0, 12: 1, 13: 0})
+            self.assertEqual(self.store.get_spheres(3), {})
+            for slot in (6, 0, -1, 2 ** 64):
+                with self.assertRaises(KeyError):
+                    self.store.get_spheres(slot)
+            self.store.set_spheres([{2: {22}}])
+            self.assertEqual(self.store.get_spheres(1), {})
+            self.assertEqual(self.store.get_spheres(2), {22: 0})
+
         def test_location_set_intersection(self) -> None:
             locations = {10, 11, 12}
             locations.intersection_update(self.store[1])
@@ -231,6 +254,24 @@ class Base:
             self.assertEqual(len(store), 2)
             self.assertEqual(len(store[1]), 0)
             self.assertEqual(len(store[2]), 1)
+            self.assertEqual(store.get_spheres(1), {})
+            store.set_spheres([{2: {1}}])
+            self.assertEqual(store.get_spheres(1), {})
+            self.assertEqual(store.get_spheres(2), {1: 0})
+            for slot in (0, 3):
+                with self.assertRaises(KeyError):
+                    store.get_spheres(slot)
+
+        def test_receiver_without_locations(self) -> None:
+            store = self.type({
+                1: {1: (5, 3, 0), 2: (5, 3, 1), 3: (6, 3, 0)},
+                2: {1: (5, 3, 0), 2: (5, 1, 0)},
+            })
+            self.assertEqual(list(store.find_item({3}, 5)), [(1, 1, 5, 3, 0), (1, 2, 5, 3, 1), (2, 1, 5, 3, 0)])
+            self.assertEqual(sorted(store.find_item({-1, 0, 1, 3, 4}, 5)),
+                             [(1, 1, 5, 3, 0), (1, 2, 5, 3, 1), (2, 1, 5, 3, 0), (2, 2, 5, 1, 0)])
+            self.assertEqual(store.get_for_player(3), {1: {1, 2, 3}, 2: {1}})
+            self.assertEqual(store.get_for_player(-1), {})
 
         def test_no_locations_for_last(self) -> None:
             store = self.type({
@@ -0,0 +1,54 @@
+# Tests for NetUtils.MultiData and NetUtils.encode_multidata
+import pickle
+import unittest
+import zlib
+
+from NetUtils import MultiData, NetworkSlot, SlotType, encode_multidata, multidata_format_version
+
+sample_multidata = {
+    "slot_data": {1: {"goal": 1}, 2: {"goal": 2, "seed": "abc"}},
+    "slot_info": {1: NetworkSlot("Player1", "Game", SlotType.player),
+                  2: NetworkSlot("Player2", "Game", SlotType.player)},
+    "locations": {1: {11: (21, 2, 0)}, 2: {21: (11, 1, 0)}},
+    "spheres": [{1: {11}}, {2: {21}}],
+    "seed_name": "12345",
+}
+
+
+class TestMultiData(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        """Test that encoded multidata decodes to the same values"""
+        data = encode_multidata(sample_multidata)
+        self.assertEqual(data[0], multidata_format_version)
+        multidata = MultiData(data)
+        self.assertCountEqual(multidata, sample_multidata)
+        for key, value in sample_multidata.items():
+            self.assertEqual(dict(multidata[key]) if key == "slot_data" else multidata[key], value)
+
+    def test_lazy_sections(self) -> None:
+        """Test that sections are only decoded once they are accessed"""
+        multidata = MultiData(encode_multidata(sample_multidata))
+        self.assertIsNotNone(multidata.raw("spheres"))
+        self.assertIsNotNone(multidata["slot_data"].raw(2))
+        self.assertEqual(multidata["slot_data"][1], {"goal": 1})
+        self.assertIsNone(multidata["slot_data"].raw(1))
+        self.assertIsNotNone(multidata["slot_data"].raw(2))
+        self.assertIsNotNone(multidata.raw("spheres"))
+
+    def test_re_encode(self) -> None:
+        """Test that re-encoding keeps changed and untouched sections alike"""
+        multidata = MultiData(encode_multidata(sample_multidata))
+        del multidata["locations"]
+        multidata["seed_name"] = "67890"
+        multidata = MultiData(encode_multidata(multidata))
+        self.assertNotIn("locations", multidata)
+        self.assertEqual(multidata["seed_name"], "67890")
+        self.assertEqual(multidata["spheres"], sample_multidata["spheres"])
+        self.assertEqual(multidata["slot_data"][2], sample_multidata["slot_data"][2])
+
+    def test_old_format(self) -> None:
+        """Test that the server still reads multidata of format version 3"""
+        from MultiServer import Context
+        data = bytes([3]) + zlib.compress(pickle.dumps(sample_multidata), 9)
+        self.assertEqual(Context.decompress(data), sample_multidata)
+        self.assertIsInstance(Context.decompress(encode_multidata(sample_multidata)), MultiData)
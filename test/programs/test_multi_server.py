@@ -1,5 +1,15 @@
+import asyncio
+import os
+import types
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+
+from typing_extensions import override
+
+from MultiServer import Client, Context, SaveJournal, ServerCommandProcessor
+from NetUtils import Endpoint, Hint, HintStatus, LocationStore, NetworkItem, decode
+from Utils import restricted_loads
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +48,233 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestSaveJournal(unittest.TestCase):
+    @override
+    def setUp(self) -> None:
+        import tempfile
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.save_filename = os.path.join(self.temp_dir.name, "test.apsave")
+
+    @override
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def make_context(self) -> Context:
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.save_filename = self.save_filename
+        ctx.saving = True
+        ctx.save_journal = SaveJournal(self.save_filename + ".journal")
+        return ctx
+
+    @staticmethod
+    def journal(ctx: Context) -> SaveJournal:
+        assert ctx.save_journal
+        return ctx.save_journal
+
+    def load_context(self) -> Context:
+        ctx = self.make_context()
+        with open(self.save_filename, "rb") as f:
+            save_data = restricted_loads(zlib.decompress(f.read()))
+        ctx.set_save(save_data)
+        self.journal(ctx).replay(ctx, save_data["journal_id"])
+        return ctx
+
+    def test_replay(self) -> None:
+        """Tests that changes written to the journal are restored when loading the full save"""
+        ctx = self.make_context()
+        ctx.save(True)
+        ctx.location_checks[0, 1] |= {1, 2}
+        self.journal(ctx).add_checks((0, 1), {1, 2})
+        ctx.received_items[0, 1, True] = [NetworkItem(3, 1, 1, 0)]
+        ctx.stored_data["key"] = [1]
+        ctx.save_changes(("stored_data", "key"))
+        self.journal(ctx).write_batch(ctx)
+        ctx.location_checks[0, 1].add(3)
+        self.journal(ctx).add_checks((0, 1), {3})
+        hint = Hint(1, 1, 5, 6, False)
+        ctx.hints[0, 1].add(hint)
+        self.journal(ctx).add_hints((0, 1), (hint,))
+        ctx.received_items[0, 1, True].append(NetworkItem(4, 2, 1, 0))
+        ctx.stored_data["key"].append(2)
+        ctx.client_game_state[0, 1] = 30
+        ctx.save_changes(("stored_data", "key"), ("client_game_state", (0, 1)))
+        self.journal(ctx).write_batch(ctx)
+        self.assertEqual(self.journal(ctx).batches, 2)
+
+        loaded = self.load_context()
+        self.assertEqual(loaded.location_checks[0, 1], {1, 2, 3})
+        self.assertEqual(loaded.hints[0, 1], {hint})
+        self.assertEqual(loaded.received_items, ctx.received_items)
+        self.assertEqual(loaded.stored_data, {"key": [1, 2]})
+        self.assertEqual(loaded.client_game_state[0, 1], 30)
+        self.assertEqual(loaded.random.getstate(), ctx.random.getstate())
+
+    def test_batch_contents(self) -> None:
+        """Tests that a batch only contains the new checks and hints, and the random state only if it changed"""
+        ctx = self.make_context()
+        ctx.location_checks[0, 1] |= {1, 2}
+        ctx.save(True)
+        ctx.location_checks[0, 1].add(3)
+        self.journal(ctx).add_checks((0, 1), {3})
+        hint = Hint(1, 1, 5, 6, False)
+        ctx.hints[0, 1].add(hint)
+        self.journal(ctx).add_hints((0, 1), (hint,))
+        ctx.save_changes()
+        self.journal(ctx).write_batch(ctx)
+        ctx.random.random()
+        ctx.save_changes()
+        self.journal(ctx).write_batch(ctx)
+        with open(self.journal(ctx).filename, "rb") as f:
+            _, first_batch, second_batch = SaveJournal.read_records(f)
+        self.assertEqual(first_batch, [("location_checks", (0, 1), {3}), ("new_hints", (0, 1), {hint})])
+        self.assertEqual([field for field, _, _ in second_batch], ["random_state"])
+
+    def test_full_save_resets_journal(self) -> None:
+        """Tests that a journal is not replayed onto a newer full save, and a cut off batch is ignored"""
+        ctx = self.make_context()
+        ctx.save(True)
+        ctx.received_items[0, 1, True] = [NetworkItem(3, 1, 1, 0)]
+        ctx.save_changes()
+        self.journal(ctx).write_batch(ctx)
+        with open(self.journal(ctx).filename, "ab") as f:
+            f.write(b"\x00\x00\x10\x00")  # batch cut off by a crash
+        self.assertEqual(len(self.load_context().received_items[0, 1, True]), 1)
+
+        with open(self.journal(ctx).filename, "rb") as f:
+            journal = f.read()
+        ctx.received_items[0, 1, True].append(NetworkItem(4, 2, 1, 0))
+        ctx.save(True)
+        self.assertEqual(self.journal(ctx).batches, 0)
+        with open(self.journal(ctx).filename, "wb") as f:
+            f.write(journal)
+        self.assertEqual(len(self.load_context().received_items[0, 1, True]), 2)
+
+    def test_full_save_needed(self) -> None:
+        """Tests that unjournaled changes and journals that get too long lead to a full save"""
+        ctx = self.make_context()
+        self.assertTrue(self.journal(ctx).compaction_due)
+        ctx.save(True)
+        self.assertFalse(self.journal(ctx).compaction_due)
+        ctx.save()
+        self.assertTrue(self.journal(ctx).compaction_due)
+        ctx.save(True)
+        for _ in range(SaveJournal.compact_after):
+            ctx.save_changes()
+            self.journal(ctx).write_batch(ctx)
+        self.assertTrue(self.journal(ctx).compaction_due)
+        with self.assertRaises(ValueError):
+            ctx.save_changes(("connect_names", "name"))
+
+
+class RecordingContext(Context):
+    def __init__(self) -> None:
+        super().__init__("", 0, "", "", 0, 0, False)
+        self.frames: typing.List[typing.Tuple[typing.List[Endpoint], str]] = []
+        self.disconnected: typing.List[Client] = []
+
+    @override
+    def send_frame(self, endpoints: typing.Iterable[Endpoint], msg: str) -> None:
+        self.frames.append((list(endpoints), msg))
+
+    @override
+    async def disconnect(self, endpoint: Client) -> None:
+        self.disconnected.append(endpoint)
+
+
+class TestOutbox(unittest.TestCase):
+    def test_coalesce(self) -> None:
+        """Tests that messages queued in one event loop iteration are combined and sent once per distinct frame"""
+        ctx = RecordingContext()
+        endpoints = [Endpoint(types.SimpleNamespace(open=True)) for _ in range(3)]
+
+        async def queue() -> None:
+            ctx.broadcast(endpoints, [{"cmd": "PrintJSON", "data": [{"text": "a"}]}])
+            ctx.broadcast(endpoints[:2], [{"cmd": "PrintJSON", "data": [{"text": "b"}]}])
+            await ctx.send_msgs(endpoints[1], [{"cmd": "Bounced", "data": {}}])
+            ctx.broadcast(endpoints[:1], [{"cmd": "PrintJSON", "data": [{"text": "c"}]}])
+            self.assertFalse(ctx.frames)
+            await asyncio.sleep(0)
+
+        asyncio.run(queue())
+        self.assertEqual(len(ctx.frames), 3)
+        received = {endpoint: decode(msg) for endpoints, msg in ctx.frames for endpoint in endpoints}
+        self.assertEqual([msg.get("data") for msg in received[endpoints[0]]],
+                         [[{"text": "a"}], [{"text": "b"}], [{"text": "c"}]])
+        self.assertEqual([msg["cmd"] for msg in received[endpoints[1]]], ["PrintJSON", "PrintJSON", "Bounced"])
+        self.assertEqual(len(received[endpoints[2]]), 1)
+
+    def test_closed_connection(self) -> None:
+        """Tests that an endpoint whose connection closes before the outbox is flushed is disconnected once"""
+        ctx = RecordingContext()
+        sockets = [types.SimpleNamespace(open=True) for _ in range(2)]
+        clients = [Client(typing.cast(typing.Any, socket), ctx) for socket in sockets]
+        closed_endpoint = Endpoint(types.SimpleNamespace(open=False))
+
+        async def queue() -> None:
+            ctx.endpoints.extend(clients)
+            self.assertFalse(await ctx.send_msgs(closed_endpoint, [{"cmd": "Bounced", "data": {}}]))
+            self.assertTrue(await ctx.send_msgs(clients[0], [{"cmd": "Bounced", "data": {}}]))
+            ctx.broadcast(clients, [{"cmd": "PrintJSON", "data": [{"text": "a"}]}])
+            sockets[0].open = False
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+        asyncio.run(queue())
+        self.assertEqual([receivers for receivers, _ in ctx.frames], [[clients[1]]])
+        self.assertEqual(ctx.disconnected, [clients[0]])
+
+    def test_frame_length(self) -> None:
+        """Tests that queued messages are not combined into frames longer than max_frame_length"""
+        ctx = RecordingContext()
+        msgs = [ctx.dumper([{"cmd": "PrintJSON", "data": [{"text": str(i) * 1000}]}]) for i in range(10)]
+        ctx.max_frame_length = 2500
+        frames = list(ctx.combine_encoded_msgs(msgs))
+        self.assertEqual(len(frames), 5)
+        self.assertEqual([msg for frame in frames for msg in decode(frame)],
+                         [msg for encoded in msgs for msg in decode(encoded)])
+
+
+class TestHintIndex(unittest.TestCase):
+    def test_recheck_location_hints(self) -> None:
+        """Tests that checking a location updates the hints about it for all involved players, and only those"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        hint = Hint(2, 1, 11, 21, False)
+        other_hint = Hint(1, 2, 12, 22, False)
+        ctx.hints[0, 1] = {hint, other_hint}
+        ctx.hints[0, 2] = {hint, other_hint}
+        ctx.hints[0, 3] = {Hint(3, 3, 11, 23, False)}
+        ctx.index_hints()
+
+        ctx.location_checks[0, 1] = {11}
+        changed: typing.Set[typing.Tuple[int, int]] = set()
+        ctx.recheck_location_hints(0, 1, {11}, changed)
+        found_hint = hint._replace(found=True, status=HintStatus.HINT_FOUND)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        self.assertEqual(ctx.hints[0, 1], {found_hint, other_hint})
+        self.assertEqual(ctx.hints[0, 2], {found_hint, other_hint})
+        self.assertFalse(next(iter(ctx.hints[0, 3])).found)
+
+        # a hint that got a new status is still rechecked
+        prioritized_hint = other_hint._replace(status=HintStatus.HINT_PRIORITY)
+        ctx.replace_hint(0, 1, other_hint, prioritized_hint)
+        ctx.replace_hint(0, 2, other_hint, prioritized_hint)
+        ctx.location_checks[0, 2] = {12}
+        changed.clear()
+        ctx.recheck_location_hints(0, 2, {12}, changed)
+        self.assertEqual(changed, {(0, 1), (0, 2)})
+        self.assertTrue(all(hint.found for hint in ctx.hints[0, 1] | ctx.hints[0, 2]))
+
+
+class TestSpheres(unittest.TestCase):
+    def test_get_sphere(self) -> None:
+        """Tests that spheres are looked up from the LocationStore, also when they are decoded late"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        ctx.locations = LocationStore({1: {11: (1, 1, 0), 12: (2, 2, 0)}, 2: {21: (3, 1, 0)}})
+        self.assertEqual(ctx.get_sphere(1, 11), -1)
+        ctx.spheres = lambda: [{1: {11}}, {1: {12}, 2: {21}}]
+        self.assertEqual(ctx.get_sphere(1, 11), 0)
+        self.assertEqual(ctx.get_sphere(2, 21), 1)
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(2, 22)
@@ -0,0 +1,98 @@
+import pickle
+from uuid import UUID, uuid4
+
+from flask import url_for
+
+from NetUtils import Hint, NetworkItem
+from . import TestBase
+
+
+class TestAPITracker(TestBase):
+    room_id: UUID
+    tracker_uuid: UUID
+
+    def setUp(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room, Seed
+
+        super().setUp()
+        multisave = {
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "location_checks": {(0, 1): {3, 1}, (0, 2): {2}},
+            "received_items": {(0, 1, True): [NetworkItem(10, 2, 2, 0)], (0, 2, True): [NetworkItem(11, 1, 1, 1)]},
+            "hints": {(0, 1): {Hint(1, 2, 2, 10, True)}},
+            "client_game_state": {(0, 2): 30},
+            "tracker_revisions": {"revision": 2, "slots": [((0, 1), 1), ((0, 2), 2)]},
+        }
+        self.tracker_uuid = uuid4()
+        with db_session:
+            seed = Seed(multidata=b"", owner=uuid4())
+            room = Room(seed=seed, owner=seed.owner, tracker=self.tracker_uuid, multisave=pickle.dumps(multisave))
+            self.room_id = room.id
+
+    def tearDown(self) -> None:
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.seed.delete()
+            room.delete()
+
+    def get(self, since: int = 0, etag: str = ""):
+        with self.app.app_context(), self.app.test_request_context():
+            return self.client.get(url_for("api.tracker_data", tracker=self.tracker_uuid, since=since),
+                                   headers={"If-None-Match": etag} if etag else {})
+
+    def test_full(self) -> None:
+        """Verify that all slots are returned without a known revision"""
+        for since in (0, 3):
+            response = self.get(since)
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.json["full"])
+            self.assertEqual(response.json["revision"], 2)
+            self.assertEqual([slot["player"] for slot in response.json["slots"]], [1, 2])
+        player1 = response.json["slots"][0]
+        self.assertEqual(player1["checked_locations"], [1, 3])
+        self.assertEqual(player1["received_items"], [{"item": 10, "location": 2, "player": 2, "flags": 0}])
+        self.assertEqual(len(player1["hints"]), 1)
+        self.assertEqual(player1["hints"][0]["location"], 2)
+        self.assertEqual(response.json["slots"][1]["status"], 30)
+
+    def test_delta(self) -> None:
+        """Verify that only slots changed after the given revision are returned"""
+        response = self.get(1)
+        self.assertFalse(response.json["full"])
+        self.assertEqual([slot["player"] for slot in response.json["slots"]], [2])
+        self.assertEqual(self.get(2).json["slots"], [])
+
+    def test_not_modified(self) -> None:
+        """Verify that a matching ETag returns 304 until the room saves again"""
+        from datetime import timedelta
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+
+        etag = self.get().headers["ETag"]
+        self.assertEqual(self.get(2, etag).status_code, 304)
+        with db_session:
+            Room.get(id=self.room_id).last_activity += timedelta(microseconds=1)
+        response = self.get(2, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_not_modified_skips_multisave(self) -> None:
+        """Verify that a 304 is returned without decoding the room's multisave"""
+        from unittest.mock import patch
+        from WebHostLib import tracker
+
+        etag = self.get().headers["ETag"]
+        tracker._multisave_cache.clear()
+        with patch.object(tracker, "restricted_loads", side_effect=AssertionError("multisave was decoded")) as loads:
+            self.assertEqual(self.get(2, etag).status_code, 304)
+        loads.assert_not_called()
+
+    def test_unknown_tracker(self) -> None:
+        """Verify that an unknown tracker returns 404"""
+        with self.app.app_context(), self.app.test_request_context():
+            response = self.client.get(url_for("api.tracker_data", tracker=uuid4()))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,61 @@
+import unittest
+from uuid import uuid4
+
+from WebHostLib.autolauncher import MultiworldInstance, get_relocations, get_room_hoster
+from WebHostLib.customserver import HosterLoad, RoomLoad
+
+
+class TestRoomPlacement(unittest.TestCase):
+    config = {
+        "PONY": {},
+        "SELFLAUNCHCERT": None,
+        "SELFLAUNCHKEY": None,
+        "HOST_ADDRESS": "localhost",
+    }
+
+    def setUp(self) -> None:
+        self.hosters = [MultiworldInstance(self.config, x) for x in range(2)]
+
+    def host(self, hoster: MultiworldInstance, lag: float, *loads: RoomLoad) -> list:
+        room_ids = [uuid4() for _ in loads]
+        hoster.room_ids.update(room_ids)
+        hoster.load = HosterLoad(lag, dict(zip(room_ids, loads)))
+        return room_ids
+
+    def test_least_loaded(self) -> None:
+        """Verify that new rooms go to the hoster with the least load, not the one with the fewest rooms"""
+        busy, idle = self.hosters
+        self.host(busy, 0, RoomLoad(300, 50))
+        self.host(idle, 0, RoomLoad(1, 0), RoomLoad(2, 0))
+        self.assertIs(get_room_hoster(self.hosters, uuid4()), idle)
+
+    def test_overloaded(self) -> None:
+        """Verify that overloaded hosters only get new rooms if every hoster is overloaded"""
+        lagging, busy = self.hosters
+        self.host(lagging, 1, RoomLoad(1, 0))
+        self.host(busy, 0, RoomLoad(300, 50))
+        self.assertIs(get_room_hoster(self.hosters, uuid4()), busy)
+
+    def test_hosted(self) -> None:
+        """Verify that rooms stay with the hoster already hosting them"""
+        busy, idle = self.hosters
+        room_id, = self.host(busy, 1, RoomLoad(300, 50))
+        self.assertIs(get_room_hoster(self.hosters, room_id), busy)
+
+    def test_relocation(self) -> None:
+        """Verify that overloaded hosters move their busiest room that another hoster can take"""
+        busy, idle = self.hosters
+        small, large, huge = self.host(busy, 1, RoomLoad(2, 1), RoomLoad(100, 10), RoomLoad(300, 50))
+        self.host(idle, 0, RoomLoad(50, 5))
+        self.assertEqual(get_relocations(self.hosters), [(busy, large)])
+        busy.rooms_relocating.add(large)
+        self.assertEqual(get_relocations(self.hosters), [], "already moving a room")
+
+    def test_no_relocation(self) -> None:
+        """Verify that rooms are not moved if that would not lessen the load of the busiest hoster"""
+        busy, idle = self.hosters
+        self.host(busy, 1, RoomLoad(300, 50))
+        self.assertEqual(get_relocations(self.hosters), [], "single room")
+        self.host(busy, 1, RoomLoad(300, 50))
+        self.host(idle, 0, RoomLoad(300, 50), RoomLoad(100, 0))
+        self.assertEqual(get_relocations(self.hosters), [], "other hoster is as busy")
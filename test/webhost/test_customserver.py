@@ -0,0 +1,69 @@
+import os
+import unittest
+from uuid import uuid4
+
+from . import TestBase
+
+
+class TestSeedMultidataCache(TestBase):
+    def test_cached_multidata(self) -> None:
+        """Verify that multidata is fetched from the database once and then read from the cache file."""
+        from pony.orm import db_session
+
+        from Utils import cache_path
+        from WebHostLib.customserver import get_seed_multidata
+        from WebHostLib.models import Seed
+
+        with db_session:
+            seed = Seed(multidata=b"\x04multidata", owner=uuid4())
+            seed_id = seed.id
+        path = cache_path("multidata", f"{seed_id}.archipelago")
+        try:
+            with db_session, get_seed_multidata(Seed.get(id=seed_id)) as data:
+                self.assertEqual(data[:], b"\x04multidata")
+                self.assertTrue(os.path.isfile(path))
+                Seed.get(id=seed_id).multidata = b"\x04changed"
+            with db_session, get_seed_multidata(Seed.get(id=seed_id)) as data:
+                self.assertEqual(data[:], b"\x04multidata")
+        finally:
+            with db_session:
+                Seed.get(id=seed_id).delete()
+            os.unlink(path)
+
+
+class TestTrackerRevisions(unittest.TestCase):
+    def test_changed_slots(self) -> None:
+        """Verify that only slots that changed since the last save get a new revision."""
+        import collections
+        import logging
+
+        from WebHostLib.customserver import WebHostContext
+
+        ctx = WebHostContext.__new__(WebHostContext)
+        ctx.logger = logging.getLogger()
+        ctx.connect_names = {"Player1": (0, 1), "Player2": (0, 2)}
+        ctx.location_checks = collections.defaultdict(set)
+        ctx.received_items = {}
+        ctx.hints = collections.defaultdict(set)
+        ctx.client_game_state = collections.defaultdict(int)
+        ctx.tracker_revision = 0
+        ctx.tracker_slot_revisions = {}
+        ctx.tracker_lengths = {}
+        ctx.tracker_changed_slots = set()
+        ctx.stored_data_notification_clients = collections.defaultdict(set)
+
+        ctx.update_tracker_revisions()
+        self.assertEqual(ctx.tracker_revision, 1)
+        self.assertEqual(ctx.tracker_slot_revisions, {(0, 1): 1, (0, 2): 1})
+        ctx.update_tracker_revisions()
+        self.assertEqual(ctx.tracker_revision, 1)
+        ctx.location_checks[0, 2].add(1)
+        ctx.update_tracker_revisions()
+        self.assertEqual(ctx.tracker_slot_revisions, {(0, 1): 1, (0, 2): 2})
+        ctx.client_game_state[0, 1] = 30
+        ctx.on_client_status_change(0, 1)
+        ctx.update_tracker_revisions()
+        self.assertEqual(ctx.tracker_slot_revisions, {(0, 1): 3, (0, 2): 2})
+        ctx.on_changed_hints(0, 2)
+        ctx.update_tracker_revisions()
+        self.assertEqual(ctx.tracker_slot_revisions, {(0, 1): 3, (0, 2): 4})
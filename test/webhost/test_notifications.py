@@ -0,0 +1,26 @@
+import unittest
+from uuid import uuid4
+
+from WebHostLib.notifications import RoomNotificationListener, notify_room
+
+
+class TestRoomNotifications(unittest.TestCase):
+    def test_notify_room(self) -> None:
+        """Verify that notified rooms are received once per receive call"""
+        room_ids = {uuid4(), uuid4()}
+        with RoomNotificationListener(("127.0.0.1", 0)) as listener:
+            self.assertEqual(listener.receive(0), set())
+            for room_id in room_ids:
+                notify_room(listener.address, room_id)
+                notify_room(listener.address, room_id)
+            received = set()
+            for _ in range(10):
+                received |= listener.receive(1)
+                if received == room_ids:
+                    break
+            self.assertEqual(received, room_ids)
+            self.assertEqual(listener.receive(0), set())
+
+    def test_disabled(self) -> None:
+        """Verify that notifying without an address does nothing"""
+        notify_room(None, uuid4())
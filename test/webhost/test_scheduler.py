@@ -0,0 +1,112 @@
+import dataclasses
+import pickle
+import typing
+import unittest
+from uuid import UUID, uuid4
+
+from WebHostLib.models import STATE_ERROR, STATE_QUEUED
+from WebHostLib.scheduler import GenerationScheduler, Lane
+
+
+@dataclasses.dataclass
+class FakeGeneration:
+    id: UUID
+    owner: UUID
+    options: bytes
+    state: int = STATE_QUEUED
+
+
+def make_generation(players: int, game: str = "Archipelago", owner: typing.Optional[UUID] = None) -> FakeGeneration:
+    options = {f"Player{player}.yaml": {"game": game} for player in range(1, players + 1)}
+    return FakeGeneration(uuid4(), owner or uuid4(), pickle.dumps(options))
+
+
+class TestGenerationScheduler(unittest.TestCase):
+    def test_lanes(self) -> None:
+        """Verify that jobs are sorted into lanes by their estimated cost"""
+        scheduler = GenerationScheduler(4)
+        self.assertEqual(scheduler.add(make_generation(1)).lane, Lane.small)
+        self.assertEqual(scheduler.add(make_generation(20)).lane, Lane.medium)
+        self.assertEqual(scheduler.add(make_generation(200)).lane, Lane.large)
+
+    def test_fast_lane(self) -> None:
+        """Verify that big jobs leave generators free for small jobs"""
+        scheduler = GenerationScheduler(4, fast_generators=1, large_generators=4)
+        big = [make_generation(200) for _ in range(4)]
+        self.assertEqual(len(scheduler.schedule(big)), 3)
+        small = make_generation(1)
+        self.assertEqual(scheduler.schedule(big[3:] + [small]), [small])
+
+    def test_large_cap(self) -> None:
+        """Verify that only large_generators large jobs run at once"""
+        scheduler = GenerationScheduler(4, fast_generators=0, large_generators=2)
+        large = [make_generation(200) for _ in range(3)]
+        medium = make_generation(20)
+        started = scheduler.schedule(large + [medium])
+        self.assertEqual(started, large[:2] + [medium])
+        scheduler.finished(large[0].id, True)
+        self.assertEqual(scheduler.schedule(large[2:]), large[2:])
+
+    def test_owner_fairness(self) -> None:
+        """Verify that an owner with running jobs waits for owners without any"""
+        scheduler = GenerationScheduler(2, fast_generators=0)
+        busy_owner = uuid4()
+        first = make_generation(1, owner=busy_owner)
+        self.assertEqual(scheduler.schedule([first]), [first])
+        second = make_generation(1, owner=busy_owner)
+        other = make_generation(1)
+        self.assertEqual(scheduler.schedule([second, other]), [other])
+        self.assertEqual(scheduler.schedule([second]), [])
+        scheduler.finished(first.id, False)
+        self.assertEqual(scheduler.schedule([second]), [second])
+
+    def test_history(self) -> None:
+        """Verify that finished jobs update the cost estimate of their game"""
+        scheduler = GenerationScheduler(2)
+        generation = make_generation(2, "Fast Game")
+        scheduler.schedule([generation])
+        scheduler.finished(generation.id, True)
+        self.assertLess(scheduler.player_seconds["Fast Game"], scheduler.default_player_seconds)
+        self.assertLess(scheduler.add(make_generation(200, "Fast Game")).cost,
+                        scheduler.add(make_generation(200, "Other Game")).cost)
+
+    def test_metrics(self) -> None:
+        """Verify that queue depth and running jobs are reported per lane"""
+        scheduler = GenerationScheduler(1, large_generators=1)
+        large = make_generation(200)
+        small = make_generation(1)
+        scheduler.schedule([large, small])
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["running"], {"small": 0, "medium": 0, "large": 1})
+        self.assertEqual(metrics["queued"], {"small": 1, "medium": 0, "large": 0})
+        self.assertGreaterEqual(metrics["longest_wait"], 0)
+        scheduler.finished(large.id, True)
+        self.assertEqual(scheduler.metrics()["running"]["large"], 0)
+
+    def test_corrupt_options(self) -> None:
+        """Verify that a generation with unreadable options fails on its own instead of stopping the scheduler"""
+        scheduler = GenerationScheduler(2)
+        corrupt = FakeGeneration(uuid4(), uuid4(), b"not a pickle")
+        generation = make_generation(1)
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(scheduler.schedule([corrupt, generation]), [generation])
+        self.assertEqual(corrupt.state, STATE_ERROR)
+        self.assertEqual(generation.state, STATE_QUEUED)
+        with self.assertLogs(level="ERROR"):
+            scheduler.start(corrupt)
+        self.assertNotIn(corrupt.id, scheduler.running)
+
+    def test_weighted_games(self) -> None:
+        """Verify that weighted games cost the mean of their games and that every yaml document counts as a player"""
+        scheduler = GenerationScheduler(2)
+        scheduler.player_seconds.update({"Fast Game": 1., "Slow Game": 9.})
+        weighted = "name: Player1\ngame:\n  Fast Game: 1\n  Slow Game: 3\n"
+        options = {
+            "Weighted.yaml": weighted,
+            "Both.yaml": weighted + "---\nname: Player2\ngame: Fast Game\n",
+            "Weights.yaml": {"game": {"Fast Game": 0, "Slow Game": 2}},
+        }
+        job = scheduler.add(FakeGeneration(uuid4(), uuid4(), pickle.dumps(options)))
+        self.assertEqual(job.players, 4)
+        self.assertEqual(job.games, {"Fast Game": 1.5, "Slow Game": 2.5})
+        self.assertEqual(job.cost, 1.5 * 1. + 2.5 * 9.)
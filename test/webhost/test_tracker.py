@@ -1,7 +1,8 @@
 import os
 import pickle
 from pathlib import Path
-from typing import ClassVar
+from types import SimpleNamespace
+from typing import Any, ClassVar, cast
 from uuid import UUID, uuid4
 
 from flask import url_for
@@ -93,3 +94,47 @@ class TestTracker(TestBase):
                 headers={"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00"},  # missing timezone
             )
             self.assertEqual(response.status_code, 400)
+
+    def test_multisave_cache(self) -> None:
+        """
+        Verify that the decoded multisave is reused until the room saves again
+        """
+        from datetime import timedelta
+        from pony.orm import db_session
+        from WebHostLib.customserver import WebHostContext
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import get_room_multisave
+
+        with db_session:
+            room: Room = Room.get(id=self.room_id)
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {1}}})
+            multisave = get_room_multisave(room)
+            self.assertEqual(multisave["location_checks"], {(0, 1): {1}})
+            room.multisave = pickle.dumps({"location_checks": {(0, 1): {1, 2}}})
+            self.assertIs(get_room_multisave(room), multisave)
+            room.last_activity += timedelta(seconds=1)
+            self.assertEqual(get_room_multisave(room)["location_checks"], {(0, 1): {1, 2}})
+
+        # a save on shutdown doesn't count as activity, but still has to be seen
+        ctx = SimpleNamespace(room_id=self.room_id, get_save=lambda: {"location_checks": {(0, 1): {1, 2, 3}}})
+        WebHostContext._save(cast(Any, ctx), exit_save=True)
+        with db_session:
+            room = Room.get(id=self.room_id)
+            self.assertEqual(get_room_multisave(room)["location_checks"], {(0, 1): {1, 2, 3}})
+
+    def test_name_tables_unknown_ids(self) -> None:
+        """
+        Verify that looking up unknown ids in the shared name tables doesn't add them
+        """
+        from pony.orm import db_session
+        from WebHostLib.models import Room
+        from WebHostLib.tracker import TrackerData
+
+        with db_session:
+            tracker_data = TrackerData(Room.get(id=self.room_id))
+        item_names = tracker_data.item_id_to_name["Archipelago"]
+        location_names = tracker_data.location_id_to_name["Archipelago"]
+        size = len(item_names), len(location_names)
+        self.assertEqual(item_names[-1234], "Unknown Item (ID: -1234)")
+        self.assertEqual(location_names[-1234], "Unknown Location (ID: -1234)")
+        self.assertEqual((len(item_names), len(location_names)), size)
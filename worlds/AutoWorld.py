@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import concurrent.futures
 import hashlib
 import logging
 import pathlib
@@ -188,19 +189,58 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
-def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
-    world_types: Set[AutoWorldRegister] = set()
+def _check_new_items(multiworld: "MultiWorld", player: int, new_items: List["Item"]) -> None:
+    for i, item in enumerate(new_items):
+        for other in new_items[i+1:]:
+            assert item is not other, (
+                f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
+                f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+
+
+def _call_isolated(multiworld: "MultiWorld", method_name: str, players: List[int], threads: int,
+                   *args: Any) -> Dict[int, List["Item"]]:
+    """Runs method_name for players concurrently, returning the items each of them added to the itempool."""
+    prev_item_count = len(multiworld.itempool)
+    passthrough = multiworld.random.passthrough
+    # isolated stages have to use their world's random, so remove the global random state like for output
+    multiworld.random.passthrough = False
+    try:
+        with concurrent.futures.ThreadPoolExecutor(min(threads, len(players))) as pool:
+            futures = [pool.submit(call_single, multiworld, method_name, player, *args) for player in players]
+            for future in futures:
+                future.result()
+    finally:
+        multiworld.random.passthrough = passthrough
+    new_items: Dict[int, List["Item"]] = {player: [] for player in players}
+    for item in multiworld.itempool[prev_item_count:]:
+        new_items[item.player].append(item)
+    del multiworld.itempool[prev_item_count:]
+    return new_items
+
+
+def call_all(multiworld: "MultiWorld", method_name: str, *args: Any, threads: int = 1) -> None:
+    """
+    Calls method_name on every world, in player order, then its stage_ method on every world type.
+
+    :param threads: if more than 1, worlds that declare method_name in World.isolated_stages are called concurrently
+    first. Their items are then put into the itempool in player order, as if they were called one after another.
+    """
+    isolated_items: Dict[int, List["Item"]] = {}
+    if threads > 1:
+        isolated_players = [player for player in multiworld.player_ids
+                            if method_name in multiworld.worlds[player].isolated_stages]
+        if len(isolated_players) > 1:
+            isolated_items = _call_isolated(multiworld, method_name, isolated_players, threads, *args)
     for player in multiworld.player_ids:
-        prev_item_count = len(multiworld.itempool)
-        world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
-        if __debug__:
+        if player in isolated_items:
+            new_items = isolated_items[player]
+            multiworld.itempool += new_items
+        else:
+            prev_item_count = len(multiworld.itempool)
+            call_single(multiworld, method_name, player, *args)
             new_items = multiworld.itempool[prev_item_count:]
-            for i, item in enumerate(new_items):
-                for other in new_items[i+1:]:
-                    assert item is not other, (
-                        f"Duplicate item reference of \"{item.name}\" in \"{multiworld.worlds[player].game}\" "
-                        f"of player \"{multiworld.player_name[player]}\". Please make a copy instead.")
+        if __debug__:
+            _check_new_items(multiworld, player, new_items)
 
     call_stage(multiworld, method_name, *args)
 
@@ -315,6 +355,17 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    isolated_stages: ClassVar[FrozenSet[str]] = frozenset()
+    """Names of generation steps, such as "create_regions", that for this world only read and write its own player's
+    data, use self.random instead of multiworld.random and only add this player's Regions and Items to the multiworld.
+    When generating with multiple stage_threads, these steps may run concurrently with those of other players."""
+
+    incremental_reachability: bool = False
+    """If True, CollectionState records which items and regions each blocked Entrance's access rule reads and only
+    re-checks that Entrance once one of them changed. Sphere searches, such as MultiWorld.get_spheres, do the same for
+    Locations. Requires access rules to only read state through prog_items (state.has and similar) and region
+    reachability (state.can_reach), not through LogicMixin attributes."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
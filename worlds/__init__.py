@@ -1,15 +1,22 @@
 import importlib
 import importlib.util
+import hashlib
+import json
 import logging
 import os
+import pickle
 import sys
+import threading
 import warnings
 import zipimport
 import time
 import dataclasses
-from typing import Dict, List, TypedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Type, TypedDict
 
-from Utils import local_path, user_path
+from Utils import __version__, cache_path, local_path, user_path
+
+if TYPE_CHECKING:
+    from .AutoWorld import World
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -27,6 +34,7 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "load_all_worlds",
 }
 
 
@@ -51,6 +59,7 @@ class WorldSource:
     is_zip: bool = False
     relative: bool = True  # relative to regular world import folder
     time_taken: float = -1.0
+    loaded: bool = dataclasses.field(default=False, compare=False)  # load was attempted
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
@@ -61,7 +70,27 @@ class WorldSource:
             return os.path.join(local_folder, self.path)
         return self.path
 
+    @property
+    def module_name(self) -> str:
+        return os.path.basename(self.path).rsplit(".", 1)[0]
+
+    def get_fingerprint(self) -> str:
+        """Changes whenever any file of the world changes."""
+        path = self.resolved_path
+        if self.is_zip:
+            stat = os.stat(path)
+            return f"{stat.st_mtime_ns}-{stat.st_size}"
+        fingerprint = hashlib.sha1()
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(folder for folder in dirs if folder != "__pycache__")
+            for file in sorted(files):
+                file_path = os.path.join(root, file)
+                stat = os.stat(file_path)
+                fingerprint.update(f"{os.path.relpath(file_path, path)}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+        return fingerprint.hexdigest()
+
     def load(self) -> bool:
+        self.loaded = True
         try:
             start = time.perf_counter()
             if self.is_zip:
@@ -82,6 +111,7 @@ class WorldSource:
             else:
                 importlib.import_module(f".{self.path}", "worlds")
             self.time_taken = time.perf_counter()-start
+            _refresh_data_package(self)
             return True
 
         except Exception:
@@ -93,7 +123,7 @@ class WorldSource:
             traceback.print_exc(file=file_like)
             file_like.seek(0)
             logging.exception(file_like.read())
-            failed_world_loads.append(os.path.basename(self.path).rsplit(".", 1)[0])
+            failed_world_loads.append(self.module_name)
             return False
 
 
@@ -115,15 +145,219 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
 world_sources.sort()
-for world_source in world_sources:
-    world_source.load()
 
-# Build the data package for each game.
+_load_lock = threading.RLock()  # loading a world may load others, like worlds it imports
+game_sources: Dict[str, WorldSource] = {}  # which world source registers a game, from the world index
+
+
+def load_game(game: str) -> bool:
+    """Loads the world source registering the game, if it is known and not loaded yet."""
+    with _load_lock:
+        world_source = game_sources.get(game, None)
+        if world_source is None or world_source.loaded:
+            return False
+        return world_source.load()
+
+
+def load_all_worlds() -> None:
+    """Loads every world source, in the order of world_sources."""
+    with _load_lock:
+        for world_source in world_sources:
+            if not world_source.loaded:
+                world_source.load()
+
+
+class WorldTypes(Dict[str, "Type[World]"]):
+    """
+    AutoWorldRegister.world_types, which loads the world of a game the first time the game is looked up.
+    Going through all games, including getting their count, loads all worlds.
+    """
+    def __missing__(self, game: str) -> "Type[World]":
+        if load_game(game) and dict.__contains__(self, game):
+            return dict.__getitem__(self, game)
+        raise KeyError(game)
+
+    def __contains__(self, game: object) -> bool:
+        if dict.__contains__(self, game):
+            return True
+        return isinstance(game, str) and load_game(game) and dict.__contains__(self, game)
+
+    def get(self, game: str, default: Any = None) -> Any:
+        return self[game] if game in self else default
+
+    def __iter__(self):
+        load_all_worlds()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        load_all_worlds()
+        return dict.__len__(self)
+
+    def keys(self):
+        load_all_worlds()
+        return dict.keys(self)
+
+    def values(self):
+        load_all_worlds()
+        return dict.values(self)
+
+    def items(self):
+        load_all_worlds()
+        return dict.items(self)
+
+
 from .AutoWorld import AutoWorldRegister
 
-network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
-}
+AutoWorldRegister.world_types = WorldTypes(AutoWorldRegister.world_types)
+
+
+def _read_world_index(index_path: str) -> Dict[str, Any]:
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version", None) != __version__:
+        return {}
+    return index.get("sources", {})
+
+
+def _update_world_index() -> Dict[str, Any]:
+    """
+    Fills game_sources from the world index cache, which knows the games each world source registers.
+    World sources that changed since they were indexed, or were never indexed, are loaded to index them.
+    Returns the index entry of each world source that loaded, by its resolved_path.
+    """
+    index_path = cache_path("world_index.json")
+    index = _read_world_index(index_path)
+    fingerprints = {world_source.resolved_path: world_source.get_fingerprint() for world_source in world_sources}
+    changed_sources = [world_source for world_source in world_sources
+                       if index.get(world_source.resolved_path, {}).get("fingerprint", None)
+                       != fingerprints[world_source.resolved_path]]
+    for world_source in changed_sources:
+        world_source.load()
+
+    # games of the changed world sources that loaded, found through the module that registered them
+    changed_games: Dict[str, List[str]] = {world_source.resolved_path: [] for world_source in changed_sources
+                                           if world_source.module_name not in failed_world_loads}
+    sources_by_module = {world_source.module_name: world_source for world_source in world_sources}
+    for game, world_type in dict.items(AutoWorldRegister.world_types):
+        package, _, module = world_type.__module__.partition(".")
+        world_source = sources_by_module.get(module.split(".")[0], None) if package == "worlds" else None
+        if world_source and world_source.resolved_path in changed_games:
+            changed_games[world_source.resolved_path].append(game)
+
+    new_index: Dict[str, Any] = {}
+    for world_source in world_sources:
+        path = world_source.resolved_path
+        if path in changed_games:
+            new_index[path] = {"fingerprint": fingerprints[path], "games": changed_games[path]}
+        elif index.get(path, {}).get("fingerprint", None) == fingerprints[path]:
+            new_index[path] = index[path]
+        else:
+            continue  # failed to load, so try again next time
+        for game in new_index[path]["games"]:
+            game_sources.setdefault(game, world_source)
+
+    if new_index != index:
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            temp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": __version__, "sources": new_index}, f)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            logging.warning(f"Could not write world index {index_path}: {e}")
+    return new_index
+
+
+world_index = _update_world_index()
+
+
+def _get_data_package_cache_path(world_source: WorldSource) -> str:
+    source_hash = hashlib.sha1(world_source.resolved_path.encode()).hexdigest()
+    return cache_path("datapackage", f"{world_source.module_name}-{source_hash[:16]}.pickle")
+
+
+def _read_data_package_cache(world_source: WorldSource) -> Optional[Dict[str, GamesPackage]]:
+    fingerprint = world_index[world_source.resolved_path]["fingerprint"]
+    try:
+        with open(_get_data_package_cache_path(world_source), "rb") as f:
+            cached = pickle.load(f)
+        if cached["version"] == __version__ and cached["fingerprint"] == fingerprint:
+            return cached["games"]
+    except Exception:  # missing, or written by a different version
+        pass
+    return None
+
+
+def _write_data_package_cache(world_source: WorldSource, games: Dict[str, GamesPackage]) -> None:
+    fingerprint = world_index[world_source.resolved_path]["fingerprint"]
+    path = _get_data_package_cache_path(world_source)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump({"version": __version__, "fingerprint": fingerprint, "games": games}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logging.warning(f"Could not write data package cache {path}: {e}")
+
+
+def get_source_data_packages(world_source: WorldSource) -> Dict[str, GamesPackage]:
+    """
+    Returns the data packages of the games of an indexed world source.
+    Unless the world is loaded already, they come from a cache on disk that is only rebuilt after the world changed.
+    Loaded worlds always build their own, as some worlds order their names differently in each process,
+    which changes the checksum.
+    """
+    use_cache = not world_source.loaded
+    if use_cache:
+        games = _read_data_package_cache(world_source)
+        if games is not None:
+            return games
+    indexed_games = world_index[world_source.resolved_path]["games"]
+    games: Dict[str, GamesPackage] = {}
+    for game in indexed_games:
+        # the world may have failed to load, then its games are left out like those of worlds that failed to index
+        world_type = AutoWorldRegister.world_types.get(game)
+        if world_type:
+            games[game] = world_type.get_data_package_data()
+    if use_cache and len(games) == len(indexed_games):
+        _write_data_package_cache(world_source, games)
+    return games
+
+
+def _refresh_data_package(world_source: WorldSource) -> None:
+    """Replaces the cached data packages of a world source that loaded after network_data_package was built."""
+    data_package = globals().get("network_data_package", None)
+    if data_package is not None and world_source.resolved_path in world_index:
+        for game in world_index[world_source.resolved_path]["games"]:
+            # the source may be imported already, and still registering its games
+            world_type = dict.get(AutoWorldRegister.world_types, game, None)
+            if world_type:
+                data_package["games"][game] = world_type.get_data_package_data()
+
+
+def __getattr__(name: str) -> Any:
+    # the data package needs all games, so only build it when it is used
+    if name == "network_data_package":
+        global network_data_package
+        with _load_lock:
+            games: Dict[str, GamesPackage] = {}
+            for world_source in world_sources:
+                if world_source.resolved_path in world_index:
+                    games.update(get_source_data_packages(world_source))
+            # games of worlds that did not come from a world source
+            for game, world_type in dict.items(AutoWorldRegister.world_types):
+                if game not in games:
+                    games[game] = world_type.get_data_package_data()
+            network_data_package = {"games": games}
+        return network_data_package
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+network_data_package: DataPackage
 